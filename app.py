@@ -1,41 +1,188 @@
 ## options_pricing/app.py
-import math
+# Kept to a small import graph for cold starts: NumPy/SciPy-backed modules
+# (pricing engines, surfaces, portfolios, scenarios) and boto3 are imported
+# where they are first used. benchmarks/import_time.py reports the breakdown.
+import itertools
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from models import BSM
-from monte_carlo import monte_carlo_option_price
-from models import binomial_tree_american_option, binomial_tree_call
-from models import delta, gamma, vega, hedge_ratio
-from models import protective_put_pl, covered_call_pl,collar_pl
-import numpy as np 
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, conint
 from mangum import Mangum
+import threading
 import uuid, json, os
-import boto3
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Any, Optional, Union
 from decimal import Decimal
+import time
+from jobs import run_job, estimate_cost, to_decimal, INPUT_ERRORS
+from result_cache import ResultCache, canonical_key, expires_at, CACHE_ENABLED
+from job_metrics import JobTimer, MetricsAggregator, run_profiled, read_metrics, METRICS_ENABLED, METRICS_PREFIX
+from result_codec import encode_result, decode_result, find_packed, iter_bytes, blob_store, BLOB_URL, PACKING_ENABLED
+from result_watcher import ResultWatcher
+
+if TYPE_CHECKING:
+    from vol_surface import VolSurface
+    from portfolio import Portfolio
 
 # https://www.deadbear.io/simple-serverless-fastapi-with-aws-lambda/
 app = FastAPI(title="Options Pricing API")
+# Endpoints that compute or call AWS are plain `def`, so FastAPI runs them in
+# its threadpool and the event loop stays free for long-polls and event streams
 REGION = os.environ.get("AWS_REGION") or os.environ.get("AWS_DEFAULT_REGION") or "us-east-1"
+# Cap on the MC `workers` a request may ask for; inline jobs start their pool in this process
+MAX_WORKERS = os.cpu_count() or 1
 
 class PriceRequest(BaseModel):
-    model: str             # e.g. "bs", "mc_call", "mc_put", "bin_amer_call", "bin_eur_call", "bsm_eur_call", "cve_amer_call"
+    model: str             # e.g. "bs", "mc_call", "mc_put", "bin_amer_call", "bin_eur_call", "bsm_eur_call", "cve_amer_call",
+                           # or path-dependent "mc_asian_call", "mc_barrier_put", "mc_lookback_call", ...
+                           # or Longstaff-Schwartz "lsm_amer_call", "lsm_amer_put",
+                           # or grid methods "tri_amer_put", "tri_eur_call", "pde_amer_put", "pde_eur_call", ...
     spot: float
     strike: float
     rate: float            # risk-free rate
-    vol: float             # volatility (as decimal, e.g. 0.2 for 20%)
+    vol: Optional[float] = None  # volatility (as decimal, e.g. 0.2 for 20%)
+    surface_id: Optional[str] = None  # price off a stored vol surface instead of `vol`
     time: float            # time to maturity in years
     q: float = 0.0         # dividend yield, if needed
     sims: int = 100_000    # number of Monte Carlo simulations
     steps: int = 5_000     # number of steps for binomial trees
+    acceleration: Optional[str] = None  # binomial trees: "bbs", "richardson" or "bbsr"
+    space_steps: int = 200     # pde_*: spot grid intervals
+    time_steps: int = 200      # pde_*: time steps
+    return_surface: bool = False  # pde_*: include the price across the spot grid
     option_type: str = 'call'  # 'call' or 'put'
+    seed: Optional[int] = None # RNG seed for reproducible Monte Carlo prices
+    variance_reduction: list[str] = []  # any of "antithetic", "control_variate", "moment_matching", "sobol"
+    target_std_error: Optional[float] = None  # MC: stop once the standard error reaches this
+    time_budget: Optional[float] = None       # MC: stop after this many seconds
+    max_sims: int = 10_000_000                # MC: path cap when a target or budget is set
+    workers: conint(ge=1, le=MAX_WORKERS) = 1  # MC: worker processes; results don't depend on it
+    monitoring_steps: int = 252               # path MC: number of monitoring dates
+    barrier: Optional[float] = None           # mc_barrier_*: barrier level
+    barrier_type: Optional[str] = None        # mc_barrier_*: "up_and_out", "up_and_in", "down_and_out", "down_and_in"
+    exercise_dates: int = 50                  # lsm_amer_*: exercise dates including expiry
+    regression_paths: int = 50_000            # lsm_amer_*: paths used to fit the exercise rule
+
+class BatchPriceRequest(BaseModel):
+    model: str             # same model names as PriceRequest; option_type picks call/put per contract
+    spot: Union[float, list[float]]      # shared spot or one per contract
+    strike: Union[float, list[float]]
+    rate: Union[float, list[float]]
+    vol: Union[float, list[float], None] = None
+    surface_id: Optional[str] = None     # look vols up on a stored surface instead
+    time: Union[float, list[float]]
+    q: Union[float, list[float]] = 0.0
+    option_type: Union[str, list[str]] = 'call'
+    sims: int = 100_000
+    steps: int = 5_000
+    acceleration: Optional[str] = None
+    seed: Optional[int] = None
 
 class GreeksRequest(BaseModel):
     spot: float
     strike: float
     rate: float
-    vol: float             # volatility (as decimal)
+    vol: Optional[float] = None  # volatility (as decimal)
+    surface_id: Optional[str] = None  # take vol from a stored surface instead
     time: float            # time to maturity in years
+    q: float = 0.0         # dividend yield
+    option_type: str = 'call'  # 'call' or 'put'
+    model: str = "bs"      # "bs", "bin_amer_*"/"bin_eur_*" (tree levels), "pde_*" (grid), "mc_call"/"mc_put" (pathwise)
+    steps: int = 5_000     # bin_*: tree steps
+    acceleration: Optional[str] = None  # bin_*: "bbs", "richardson" or "bbsr"
+    space_steps: int = 200     # pde_*: spot grid intervals
+    time_steps: int = 200      # pde_*: time steps
+    sims: int = 100_000        # mc_*: paths
+    seed: Optional[int] = None
+    variance_reduction: list[str] = []  # mc_*: only "antithetic"
+    workers: conint(ge=1, le=MAX_WORKERS) = 1
+
+class ImpliedVolRequest(BaseModel):
+    price: Union[float, list[float]]     # observed option price(s)
+    spot: Union[float, list[float]]
+    strike: Union[float, list[float]]
+    rate: Union[float, list[float]]
+    time: Union[float, list[float]]
+    q: Union[float, list[float]] = 0.0
+    option_type: Union[str, list[str]] = 'call'
+    tol: float = 1e-8          # relative price tolerance
+    max_iter: int = 100
+
+class SurfaceQuote(BaseModel):
+    expiry: float                  # years
+    strike: float
+    vol: Optional[float] = None    # implied vol; give this or price
+    price: Optional[float] = None  # option price, converted to implied vol
+    option_type: str = 'call'      # for price quotes
+    # A quote with neither vol nor price removes that (expiry, strike) point
+
+class SurfaceRequest(BaseModel):
+    spot: float
+    rate: float = 0.0
+    q: float = 0.0
+    quotes: list[SurfaceQuote]
+    surface_id: Optional[str] = None  # reuse an ID to replace that surface
+
+class SurfaceQuotesRequest(BaseModel):
+    quotes: list[SurfaceQuote]
+
+class SurfaceVolRequest(BaseModel):
+    strike: Union[float, list[float]]
+    time: Union[float, list[float]]
+
+class PortfolioPositions(BaseModel):
+    id: list[str]
+    underlying: Union[str, list[str]]
+    strike: Union[float, list[float]]
+    time: Union[float, list[float]]      # time to maturity in years
+    option_type: Union[str, list[str]] = 'call'
+    contracts: Union[float, list[float]] = 1.0  # signed: negative for short
+    contract_size: Union[float, list[float]] = 100.0
+
+class MarketQuote(BaseModel):
+    underlying: str
+    spot: Optional[float] = None
+    vol: Optional[float] = None
+    surface_id: Optional[str] = None  # per-position vols from a stored surface
+    rate: Optional[float] = None
+    q: Optional[float] = None
+
+class PortfolioRequest(BaseModel):
+    portfolio_id: Optional[str] = None
+    positions: PortfolioPositions
+    market: list[MarketQuote] = []
+
+class PositionsUpdateRequest(BaseModel):
+    positions: Optional[PortfolioPositions] = None  # added, or replaced by id
+    remove: list[str] = []
+
+class MarketUpdateRequest(BaseModel):
+    market: list[MarketQuote]
+    taylor_tolerance: float = 0.0  # relative spot move rolled forward by delta/gamma
+
+class ScenarioLeg(BaseModel):
+    option_type: str = 'call'         # 'call', 'put' or 'stock'
+    strike: Optional[float] = None    # options only
+    expiry: Optional[float] = None    # options only, years from now
+    quantity: float = 1.0             # signed: negative for short
+    premium: Optional[float] = None   # price paid; defaults to BSM at spot/vol (stock: spot)
+
+class ScenarioRequest(BaseModel):
+    spot: float                       # base spot, used for default premiums
+    vol: Optional[float] = None       # base vol, used for default premiums and as the default vol axis
+    rate: float = 0.0
+    q: float = 0.0
+    legs: list[ScenarioLeg] = []
+    # Or a preset with the /payoff/* fields: "protective_put", "covered_call", "collar"
+    strategy: Optional[str] = None
+    expiry: Optional[float] = None
+    K_put: Optional[float] = None
+    premium_put: Optional[float] = None
+    K_call: Optional[float] = None
+    premium_call: Optional[float] = None
+    spots: list[float]                # grid axes
+    vols: Optional[list[float]] = None
+    times: list[float] = [0.0]        # horizons in years from now
+    chunk_cells: Optional[int] = None  # /scenario/stream: leg x grid cells per chunk (default scenarios.DEFAULT_CHUNK_CELLS)
 
 class HedgeRequest(BaseModel):
     delta: float           # option delta
@@ -53,76 +200,565 @@ class PayoffRequest(BaseModel):
 class JobStatus(BaseModel):
     status: str
     result: Optional[Any] = None
+    metrics: Optional[Any] = None  # phase timings and cost drivers (see job_metrics)
+
+class WaitRequest(BaseModel):
+    job_ids: list[str]
+    timeout: float = 20.0             # seconds, capped at WAIT_MAX_SECONDS
+    wait_for: str = "any"             # "any": return on the first completion; "all": when every job is done
     
-sqs = boto3.client("sqs",region_name=REGION)
-QUEUE_URL    = os.environ["JOB_QUEUE_URL"]
-dynamodb     = boto3.resource("dynamodb")
-results_tab  = dynamodb.Table(os.environ["RESULTS_TABLE"])
+# boto3 clients, built on first use and then kept for the container's lifetime
+_aws = {}
+
+def sqs_client():
+    if "sqs" not in _aws:
+        import boto3
+        _aws["sqs"] = boto3.client("sqs", region_name=REGION)
+    return _aws["sqs"]
+
+def results_table():
+    if "results" not in _aws:
+        import boto3
+        _aws["results"] = boto3.resource("dynamodb").Table(os.environ["RESULTS_TABLE"])
+    return _aws["results"]
+
+# Jobs whose estimated cost (see jobs.estimate_cost) is at or below this run inline
+SYNC_COST_BUDGET = int(os.environ.get("SYNC_COST_BUDGET", "2000000"))
+
+result_cache = ResultCache()
+metrics = MetricsAggregator()
+# Largest cube (legs x grid points) returned by POST /scenario; larger ones
+# go through /scenario/stream instead. Without a blob store for packed
+# results to spill to, the cube has to fit in a DynamoDB item.
+SCENARIO_MAX_CELLS = int(os.environ.get(
+    "SCENARIO_MAX_CELLS", "1000000" if PACKING_ENABLED and BLOB_URL else "20000"))
+
+# Long-poll requests are held at most this long: API Gateway cuts HTTP APIs off at 30 s
+WAIT_MAX_SECONDS = float(os.environ.get("WAIT_MAX_SECONDS", "25"))
+# Server-sent event streams; behind API Gateway + Lambda the response is buffered, so use long-poll there
+EVENTS_MAX_SECONDS = float(os.environ.get("EVENTS_MAX_SECONDS", "600"))
+EVENTS_HEARTBEAT_SECONDS = 15.0
+# Job IDs one wait request or event stream may watch
+MAX_WATCHED_JOBS = int(os.environ.get("MAX_WATCHED_JOBS", "500"))
+watcher = ResultWatcher(results_table)
+
+# Fitted vol surfaces by ID, and the revision each was loaded at; the results
+# table holds the current copy, shared by every container
+surfaces = {}
+surface_revisions = {}
+# Serializes read-modify-write of surfaces and books across threadpool requests
+state_lock = threading.RLock()
+# Option books by ID, and the revision each was loaded at. With a blob store
+# (RESULT_BLOB_URL) each save is written there and every container reads
+# through to it; without one, books live only in the process that created
+# them, which suits a single uvicorn server but not Lambda
+portfolios = {}
+portfolio_revisions = {}
+
+def _from_decimal(obj):
+    # Recursively walk lists/dicts, converting Decimals to floats
+    if isinstance(obj, Decimal):
+        return float(obj)
+    elif isinstance(obj, (int, float)):
+        return obj
+    elif isinstance(obj, list):
+        return [_from_decimal(x) for x in obj]
+    elif isinstance(obj, dict):
+        return {k: _from_decimal(v) for k, v in obj.items()}
+    else:
+        return obj
+
+def lookup_cached(job_id: str):
+    """Check the in-process LRU, then the results table, for a finished job."""
+    result = result_cache.get(job_id)
+    if result is not None:
+        return result
+    item = results_table().get_item(Key={"jobId": job_id}).get("Item")
+    # DynamoDB TTL deletion is lazy, so check expiry ourselves
+    fresh = item and int(item.get("expiresAt", 0)) > time.time()
+    if fresh and item.get("status") == "error":
+        # The worker rejected these inputs; answer like the inline path would
+        raise HTTPException(status_code=400, detail=item["result"].get("error", "Invalid job"))
+    if fresh and item.get("status") == "done":
+        try:
+            result = decode_result(item["result"])
+        except KeyError:
+            # Its spilled arrays are gone from the blob store; recompute
+            result_cache.record_miss()
+            return None
+        result_cache.put(job_id, result, int(item["expiresAt"]))
+        result_cache.record_store_hit()
+        return result
+    result_cache.record_miss()
+    return None
+
+def enqueue(job_type: str, payload: dict, profile: bool = False):
+    """
+    Answer a job from the cache, run it inline if cheap, or send it to SQS.
+
+    profile: run under cProfile (bypassing the cache) and store the report
+        with the result, readable at GET /result/{job_id}/profile
+    """
+    timer = JobTimer()
+    with timer.phase("enqueue"):
+        if CACHE_ENABLED:
+            job_id = canonical_key(job_type, payload)
+            cached = None if profile else lookup_cached(job_id)
+            if cached is not None:
+                if METRICS_ENABLED:
+                    metrics.add(job_type, payload.get("model"), cached=True)
+                    metrics.maybe_flush(results_table())
+                return {"jobId": job_id, "mode": "cache", "status": "done", "result": cached}
+        else:
+            job_id = str(uuid.uuid4())
+        inline = estimate_cost(job_type, payload) <= SYNC_COST_BUDGET
+
+    if inline:
+        return run_inline(job_id, job_type, payload, timer, profile)
 
-def enqueue(job_type: str, payload: dict):
-    job_id = str(uuid.uuid4())
     print(f"Enqueueing job {job_type} with ID {job_id}")
-    message = {"jobId": job_id, "jobType": job_type, **payload}
+    with timer.phase("enqueue"):
+        # Timing and profiling flags travel outside the payload so the worker's cache key ignores them
+        meta = {"enqueuedAt": time.time(), "profile": profile}
+        message = {"jobId": job_id, "jobType": job_type, **payload}
+    message["meta"] = {**meta, "enqueueMs": timer.ms["enqueue"]}
     try:
-        sqs.send_message(QueueUrl=QUEUE_URL, MessageBody=json.dumps(message))
+        sqs_client().send_message(QueueUrl=os.environ["JOB_QUEUE_URL"], MessageBody=json.dumps(message))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to enqueue {job_type} job: {e}")
-    return {"jobId": job_id}
+    return {"jobId": job_id, "mode": "async", "status": "pending"}
+
+def run_inline(job_id: str, job_type: str, payload: dict, timer: Optional[JobTimer] = None, profile: bool = False):
+    """Compute a cheap job in the API process and store it like the worker would."""
+    timer = timer or JobTimer()
+    report = None
+    with timer.phase("compute"):
+        if profile:
+            raw, report = run_profiled(run_job, job_type, payload)
+        else:
+            try:
+                raw = run_job(job_type, payload)
+            except INPUT_ERRORS as e:
+                raw = e
+    if isinstance(raw, INPUT_ERRORS):
+        if METRICS_ENABLED:
+            metrics.add(job_type, payload.get("model"), timer, error=True)
+            metrics.maybe_flush(results_table())
+        raise HTTPException(status_code=400, detail=str(raw))
+    if isinstance(raw, Exception):
+        raise raw
+
+    # Persist so GET /result/{job_id} behaves the same for both paths
+    expiry = expires_at()
+    record = timer.record(job_type, payload)
+    item = {
+        "jobId":    job_id,
+        "status":   "done",
+        "result":   encode_result(raw, job_id),
+        "metrics":  to_decimal(record),
+        "expiresAt": expiry
+    }
+    if report is not None:
+        item["profile"] = report
+    with timer.phase("persist"):
+        results_table().put_item(Item=item)
+    watcher.notify(job_id)
+    if CACHE_ENABLED:
+        result_cache.put(job_id, raw, expiry)
+    if METRICS_ENABLED:
+        metrics.add(job_type, payload.get("model"), timer)
+        metrics.maybe_flush(results_table())
+    return {"jobId": job_id, "mode": "sync", "status": "done", "result": raw, "metrics": record}
+
+def check_array_lengths(req: BaseModel, fields: tuple):
+    """Reject requests whose list-valued fields can't broadcast together."""
+    lengths = {len(v) for v in (getattr(req, f) for f in fields) if isinstance(v, list)}
+    lengths.discard(1)
+    if len(lengths) > 1:
+        raise HTTPException(status_code=400, detail="Array fields must share one length (or be scalars)")
+
+def surface_key(surface_id: str) -> str:
+    return f"surface-{surface_id}"
+
+def get_surface(surface_id: str) -> "VolSurface":
+    """
+    Fetch a surface, reading through to the results table: another container
+    may have refitted it. Only its revision is read unless that changed.
+    """
+    key = {"jobId": surface_key(surface_id)}
+    surface = surfaces.get(surface_id)
+    if surface is not None:
+        stamp = results_table().get_item(Key=key, ProjectionExpression="revision, expiresAt").get("Item")
+        if stamp and stamp.get("revision") == surface_revisions.get(surface_id) \
+                and int(stamp.get("expiresAt", 0)) > time.time():
+            return surface
+    item = results_table().get_item(Key=key).get("Item")
+    if not item or int(item.get("expiresAt", 0)) <= time.time():
+        surfaces.pop(surface_id, None)
+        raise HTTPException(status_code=404, detail=f"Unknown surface: {surface_id}")
+    from vol_surface import VolSurface
+    surface = surfaces[surface_id] = VolSurface.from_dict(_from_decimal(item["result"]))
+    surface_revisions[surface_id] = item.get("revision")
+    return surface
+
+def save_surface(surface: "VolSurface"):
+    revision = uuid.uuid4().hex
+    results_table().put_item(
+        Item={
+            "jobId":    surface_key(surface.surface_id),
+            "status":   "surface",
+            "result":   to_decimal(surface.to_dict()),
+            # Changes on every save, so other containers know to reload
+            "revision": revision,
+            "expiresAt": expires_at()
+        }
+    )
+    surfaces[surface.surface_id] = surface
+    surface_revisions[surface.surface_id] = revision
+
+def apply_quotes(surface: "VolSurface", quotes: list):
+    """Update a surface with vol and price quotes; returns the refitted expiries."""
+    priced = [q for q in quotes if q.vol is None and q.price is not None]
+    vols = {}
+    try:
+        if priced:
+            solved = surface.implied_vols(
+                [q.expiry for q in priced], [q.strike for q in priced],
+                [q.price for q in priced], [q.option_type for q in priced],
+            )
+            vols = {id(q): float(v) for q, v in zip(priced, solved)}
+        return surface.update(
+            [q.expiry for q in quotes], [q.strike for q in quotes],
+            [vols.get(id(q), q.vol) for q in quotes],
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def resolve_vol(payload: dict) -> dict:
+    """Replace `surface_id` in a pricing payload with vols looked up at its strikes and times."""
+    surface_id = payload.pop("surface_id", None)
+    if surface_id is not None:
+        try:
+            with state_lock:
+                vols = get_surface(surface_id).vol(payload["strike"], payload["time"])
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        payload["vol"] = vols.tolist()
+    elif payload.get("vol") is None:
+        raise HTTPException(status_code=400, detail="Either vol or surface_id is required")
+    return payload
 
 @app.post("/price")
-async def submit_price(req: PriceRequest):
-    return enqueue("price", req.dict())
+def submit_price(req: PriceRequest, profile: bool = False):
+    if req.variance_reduction:
+        from monte_carlo import check_variance_reduction
+        try:
+            check_variance_reduction(req.variance_reduction)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return enqueue("price", resolve_vol(req.dict()), profile)
+
+@app.post("/price/batch")
+def submit_price_batch(req: BatchPriceRequest, profile: bool = False):
+    check_array_lengths(req, ("spot", "strike", "rate", "vol", "time", "q", "option_type"))
+    if req.model == "cve_amer_call":
+        raise HTTPException(status_code=400, detail="cve_amer_call is not supported for batch pricing")
+    return enqueue("price_batch", resolve_vol(req.dict()), profile)
 
 @app.post("/greeks")
-async def submit_greeks(req: GreeksRequest):
-    return enqueue("greeks", req.dict())
+def submit_greeks(req: GreeksRequest, profile: bool = False):
+    return enqueue("greeks", resolve_vol(req.dict()), profile)
+
+def portfolio_key(portfolio_id: str) -> str:
+    return f"portfolio-{portfolio_id}"
+
+def get_portfolio(portfolio_id: str) -> "Portfolio":
+    """This process's copy of a book, reloaded from the blob store if another container saved a newer one."""
+    portfolio = portfolios.get(portfolio_id)
+    store = blob_store()
+    if store is None:
+        if portfolio is None:
+            raise HTTPException(status_code=404, detail=f"Unknown portfolio: {portfolio_id}")
+        return portfolio
+    stamp = results_table().get_item(Key={"jobId": portfolio_key(portfolio_id)}).get("Item")
+    if not stamp or int(stamp.get("expiresAt", 0)) <= time.time():
+        portfolios.pop(portfolio_id, None)
+        raise HTTPException(status_code=404, detail=f"Unknown portfolio: {portfolio_id}")
+    if portfolio is not None and stamp["revision"] == portfolio_revisions.get(portfolio_id):
+        return portfolio
+    from portfolio import Portfolio
+    try:
+        portfolio = Portfolio.from_bytes(store.get(stamp["blob"]))
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown portfolio: {portfolio_id}")
+    # Vol lookups can't be stored; rebind them to the surfaces they came from
+    for quote in portfolio.quotes.values():
+        if "surface_id" in quote:
+            try:
+                quote["vol_lookup"] = get_surface(quote["surface_id"]).vol
+            except HTTPException:
+                # Surface expired: positions keep their vols, new ones use the quote's vol
+                quote.pop("surface_id")
+    portfolios[portfolio_id] = portfolio
+    portfolio_revisions[portfolio_id] = stamp["revision"]
+    return portfolio
+
+def save_portfolio(portfolio: "Portfolio", replace: bool = False):
+    """
+    Keep a book in this process and, with a blob store, publish it for the
+    others. Each save is a new blob, and the table item points at the
+    current one; an update based on a stale revision is refused with 409.
+    """
+    portfolio_id = portfolio.portfolio_id
+    portfolios[portfolio_id] = portfolio
+    store = blob_store()
+    if store is None:
+        return
+    revision = uuid.uuid4().hex
+    blob = f"portfolios/{portfolio_id}/{revision}"
+    store.put(blob, portfolio.to_bytes())
+    item = {"jobId": portfolio_key(portfolio_id), "status": "portfolio", "revision": revision,
+            "blob": blob, "expiresAt": expires_at()}
+    if replace:
+        condition = {}
+    else:
+        condition = {"ConditionExpression": "revision = :prev",
+                     "ExpressionAttributeValues": {":prev": portfolio_revisions.get(portfolio_id)}}
+    try:
+        results_table().put_item(Item=item, **condition)
+    except Exception as e:
+        portfolios.pop(portfolio_id, None)
+        if getattr(e, "response", {}).get("Error", {}).get("Code") == "ConditionalCheckFailedException":
+            raise HTTPException(status_code=409, detail=f"Portfolio {portfolio_id} was updated concurrently; retry")
+        raise
+    portfolio_revisions[portfolio_id] = revision
+
+def revalue_portfolio(portfolio: "Portfolio", market=(), positions=None, remove=(), taylor_tolerance=0.0):
+    """Apply position and market changes, revalue what changed and return book risk."""
+    start = time.perf_counter()
+    try:
+        if remove:
+            portfolio.remove_positions(remove)
+        if positions is not None:
+            check_array_lengths(positions, ("id", "underlying", "strike", "time", "option_type",
+                                            "contracts", "contract_size"))
+            portfolio.add_positions(
+                positions.id, positions.underlying, positions.strike, positions.time,
+                positions.option_type, positions.contracts, positions.contract_size,
+            )
+        for quote in market:
+            lookup = get_surface(quote.surface_id).vol if quote.surface_id else None
+            portfolio.update_market(quote.underlying, quote.spot, quote.vol, quote.rate, quote.q, lookup)
+            # Remembered so a copy loaded in another container can rebind the lookup
+            if quote.surface_id:
+                portfolio.quotes[quote.underlying]["surface_id"] = quote.surface_id
+            elif quote.vol is not None:
+                portfolio.quotes[quote.underlying].pop("surface_id", None)
+        counts = portfolio.revalue(taylor_tolerance)
+    except (ValueError, HTTPException) as e:
+        # Don't keep a half-updated copy; the next read reloads the saved one
+        portfolios.pop(portfolio.portfolio_id, None)
+        if isinstance(e, HTTPException):
+            raise
+        raise HTTPException(status_code=400, detail=str(e))
+    return {**portfolio.risk(), **counts, "elapsed_ms": 1000 * (time.perf_counter() - start)}
+
+@app.post("/portfolio")
+def create_portfolio(req: PortfolioRequest):
+    from portfolio import Portfolio
+    with state_lock:
+        portfolio = Portfolio(req.portfolio_id)
+        result = revalue_portfolio(portfolio, req.market, req.positions)
+        save_portfolio(portfolio, replace=True)
+        return result
+
+@app.post("/portfolio/{portfolio_id}/positions")
+def update_positions(portfolio_id: str, req: PositionsUpdateRequest):
+    with state_lock:
+        portfolio = get_portfolio(portfolio_id)
+        result = revalue_portfolio(portfolio, positions=req.positions, remove=req.remove)
+        save_portfolio(portfolio)
+        return result
+
+@app.post("/portfolio/{portfolio_id}/market")
+def update_portfolio_market(portfolio_id: str, req: MarketUpdateRequest):
+    with state_lock:
+        portfolio = get_portfolio(portfolio_id)
+        result = revalue_portfolio(portfolio, req.market, taylor_tolerance=req.taylor_tolerance)
+        save_portfolio(portfolio)
+        return result
+
+@app.get("/portfolio/{portfolio_id}")
+def portfolio_risk(portfolio_id: str):
+    with state_lock:
+        return get_portfolio(portfolio_id).risk()
+
+@app.post("/surface")
+def create_surface(req: SurfaceRequest):
+    from vol_surface import VolSurface
+    with state_lock:
+        surface = VolSurface(req.spot, req.rate, req.q, req.surface_id)
+        apply_quotes(surface, req.quotes)
+        save_surface(surface)
+        return surface.summary()
+
+@app.post("/surface/{surface_id}/quotes")
+def update_surface(surface_id: str, req: SurfaceQuotesRequest):
+    with state_lock:
+        surface = get_surface(surface_id)
+        try:
+            refit = apply_quotes(surface, req.quotes)
+            save_surface(surface)
+        except Exception:
+            # Don't keep a half-updated copy; the next read reloads the stored one
+            surfaces.pop(surface_id, None)
+            raise
+        return {"refit_expiries": refit, **surface.summary()}
+
+@app.get("/surface/{surface_id}")
+def describe_surface(surface_id: str):
+    with state_lock:
+        return get_surface(surface_id).summary()
+
+@app.post("/surface/{surface_id}/vol")
+def surface_vol(surface_id: str, req: SurfaceVolRequest):
+    check_array_lengths(req, ("strike", "time"))
+    try:
+        with state_lock:
+            vols = get_surface(surface_id).vol(req.strike, req.time)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"vol": vols.tolist()}
+
+def scenario_payload(req: ScenarioRequest) -> dict:
+    """Expand a preset strategy into legs and check the grid; returns the job payload."""
+    from scenarios import strategy_legs, prepare_legs
+    try:
+        if req.strategy is not None:
+            if req.legs:
+                raise ValueError("Give either legs or strategy, not both")
+            if req.expiry is None:
+                raise ValueError("expiry is required with strategy")
+            legs = strategy_legs(req.strategy, req.expiry, req.K_put, req.premium_put,
+                                 req.K_call, req.premium_call)
+        else:
+            legs = [leg.dict() for leg in req.legs]
+        vols = req.vols if req.vols is not None else [req.vol]
+        if None in vols:
+            raise ValueError("Either vols or vol is required")
+        columns = prepare_legs(legs, req.spot, req.vol, req.rate, req.q)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Premiums are resolved here so every chunk and the cached job use the same ones
+    for leg, premium in zip(legs, columns["premium"].tolist()):
+        leg["premium"] = premium
+    return {"legs": legs, "spots": req.spots, "vols": vols, "times": req.times,
+            "spot": req.spot, "vol": req.vol, "rate": req.rate, "q": req.q}
+
+@app.post("/scenario")
+def submit_scenario(req: ScenarioRequest, profile: bool = False):
+    payload = scenario_payload(req)
+    cells = estimate_cost("scenario", payload)
+    if cells > SCENARIO_MAX_CELLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Scenario has {cells} leg x grid cells (limit {SCENARIO_MAX_CELLS}); use /scenario/stream",
+        )
+    return enqueue("scenario", payload, profile)
+
+@app.post("/scenario/stream")
+def stream_scenario(req: ScenarioRequest):
+    """
+    Compute the P&L cube in blocks of spots and stream it as NDJSON: a header
+    line with the axes and premiums, then one line per block with the index
+    of its first spot and pnl[spot][vol][time] for its spots.
+    """
+    from scenarios import prepare_legs, scenario_chunks, DEFAULT_CHUNK_CELLS
+    payload = scenario_payload(req)
+    columns = prepare_legs(payload["legs"], req.spot, req.vol, req.rate, req.q)
+    try:
+        chunks = scenario_chunks(columns, payload["spots"], payload["vols"], payload["times"],
+                                 req.rate, req.q, req.chunk_cells or DEFAULT_CHUNK_CELLS)
+        first = next(chunks)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def lines():
+        header = {k: payload[k] for k in ("spots", "vols", "times")}
+        yield json.dumps({**header, "premiums": columns["premium"].tolist()}) + "\n"
+        for start, block in itertools.chain([first], chunks):
+            yield json.dumps({"start": start, "pnl": block.tolist()}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.post("/implied_vol")
+def submit_implied_vol(req: ImpliedVolRequest, profile: bool = False):
+    check_array_lengths(req, ("price", "spot", "strike", "rate", "time", "q", "option_type"))
+    return enqueue("implied_vol", req.dict(), profile)
 
 @app.post("/hedge")
-async def submit_hedge(req: HedgeRequest):
+def submit_hedge(req: HedgeRequest):
     return enqueue("hedge", req.dict())
 
 @app.post("/payoff/protective_put")
-async def submit_protective(req: PayoffRequest):
+def submit_protective(req: PayoffRequest):
     if req.K_put is None:
         raise HTTPException(status_code=400, detail="K_put is required")
     return enqueue("protective_put", req.dict())
 
 @app.post("/payoff/covered_call")
-async def submit_covered(req: PayoffRequest):
+def submit_covered(req: PayoffRequest):
     if req.K_call is None:
         raise HTTPException(status_code=400, detail="K_call is required")
     return enqueue("covered_call", req.dict())
 
 @app.post("/payoff/collar")
-async def submit_collar(req: PayoffRequest):
+def submit_collar(req: PayoffRequest):
     if req.K_put is None or req.K_call is None:
         raise HTTPException(status_code=400, detail="K_put and K_call are required")
     return enqueue("collar", req.dict())
 
-@app.get("/result/{job_id}", response_model=JobStatus)
-async def get_result(job_id: str):
-    resp = results_tab.get_item(Key={"jobId": job_id})
+def check_job_id(job_id: str):
+    # Metrics counters live in the results table but aren't jobs
+    if job_id.startswith(METRICS_PREFIX):
+        raise HTTPException(status_code=404, detail=f"No job {job_id}")
+
+def read_status(job_id: str) -> JobStatus:
+    """Status of a job: pending, done, or error (with result {"error": message})."""
+    check_job_id(job_id)
+    resp = results_table().get_item(Key={"jobId": job_id})
     if "Item" not in resp:
         return JobStatus(status="pending")
 
     item   = resp["Item"]
-    status = item["status"]
-    raw = item["result"]
-    
-    def convert(obj):
-        # Recursively walk lists/dicts, converting Decimals to floats
-        if isinstance(obj, Decimal):
-            return float(obj)
-        elif isinstance(obj, (int, float)):
-            return obj
-        elif isinstance(obj, list):
-            return [convert(x) for x in obj]
-        elif isinstance(obj, dict):
-            return {k: convert(v) for k, v in obj.items()}
-        else:
-            return obj
-    converted = convert(raw)
-    return JobStatus(status=status, result=converted)
+    status = item.get("status")
+    if status not in ("done", "error"):
+        # Surfaces, books and metrics share the table but aren't jobs
+        raise HTTPException(status_code=404, detail=f"No job {job_id}")
+    try:
+        result = decode_result(item["result"])
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Result of job {job_id} has expired")
+    return JobStatus(status=status, result=result, metrics=_from_decimal(item.get("metrics")))
+
+def check_watch(job_ids: list, wait_for: str = "all"):
+    if not job_ids:
+        raise HTTPException(status_code=400, detail="At least one job ID is required")
+    if len(job_ids) > MAX_WATCHED_JOBS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_WATCHED_JOBS} job IDs per request")
+    for job_id in job_ids:
+        check_job_id(job_id)
+    if wait_for not in ("any", "all"):
+        raise HTTPException(status_code=400, detail="wait_for must be 'any' or 'all'")
+
+def raise_for_error(status: JobStatus) -> JobStatus:
+    if status.status == "error":
+        raise HTTPException(status_code=400, detail=status.result.get("error"))
+    return status
+
+@app.get("/result/{job_id}", response_model=JobStatus)
+def get_result(job_id: str):
+    return raise_for_error(read_status(job_id))
     # # Dynamo returns Decimal for numbers — convert them:
     # if isinstance(result, dict):
     #     result = {k: float(v) for k, v in result.items()}
@@ -131,6 +767,95 @@ async def get_result(job_id: str):
 
     # return JobStatus(status=status, result=result)
 
+@app.get("/result/{job_id}/wait", response_model=JobStatus)
+async def wait_result(job_id: str, timeout: float = WAIT_MAX_SECONDS):
+    """Like GET /result/{job_id}, but held open until the job is done or timeout seconds pass."""
+    check_job_id(job_id)
+    async for _ in watcher.watch([job_id], min(timeout, WAIT_MAX_SECONDS)):
+        pass
+    return raise_for_error(await run_in_threadpool(read_status, job_id))
+
+@app.post("/results/wait")
+async def wait_results(req: WaitRequest):
+    """
+    Long-poll on many jobs: returns once any (or all) of them are done, or
+    at the timeout, with the finished ones under `results` and the rest
+    under `pending`. Clients call again with what is still pending.
+    """
+    job_ids = list(dict.fromkeys(req.job_ids))
+    check_watch(job_ids, req.wait_for)
+    done = [j async for j in watcher.watch(job_ids, min(req.timeout, WAIT_MAX_SECONDS), req.wait_for)]
+    return {"results": {j: await run_in_threadpool(read_status, j) for j in done},
+            "pending": [j for j in job_ids if j not in done]}
+
+@app.get("/results/events")
+async def result_events(ids: str, timeout: float = EVENTS_MAX_SECONDS):
+    """
+    Server-sent events for comma-separated job IDs: a `result` event (the
+    GET /result body plus jobId) as each job finishes, comment heartbeats
+    while idle, then an `end` event listing any still pending at the timeout.
+    """
+    job_ids = list(dict.fromkeys(filter(None, ids.split(","))))
+    check_watch(job_ids)
+
+    async def events():
+        pending = set(job_ids)
+        async for job_id in watcher.watch(job_ids, min(timeout, EVENTS_MAX_SECONDS), heartbeat=EVENTS_HEARTBEAT_SECONDS):
+            if job_id is None:
+                yield ": keep-alive\n\n"
+                continue
+            pending.discard(job_id)
+            try:
+                body = {"jobId": job_id, **(await run_in_threadpool(read_status, job_id)).dict()}
+            except HTTPException as e:
+                body = {"jobId": job_id, "status": "expired", "detail": e.detail}
+            yield f"event: result\nid: {job_id}\ndata: {json.dumps(body)}\n\n"
+        yield f"event: end\ndata: {json.dumps({'pending': [j for j in job_ids if j in pending]})}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/result/{job_id}/array")
+def get_result_array(job_id: str, path: str):
+    """
+    One array of a result as raw little-endian bytes, streamed without
+    decoding: path is its dotted location in the result ('pnl', 'prices').
+    The X-Array-Dtype and X-Array-Shape headers describe the layout, e.g.
+    numpy.frombuffer(body, dtype).reshape(shape).
+    """
+    check_job_id(job_id)
+    item = results_table().get_item(Key={"jobId": job_id}).get("Item")
+    packed = find_packed(item.get("result"), path) if item else None
+    if packed is None:
+        raise HTTPException(status_code=404, detail=f"No packed array at '{path}' in job {job_id}")
+    chunks = iter_bytes(packed)
+    try:
+        first = next(chunks)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Result of job {job_id} has expired")
+    headers = {"X-Array-Dtype": packed["dtype"], "X-Array-Shape": ",".join(str(int(n)) for n in packed["shape"])}
+    return StreamingResponse(itertools.chain([first], chunks), media_type="application/octet-stream", headers=headers)
+
+@app.get("/result/{job_id}/profile")
+def get_profile(job_id: str):
+    """cProfile report of a job submitted with ?profile=true."""
+    check_job_id(job_id)
+    item = results_table().get_item(Key={"jobId": job_id}).get("Item")
+    if not item or "profile" not in item:
+        raise HTTPException(status_code=404, detail=f"No profile for job {job_id}")
+    return {"jobId": job_id, "profile": item["profile"]}
+
+@app.get("/metrics")
+def get_metrics():
+    """Per job type and model: counts, mean phase times and latency histograms."""
+    # Include this process's counters that haven't been flushed yet
+    metrics.flush(results_table())
+    return {"jobs": read_metrics(results_table()), "cache": result_cache.stats()}
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return result_cache.stats()
+
 @app.get("/health")
 async def health():
     return {"status": "ok"}
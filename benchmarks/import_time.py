@@ -0,0 +1,98 @@
+"""
+Import-time report for the API and worker entry modules.
+
+Imports the module in a fresh interpreter under `python -X importtime`, then
+prints the total, the slowest packages by self time summed over their
+submodules, and the slowest individual imports by cumulative time. Wall time
+of a bare `import` is also measured, against an empty interpreter start.
+
+The API is expected to import no NumPy, SciPy, pandas or boto3 at load;
+the exit status is 1 if any of the --forbid modules show up, or if the
+cumulative import time exceeds --budget-ms.
+
+    python benchmarks/import_time.py --module app
+    python benchmarks/import_time.py --module worker --forbid
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+# Placeholders for the settings the modules read at import
+ENV = {"JOB_QUEUE_URL": "https://sqs.invalid/queue", "RESULTS_TABLE": "results", "AWS_DEFAULT_REGION": "us-east-1"}
+HEAVY = ("numpy", "scipy", "pandas", "boto3", "botocore")
+
+
+def importtime(module):
+    """Parse `-X importtime` output into (module, self us, cumulative us, nesting depth) rows."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env={**os.environ, **ENV}, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        # One space after the bar, then two per nesting level
+        rows.append((name.strip(), int(own), int(cumulative), (len(name) - len(name.lstrip()) - 1) // 2))
+    return rows
+
+
+def wall_ms(code, repeats):
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT, env={**os.environ, **ENV}, check=True)
+        samples.append(1000 * (time.perf_counter() - start))
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--forbid", nargs="*", default=list(HEAVY),
+                        help="top-level packages that must not be imported (none with a bare --forbid)")
+    parser.add_argument("--budget-ms", type=float, help="fail above this cumulative import time")
+    args = parser.parse_args()
+
+    rows = importtime(args.module)
+    total_ms = next(c for name, _, c, depth in rows if name == args.module and depth == 0) / 1000
+
+    by_package = defaultdict(int)
+    for name, own, _, _ in rows:
+        by_package[name.split(".")[0]] += own
+
+    base = wall_ms("pass", args.repeats)
+    wall = wall_ms(f"import {args.module}", args.repeats)
+    print(f"import {args.module}: {total_ms:.1f} ms cumulative (-X importtime), "
+          f"{wall - base:.1f} ms wall over an empty interpreter ({len(rows)} modules)")
+
+    print(f"\n{'package':<28} {'self ms':>9}")
+    for package, own in sorted(by_package.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"{package:<28} {own / 1000:>9.1f}")
+
+    print(f"\n{'import':<48} {'cumulative ms':>14}")
+    for name, _, cumulative, depth in sorted(rows, key=lambda r: -r[2])[:args.top]:
+        print(f"{'  ' * depth + name:<48} {cumulative / 1000:>14.1f}")
+
+    failures = []
+    loaded = sorted(p for p in args.forbid if p in by_package)
+    if loaded:
+        failures.append(f"imports {', '.join(loaded)} at load")
+    if args.budget_ms is not None and total_ms > args.budget_ms:
+        failures.append(f"{total_ms:.1f} ms exceeds the {args.budget_ms:.1f} ms budget")
+    for failure in failures:
+        print(f"FAIL {args.module}: {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
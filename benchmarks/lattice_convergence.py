@@ -0,0 +1,70 @@
+"""
+Convergence of the American binomial lattice with and without acceleration.
+
+For a grid of moneyness and maturity, each acceleration mode is run at a
+range of step counts. The table shows the absolute price error against a
+high-resolution BBSR reference, and the CPU time per price. A summary
+compares each mode at 200 steps with the plain 5,000-step tree.
+
+    python benchmarks/lattice_convergence.py --steps 50 100 200 400 5000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from lattice import binomial_lattice
+
+MODES = (None, "bbs", "richardson", "bbsr")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--steps", type=int, nargs="+", default=[50, 100, 200, 400, 1000, 5000])
+    parser.add_argument("--reference-steps", type=int, default=20_000)
+    parser.add_argument("--option-type", default="put", choices=("call", "put"))
+    parser.add_argument("--q", type=float, default=0.0)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    K, r, sigma = 100.0, 0.05, 0.2
+    spots = (80.0, 100.0, 120.0)
+    maturities = (0.25, 1.0, 3.0)
+
+    errors = {}
+    times = {}
+    print(f"American {args.option_type}, K={K} r={r} sigma={sigma} q={args.q}; "
+          f"abs error vs BBSR at {args.reference_steps} steps")
+    print(f"{'S':>6} {'T':>5} {'mode':>10} " + " ".join(f"{n:>10}" for n in args.steps))
+    for S in spots:
+        for T in maturities:
+            ref = binomial_lattice(S, K, T, r, sigma, args.reference_steps, args.option_type,
+                                   american=True, q=args.q, acceleration="bbsr")
+            for mode in MODES:
+                row = []
+                for n in args.steps:
+                    best = float("inf")
+                    for _ in range(args.repeats):
+                        start = time.process_time()
+                        price = binomial_lattice(S, K, T, r, sigma, n, args.option_type,
+                                                 american=True, q=args.q, acceleration=mode)
+                        best = min(best, time.process_time() - start)
+                    err = abs(price - ref)
+                    errors.setdefault((mode, n), []).append(err)
+                    times.setdefault((mode, n), []).append(best)
+                    row.append(err)
+                print(f"{S:>6.0f} {T:>5.2f} {mode or 'crr':>10} " + " ".join(f"{e:>10.2e}" for e in row))
+
+    print()
+    print(f"{'mode':>10} {'steps':>6} {'max error':>10} {'mean error':>10} {'mean cpu s':>10}")
+    for mode in MODES:
+        for n in args.steps:
+            errs, cpu = errors[(mode, n)], times[(mode, n)]
+            print(f"{mode or 'crr':>10} {n:>6} {max(errs):>10.2e} {sum(errs) / len(errs):>10.2e} "
+                  f"{sum(cpu) / len(cpu):>10.5f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Scaling curve for the multi-process Monte Carlo engine.
+
+Prices the same seeded contract with 1..N worker processes, reports wall
+time, speedup and parallel efficiency, and checks that every run produced
+bit-identical results.
+
+    python benchmarks/parallel_mc.py --sims 20000000 --max-workers 8
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from monte_carlo import monte_carlo_engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sims", type=int, default=20_000_000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=12345)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    contract = dict(S0=100.0, sigma=0.2, r=0.03, q=0.01, T=1.0, K=105.0, option_type="call")
+
+    print(f"{'workers':>7} {'seconds':>9} {'speedup':>8} {'efficiency':>10}  price")
+    baseline = reference = None
+    for workers in range(1, args.max_workers + 1):
+        # Warm up each pool size once so process start-up isn't timed
+        monte_carlo_engine(**contract, simulations=1_000_000, seed=args.seed, workers=workers)
+        best = float("inf")
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            result = monte_carlo_engine(**contract, simulations=args.sims, seed=args.seed, workers=workers)
+            best = min(best, time.perf_counter() - start)
+
+        if baseline is None:
+            baseline, reference = best, result
+        if result != reference:
+            raise SystemExit(f"result with {workers} workers differs: {result} != {reference}")
+        speedup = baseline / best
+        print(f"{workers:>7} {best:>9.3f} {speedup:>8.2f} {speedup / workers:>10.1%}  {result.price:.10f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Full-book revaluation time for the columnar portfolio.
+
+Builds a random book, prices it once, then times a spot move on one
+underlying revalued exactly and with the delta/gamma Taylor shortcut, and
+reports the worst per-contract price error of the shortcut.
+
+    python benchmarks/portfolio_revalue.py --positions 50000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bsm import bsm_price
+from portfolio import Portfolio
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--positions", type=int, default=50_000)
+    parser.add_argument("--underlyings", type=int, default=20)
+    parser.add_argument("--move", type=float, default=0.005, help="relative spot move")
+    parser.add_argument("--seed", type=int, default=12345)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    n = args.positions
+    names = [f"U{i}" for i in range(args.underlyings)]
+    book = Portfolio("bench")
+    _, build = timed(
+        book.add_positions,
+        [f"p{i}" for i in range(n)], rng.choice(names, n), rng.uniform(70, 130, n),
+        rng.uniform(0.05, 2.0, n), rng.choice(["call", "put"], n), rng.integers(-50, 51, n), 100,
+    )
+    for name in names:
+        book.update_market(name, spot=100.0, vol=rng.uniform(0.15, 0.4), rate=0.03)
+    _, first = timed(book.revalue)
+    _, risk = timed(book.risk)
+
+    moved = names[0]
+    mask = book.code == book.underlyings.index(moved)
+    spot = 100.0 * (1 + args.move)
+
+    book.update_market(moved, spot=spot)
+    counts, taylor = timed(book.revalue, taylor_tolerance=2 * args.move)
+    exact_prices = bsm_price(spot, book.strike[mask], book.market["rate"][mask], book.market["vol"][mask],
+                             book.time[mask], book.is_call[mask])
+    worst = float(np.abs(book.price[mask] - exact_prices).max())
+
+    book.update_market(moved, spot=100.0)
+    book.revalue()
+    book.update_market(moved, spot=spot)
+    _, exact = timed(book.revalue)
+
+    print(f"{n} positions on {args.underlyings} underlyings")
+    print(f"build {build * 1e3:8.2f} ms | first full pricing {first * 1e3:8.2f} ms | risk aggregation {risk * 1e3:8.2f} ms")
+    print(f"{args.move:.2%} move on {moved} ({int(mask.sum())} positions): exact {exact * 1e3:.2f} ms, "
+          f"taylor {taylor * 1e3:.2f} ms ({counts['approximated']} approximated), "
+          f"worst taylor error {worst:.2e} per contract")
+
+
+if __name__ == "__main__":
+    main()
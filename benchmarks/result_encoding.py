@@ -0,0 +1,78 @@
+"""
+Encode/decode time and stored size of array results, packed vs Decimal.
+
+Builds a scenario-sized P&L cube as the nested float lists jobs return,
+then times the old per-element Decimal walk against `result_codec`'s packed
+form (raw and zlib), both ways. Stored size counts 8 bytes per packed float
+against the length of each Decimal's digits, roughly what DynamoDB bills.
+
+    python benchmarks/result_encoding.py --shape 101 20 10
+"""
+import argparse
+import os
+import sys
+import time
+from decimal import Decimal
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import result_codec
+from jobs import to_decimal
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def from_decimal(obj):
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, list):
+        return [from_decimal(v) for v in obj]
+    if isinstance(obj, dict):
+        return {k: from_decimal(v) for k, v in obj.items()}
+    return obj
+
+
+def decimal_bytes(obj):
+    if isinstance(obj, Decimal):
+        return len(str(obj))
+    if isinstance(obj, list):
+        return sum(decimal_bytes(v) for v in obj)
+    return sum(decimal_bytes(v) for v in obj.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--shape", type=int, nargs="+", default=[101, 20, 10])
+    parser.add_argument("--seed", type=int, default=12345)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    raw = {"pnl": rng.normal(0.0, 10.0, args.shape).tolist()}
+    cells = int(np.prod(args.shape))
+    # Keep everything inline: this measures encoding, not the blob store
+    result_codec.INLINE_BYTES = float("inf")
+
+    stored, encode_s = timed(to_decimal, raw)
+    decoded, decode_s = timed(from_decimal, stored)
+    assert decoded == raw
+    print(f"{cells} floats, shape {tuple(args.shape)}")
+    print(f"{'format':<10} {'encode ms':>10} {'decode ms':>10} {'stored KB':>10}")
+    print(f"{'decimal':<10} {1000 * encode_s:>10.2f} {1000 * decode_s:>10.2f} {decimal_bytes(stored) / 1024:>10.1f}")
+
+    for codec in ("none", "zlib"):
+        result_codec.COMPRESSION = codec
+        stored, encode_s = timed(result_codec.encode_result, raw, "bench")
+        decoded, decode_s = timed(result_codec.decode_result, stored)
+        assert decoded == raw
+        size = len(stored["pnl"][result_codec.PACKED]["data"])
+        print(f"{'packed/' + codec:<10} {1000 * encode_s:>10.2f} {1000 * decode_s:>10.2f} {size / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
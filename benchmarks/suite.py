@@ -0,0 +1,322 @@
+"""
+Benchmark suite for every pricing model, with throughput regression gates.
+
+Each case runs one engine through `jobs.run_job` (or a `models` function
+directly) at a production-sized setting and records:
+
+- median wall time over --repeats runs, after one warm-up
+- throughput in the case's natural unit (paths, tree steps, contracts or
+  grid points per second)
+- peak traced memory of one extra run, via tracemalloc (NumPy reports its
+  buffers there)
+- absolute error against a reference price, where one exists
+
+Results are compared with benchmarks/baseline.json. The exit status is 1
+when a case's throughput drops more than --threshold below its baseline, or
+when its error exceeds the case tolerance. Baselines are machine-specific:
+refresh them with --update-baseline on the machine that runs the gate.
+
+Speed on a shared or virtual machine can differ by up to 2x between
+processes running the same code, and stays put for a process's lifetime,
+so repeats within one process cannot average it out. Each baselined case is
+therefore the median of --baseline-runs measurements, all but the first in
+a fresh process, and a case that misses the threshold is re-measured in a
+fresh process before it fails.
+
+    python benchmarks/suite.py                    # run and compare
+    python benchmarks/suite.py --filter bin_amer  # only matching cases
+    python benchmarks/suite.py --quick            # smallest size per engine
+    python benchmarks/suite.py --update-baseline  # record new baseline
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bsm import bsm_price
+from jobs import run_job
+from lattice import binomial_lattice
+from models import delta, gamma, vega, hedge_ratio, protective_put_pl, covered_call_pl, collar_pl
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# Reference contract: r > 0 and q = 0 so the American put carries an
+# early-exercise premium and the American call equals the European one
+CONTRACT = dict(spot=100.0, strike=105.0, rate=0.05, vol=0.2, time=1.0, q=0.0)
+# Shortest timed interval per repeat
+MIN_TIMED_SECONDS = 0.2
+
+
+class Case:
+    """
+    One benchmark: `run` is called with no arguments and returns the job
+    result; `units` is the work it does, counted in `unit`.
+
+    reference: exact or high-accuracy price, or None when there is none
+    tolerance: allowed absolute error; Monte Carlo cases instead allow
+        `tolerance` standard errors of their own estimate
+    """
+
+    def __init__(self, name, run, units, unit, reference=None, tolerance=None, sampled=False):
+        self.name = name
+        self.run = run
+        self.units = units
+        self.unit = unit
+        self.reference = reference
+        self.tolerance = tolerance
+        self.sampled = sampled
+
+
+def _price(result):
+    return result.get("price") if isinstance(result, dict) else result
+
+
+def _job(job_type, **params):
+    return lambda: run_job(job_type, params)
+
+
+def build_cases(quick=False):
+    """Every engine across its size grid; `quick` keeps the smallest size of each."""
+    c = CONTRACT
+    european = {opt: float(bsm_price(c["spot"], c["strike"], c["rate"], c["vol"], c["time"], opt == "call"))
+                for opt in ("call", "put")}
+    # High-resolution BBSR lattice for the American put
+    american_put = binomial_lattice(c["spot"], c["strike"], c["time"], c["rate"], c["vol"], 4_000,
+                                    "put", american=True, acceleration="bbsr")
+
+    def sizes(*values):
+        return values[:1] if quick else values
+
+    cases = [Case("price/bs", _job("price", model="bs", **c), 1, "contracts", european["call"], 1e-12),
+             Case("price/bsm_eur_put", _job("price", model="bsm_eur_put", option_type="put", **c),
+                  1, "contracts", european["put"], 1e-12)]
+
+    for n in sizes(1_000, 100_000, 1_000_000):
+        strikes = np.linspace(50, 150, n).tolist()
+        cases.append(Case(f"price_batch/bs/{n}", _job("price_batch", model="bs", **{**c, "strike": strikes}),
+                          n, "contracts"))
+
+    for sims in sizes(100_000, 1_000_000, 10_000_000):
+        for model, opt in (("mc_call", "call"), ("mc_put", "put")):
+            cases.append(Case(f"price/{model}/{sims}",
+                              _job("price", model=model, option_type=opt, sims=sims, seed=1, **c),
+                              sims, "paths", european[opt], 4.0, sampled=True))
+        cases.append(Case(f"price/mc_call/antithetic+cv/{sims}",
+                          _job("price", model="mc_call", sims=sims, seed=1,
+                               variance_reduction=["antithetic", "control_variate"], **c),
+                          sims, "paths", european["call"], 4.0, sampled=True))
+
+    for sims in sizes(10_000, 100_000):
+        for payoff in ("asian", "lookback"):
+            cases.append(Case(f"price/mc_{payoff}_call/{sims}x252",
+                              _job("price", model=f"mc_{payoff}_call", sims=sims, seed=1, **c),
+                              sims * 252, "path steps"))
+
+    for sims in sizes(20_000, 100_000):
+        cases.append(Case(f"price/lsm_amer_put/{sims}",
+                          _job("price", model="lsm_amer_put", option_type="put", sims=sims,
+                               regression_paths=20_000, seed=1, **c),
+                          sims * 50, "path dates", american_put, 4.0, sampled=True))
+
+    for steps in sizes(500, 2_000, 5_000):
+        cases.append(Case(f"price/bin_amer_put/{steps}",
+                          _job("price", model="bin_amer_put", option_type="put", steps=steps, **c),
+                          steps * steps // 2, "nodes", american_put, 5.0 / steps))
+        cases.append(Case(f"price/bin_amer_put/bbsr/{steps}",
+                          _job("price", model="bin_amer_put", option_type="put", steps=steps,
+                               acceleration="bbsr", **c),
+                          steps * steps // 2, "nodes", american_put, 5.0 / steps))
+        cases.append(Case(f"price/cve_amer_call/{steps}",
+                          _job("price", model="cve_amer_call", steps=steps, **c),
+                          steps * steps // 2, "nodes", european["call"], 1e-8))
+        cases.append(Case(f"price/tri_amer_put/{steps}",
+                          _job("price", model="tri_amer_put", option_type="put", steps=steps, **c),
+                          steps * steps, "nodes", american_put, 5.0 / steps))
+
+    for steps in sizes(5_000, 100_000, 1_000_000):
+        cases.append(Case(f"price/bin_eur_call/{steps}",
+                          _job("price", model="bin_eur_call", steps=steps, **c),
+                          steps, "steps", european["call"], 5.0 / steps))
+
+    # The early-exercise boundary holds the American PDE below second order
+    for points in sizes(200, 800):
+        cases.append(Case(f"price/pde_amer_put/{points}x{points}",
+                          _job("price", model="pde_amer_put", option_type="put",
+                               space_steps=points, time_steps=points, **c),
+                          points * points, "grid points", american_put, 0.3 / points))
+
+    for n in sizes(1_000, 100_000):
+        prices = (np.linspace(0.5, 1.5, n) * european["call"]).tolist()
+        cases.append(Case(f"implied_vol/{n}",
+                          _job("implied_vol", price=prices, spot=c["spot"], strike=c["strike"],
+                               rate=c["rate"], time=c["time"]),
+                          n, "quotes"))
+
+    cases.append(Case("greeks/bs", _job("greeks", model="bs", **c), 1, "contracts"))
+    cases.append(Case("greeks/bin_amer_put/2000",
+                      _job("greeks", model="bin_amer_put", option_type="put", steps=2_000, **c),
+                      3 * 2_000 * 2_000 // 2, "nodes"))
+    cases.append(Case("greeks/mc_call/1000000", _job("greeks", model="mc_call", sims=1_000_000, seed=1, **c),
+                      1_000_000, "paths"))
+
+    # models.py Greeks and payoff functions over production-sized arrays
+    for n in sizes(100_000, 1_000_000):
+        strikes = np.linspace(50, 150, n)
+        S = np.linspace(50, 150, n)
+        cases.append(Case(f"models/delta_gamma_vega/{n}",
+                          lambda K=strikes: (delta(c["spot"], K, c["rate"], c["vol"], c["time"]),
+                                             gamma(c["spot"], K, c["rate"], c["vol"], c["time"]),
+                                             vega(c["spot"], K, c["rate"], c["vol"], c["time"])),
+                          n, "contracts"))
+        cases.append(Case(f"models/hedge_ratio/{n}", lambda d=strikes / 150: hedge_ratio(d, 10), n, "contracts"))
+        cases.append(Case(f"models/payoffs/{n}",
+                          lambda S=S: (protective_put_pl(S, 100, 95, 2.0), covered_call_pl(S, 100, 105, 3.0),
+                                       collar_pl(S, 100, 95, 2.0, 105, 3.0)),
+                          n, "prices"))
+    return cases
+
+
+def measure(case, repeats):
+    """
+    Warm-up, median-of-`repeats` wall time, then one traced run for peak memory.
+
+    Cases faster than MIN_TIMED_SECONDS are looped within each repeat, as
+    timeit does, so microsecond kernels aren't dominated by timer noise.
+    """
+    result = case.run()
+    # Calibrate on a warm run: the first one pays for imports and caches
+    start = time.perf_counter()
+    case.run()
+    number = max(1, int(MIN_TIMED_SECONDS / max(time.perf_counter() - start, 1e-9)))
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            case.run()
+        times.append((time.perf_counter() - start) / number)
+    seconds = float(np.median(times))
+
+    tracemalloc.start()
+    try:
+        case.run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    row = {"seconds": seconds, "throughput": case.units / seconds, "unit": case.unit, "peak_mb": peak / 2**20}
+    price = _price(result)
+    if case.reference is not None and price is not None:
+        error = abs(price - case.reference)
+        allowed = case.tolerance * result["std_error"] if case.sampled else case.tolerance
+        row.update(error=error, allowed_error=allowed)
+    return row
+
+
+def measure_in_subprocess(case, repeats):
+    """`measure` in a fresh interpreter, which may land on a faster or slower footing."""
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--measure", case.name,
+                          "--repeats", str(repeats)], capture_output=True, text=True, check=True).stdout
+    return json.loads(out.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--filter", help="regex selecting case names")
+    parser.add_argument("--quick", action="store_true", help="smallest size per engine only")
+    parser.add_argument("--repeats", type=int, default=7)
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed fractional throughput drop against the baseline")
+    parser.add_argument("--retries", type=int, default=2,
+                        help="re-measurements of a case that misses the threshold before it fails")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="write the measured cases into the baseline file")
+    parser.add_argument("--baseline-runs", type=int, default=3,
+                        help="measurements per case, each in its own process, whose median is recorded")
+    parser.add_argument("--json", help="also write the full results to this file")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        # One case for measure_in_subprocess: print its row and exit
+        case, = (case for case in build_cases() if case.name == args.measure)
+        print(json.dumps(measure(case, args.repeats)))
+        return
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["cases"]
+
+    cases = build_cases(args.quick)
+    if args.filter:
+        cases = [case for case in cases if re.search(args.filter, case.name)]
+
+    results = {}
+    failures = []
+    print(f"{'case':<40} {'seconds':>9} {'throughput':>12} {'unit':<12} {'peak MB':>8} {'error':>9} {'vs base':>8}")
+    for case in cases:
+        row = measure(case, args.repeats)
+        base = baseline.get(case.name)
+        if args.update_baseline:
+            runs = [row] + [measure_in_subprocess(case, args.repeats) for _ in range(args.baseline_runs - 1)]
+            runs.sort(key=lambda run: run["throughput"])
+            row = runs[len(runs) // 2]
+        for _ in range(args.retries):
+            # Confirm an apparent regression before failing on it, in a
+            # fresh process: a slow one stays slow however often it repeats
+            if args.update_baseline or not base or row["throughput"] >= (1 - args.threshold) * base["throughput"]:
+                break
+            retry = measure_in_subprocess(case, args.repeats)
+            if retry["throughput"] > row["throughput"]:
+                row = retry
+        results[case.name] = row
+
+        notes = []
+        if row.get("error", 0.0) > row.get("allowed_error", float("inf")):
+            notes.append(f"error {row['error']:.2e} > {row['allowed_error']:.2e}")
+        ratio = ""
+        if base:
+            change = row["throughput"] / base["throughput"]
+            ratio = f"{change:.2f}x"
+            if change < 1 - args.threshold:
+                notes.append(f"throughput {change:.2f}x baseline")
+        if notes:
+            failures.append((case.name, notes))
+        error = f"{row['error']:.2e}" if "error" in row else "-"
+        print(f"{case.name:<40} {row['seconds']:>9.4f} {row['throughput']:>12.3g} {row['unit']:<12} "
+              f"{row['peak_mb']:>8.1f} {error:>9} {ratio or 'new':>8}" + ("  FAIL" if notes else ""))
+
+    environment = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"environment": environment, "cases": results}, f, indent=1, sort_keys=True)
+    if args.update_baseline:
+        merged = {**baseline, **{name: {k: row[k] for k in ("seconds", "throughput", "unit")}
+                                 for name, row in results.items()}}
+        with open(args.baseline, "w") as f:
+            json.dump({"environment": environment, "cases": merged}, f, indent=1, sort_keys=True)
+        print(f"baseline updated: {args.baseline}")
+        return
+
+    for name, notes in failures:
+        print(f"FAIL {name}: {'; '.join(notes)}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import numpy as np
+from scipy.special import ndtr
+
+
+def is_call_array(option_type):
+    """Boolean array (or scalar) that is True where option_type is 'call'."""
+    opt = np.asarray(option_type)
+    bad = ~np.isin(opt, ("call", "put"))
+    if bad.any():
+        raise ValueError(f"Unknown option_type: {opt[bad].ravel()[0]}")
+    return opt == "call"
+
+
+def bsm_price(S, K, r, vol, T, is_call=True, q=0.0):
+    """
+    Black-Scholes-Merton price for arrays of contracts.
+
+    All arguments broadcast against each other, so a scalar spot can be
+    priced against a vector of strikes, a strike x expiry grid, and so on.
+
+    S: Spot price(s)
+    K: Strike price(s)
+    r: Risk-free rate(s)
+    vol: Volatility(ies)
+    T: Time(s) to expiration in years
+    is_call: True for calls, False for puts (bool or bool array)
+    q: Continuous dividend yield(s)
+
+    Returns:
+        numpy.ndarray of prices with the broadcast shape of the inputs
+    """
+    S = np.asarray(S, dtype=float)
+    K = np.asarray(K, dtype=float)
+    r = np.asarray(r, dtype=float)
+    vol = np.asarray(vol, dtype=float)
+    T = np.asarray(T, dtype=float)
+    q = np.asarray(q, dtype=float)
+
+    sig_t = vol * np.sqrt(T)
+    d1 = (np.log(S / K) + (r - q + 0.5 * vol**2) * T) / sig_t
+    d2 = d1 - sig_t
+    # +1 for calls, -1 for puts: price = phi * (S e^{-qT} N(phi d1) - K e^{-rT} N(phi d2))
+    phi = np.where(is_call, 1.0, -1.0)
+    return phi * (S * np.exp(-q * T) * ndtr(phi * d1) - K * np.exp(-r * T) * ndtr(phi * d2))
+
+
+def bsm_greeks(S, K, r, vol, T, is_call=True, q=0.0):
+    """
+    Black-Scholes-Merton price and Greeks for arrays of contracts.
+
+    d1, d2 and the normal CDF/PDF terms are evaluated once and shared by
+    every output, so the cost is a handful of array passes regardless of
+    how many Greeks are requested. Arguments broadcast as in `bsm_price`.
+
+    Returns:
+        dict of numpy.ndarray: price, delta, gamma, vega, theta, rho.
+        Vega and rho are per unit (not per 1%) change; theta is per year.
+    """
+    S = np.asarray(S, dtype=float)
+    K = np.asarray(K, dtype=float)
+    r = np.asarray(r, dtype=float)
+    vol = np.asarray(vol, dtype=float)
+    T = np.asarray(T, dtype=float)
+    q = np.asarray(q, dtype=float)
+
+    sqrt_t = np.sqrt(T)
+    sig_t = vol * sqrt_t
+    d1 = (np.log(S / K) + (r - q + 0.5 * vol**2) * T) / sig_t
+    d2 = d1 - sig_t
+    phi = np.where(is_call, 1.0, -1.0)
+
+    df_q = np.exp(-q * T)
+    df_r = np.exp(-r * T)
+    s_dq = S * df_q
+    k_dr = K * df_r
+    n_d1 = ndtr(phi * d1)
+    n_d2 = ndtr(phi * d2)
+    pdf_d1 = np.exp(-0.5 * d1**2) / np.sqrt(2 * np.pi)
+
+    return {
+        "price": phi * (s_dq * n_d1 - k_dr * n_d2),
+        "delta": phi * df_q * n_d1,
+        "gamma": df_q * pdf_d1 / (S * sig_t),
+        "vega": s_dq * pdf_d1 * sqrt_t,
+        "theta": -s_dq * pdf_d1 * vol / (2 * sqrt_t) - phi * r * k_dr * n_d2 + phi * q * s_dq * n_d1,
+        "rho": phi * K * T * df_r * n_d2,
+    }
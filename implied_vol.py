@@ -0,0 +1,129 @@
+"""
+Vectorized Black-Scholes-Merton implied volatility.
+
+Every quote runs a safeguarded Newton iteration on the `bsm_price` pricer
+with `models.vega` as the derivative. Each quote keeps its own bracket
+[lo, hi]. Any Newton step that leaves the bracket, or that has a
+vanishing vega, is replaced by a bisection step, so every quote converges
+even deep in or out of the money. Only quotes that are still unconverged
+are re-evaluated on each pass.
+"""
+import numpy as np
+
+from bsm import bsm_price, is_call_array
+from models import vega
+
+VOL_LOWER = 1e-6
+VOL_UPPER = 10.0
+
+
+def initial_guess(price, S, K, r, T, is_call=True, q=0.0):
+    """
+    Corrado-Miller rational approximation to implied vol.
+
+    Puts are mapped to calls by put-call parity, and spot/strike are
+    replaced by their discounted forward values so dividends and rates are
+    handled. Where the approximation's square root goes negative the real
+    part is used, and the result is clipped to a sane range.
+    """
+    S_q = S * np.exp(-q * T)
+    K_r = K * np.exp(-r * T)
+    call = np.where(is_call, price, price + S_q - K_r)
+
+    half_gap = (S_q - K_r) / 2
+    x = call - half_gap
+    root = np.sqrt(np.maximum(x**2 - (S_q - K_r)**2 / np.pi, 0.0))
+    guess = np.sqrt(2 * np.pi / T) / (S_q + K_r) * (x + root)
+    return np.clip(np.nan_to_num(guess, nan=0.2), 0.01, 3.0)
+
+
+def implied_vol(price, S, K, r, T, option_type="call", q=0.0, tol=1e-8, max_iter=100):
+    """
+    Implied volatility for arrays of option quotes.
+
+    price: Observed option price(s)
+    S: Spot price(s)
+    K: Strike price(s)
+    r: Risk-free rate(s)
+    T: Time(s) to expiration in years
+    option_type: 'call'/'put' or an array of them
+    q: Continuous dividend yield(s)
+    tol: Convergence tolerance on the price residual (relative to the
+        out-of-the-money price) and on the vol bracket width
+    max_iter: Maximum Newton/bisection iterations per quote
+
+    Returns:
+        dict of numpy.ndarray with the broadcast shape of the inputs:
+        vol (NaN where the quote violates no-arbitrage bounds), iterations,
+        converged and residual (model minus quoted out-of-the-money price).
+    """
+    price, S, K, r, T, q, is_call = (
+        np.array(a, dtype=dt) for a, dt in zip(
+            np.broadcast_arrays(
+                np.asarray(price, dtype=float), np.asarray(S, dtype=float),
+                np.asarray(K, dtype=float), np.asarray(r, dtype=float),
+                np.asarray(T, dtype=float), np.asarray(q, dtype=float),
+                is_call_array(option_type),
+            ),
+            (float,) * 6 + (bool,),
+        )
+    )
+    shape = price.shape
+    price, S, K, r, T, q, is_call = (a.ravel() for a in (price, S, K, r, T, q, is_call))
+
+    # No-arbitrage bounds: intrinsic value below, S e^{-qT} (call) / K e^{-rT} (put) above
+    S_q = S * np.exp(-q * T)
+    K_r = K * np.exp(-r * T)
+    lower_bound = np.maximum(np.where(is_call, S_q - K_r, K_r - S_q), 0.0)
+    upper_bound = np.where(is_call, S_q, K_r)
+    valid = (price > lower_bound) & (price < upper_bound) & (T > 0)
+
+    # Solve on the out-of-the-money side via put-call parity: the OTM price is
+    # pure time value, so a relative tolerance on it stays meaningful when
+    # the quote is dominated by intrinsic value.
+    itm = np.where(is_call, S_q > K_r, K_r > S_q)
+    price = np.where(itm, price - lower_bound, price)
+    is_call = is_call ^ itm
+
+    vol = np.full(price.size, np.nan)
+    iterations = np.zeros(price.size, dtype=int)
+    converged = np.zeros(price.size, dtype=bool)
+    residual = np.full(price.size, np.nan)
+
+    idx = np.flatnonzero(valid)
+    sigma = initial_guess(price[idx], S[idx], K[idx], r[idx], T[idx], is_call[idx], q[idx])
+    lo = np.full(idx.size, VOL_LOWER)
+    hi = np.full(idx.size, VOL_UPPER)
+    target_tol = tol * np.maximum(price[idx], 1e-12)
+
+    for it in range(1, max_iter + 1):
+        if idx.size == 0:
+            break
+        diff = bsm_price(S[idx], K[idx], r[idx], sigma, T[idx], is_call[idx], q[idx]) - price[idx]
+        iterations[idx] = it
+        residual[idx] = diff
+        vol[idx] = sigma
+
+        # Tighten each bracket: price is increasing in vol
+        hi = np.where(diff > 0, sigma, hi)
+        lo = np.where(diff < 0, sigma, lo)
+
+        # Converged on the price residual, or the bracket has pinned vol down
+        done = (np.abs(diff) <= target_tol) | ((hi - lo) <= tol * np.maximum(sigma, 1.0))
+        converged[idx[done]] = True
+
+        v = vega(S[idx] * np.exp(-q[idx] * T[idx]), K[idx], r[idx], sigma, T[idx])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = sigma - diff / v
+        safe = np.isfinite(newton) & (newton > lo) & (newton < hi)
+        step = np.where(safe, newton, 0.5 * (lo + hi))
+
+        keep = ~done
+        idx, sigma, lo, hi, target_tol = idx[keep], step[keep], lo[keep], hi[keep], target_tol[keep]
+
+    return {
+        "vol": vol.reshape(shape),
+        "iterations": iterations.reshape(shape),
+        "converged": converged.reshape(shape),
+        "residual": residual.reshape(shape),
+    }
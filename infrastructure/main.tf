@@ -88,6 +88,18 @@ resource "aws_iam_role_policy_attachment" "sqs_dynamo" {
   role       = aws_iam_role.lambda_exec.name
   policy_arn = "arn:aws:iam::aws:policy/AmazonDynamoDBFullAccess"
 }
+resource "aws_iam_role_policy" "result_blobs" {
+  name = "result-blobs-rw"
+  role = aws_iam_role.lambda_exec.id
+  policy = jsonencode({
+    Version = "2012-10-17",
+    Statement = [{
+      Effect   = "Allow",
+      Action   = ["s3:GetObject", "s3:PutObject"],
+      Resource = "${aws_s3_bucket.result_blobs.arn}/*"
+    }]
+  })
+}
 resource "aws_iam_role_policy_attachment" "sqs_read" {
   role       = aws_iam_role.lambda_exec.name
   policy_arn = "arn:aws:iam::aws:policy/AmazonSQSFullAccess"
@@ -97,6 +109,16 @@ resource "aws_iam_role_policy_attachment" "sqs_read" {
 resource "aws_sqs_queue" "jobs" {
   name                      = "options-pricing-jobs"
   visibility_timeout_seconds = 900
+  # Jobs that keep failing (not bad inputs, which are stored as job errors)
+  # are parked after a few tries instead of redelivered until they expire
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.jobs_dlq.arn
+    maxReceiveCount     = 3
+  })
+}
+resource "aws_sqs_queue" "jobs_dlq" {
+  name                      = "options-pricing-jobs-dlq"
+  message_retention_seconds = 1209600
 }
 resource "aws_dynamodb_table" "results" {
   name         = "options-pricing-results"
@@ -112,6 +134,23 @@ resource "aws_dynamodb_table" "results" {
     enabled        = true
   }
 }
+# Packed result arrays too large for a DynamoDB item (see result_codec.py)
+resource "aws_s3_bucket" "result_blobs" {
+  bucket_prefix = "options-pricing-results-"
+  force_destroy = true
+}
+resource "aws_s3_bucket_lifecycle_configuration" "result_blobs" {
+  bucket = aws_s3_bucket.result_blobs.id
+  rule {
+    id     = "expire-with-results"
+    status = "Enabled"
+    filter {}
+    # Matches RESULT_TTL_SECONDS, after which the table item is gone too
+    expiration {
+      days = 1
+    }
+  }
+}
 
 # 4. Lambda Function
 resource "aws_lambda_function" "options_pricing" {
@@ -127,6 +166,9 @@ resource "aws_lambda_function" "options_pricing" {
     variables = {
       JOB_QUEUE_URL  = aws_sqs_queue.jobs.id
       RESULTS_TABLE  = aws_dynamodb_table.results.name
+      # jobs cheaper than this (jobs.estimate_cost units) are computed inline
+      SYNC_COST_BUDGET = "2000000"
+      RESULT_BLOB_URL  = "s3://${aws_s3_bucket.result_blobs.bucket}/results"
     }
   }
 }
@@ -143,8 +185,9 @@ resource "aws_lambda_function" "worker" {
 
   environment {
     variables = {
-      JOB_QUEUE_URL = aws_sqs_queue.jobs.id
-      RESULTS_TABLE = aws_dynamodb_table.results.name
+      JOB_QUEUE_URL   = aws_sqs_queue.jobs.id
+      RESULTS_TABLE   = aws_dynamodb_table.results.name
+      RESULT_BLOB_URL = "s3://${aws_s3_bucket.result_blobs.bucket}/results"
     }
   }
 }
@@ -152,7 +195,10 @@ resource "aws_lambda_function" "worker" {
 resource "aws_lambda_event_source_mapping" "worker_map" {
   event_source_arn  = aws_sqs_queue.jobs.arn
   function_name     = aws_lambda_function.worker.arn
-  batch_size        = 1
+  # worker groups records by job type/model and reports per-record failures
+  batch_size                         = 10
+  maximum_batching_window_in_seconds = 1
+  function_response_types            = ["ReportBatchItemFailures"]
 }
 
 
@@ -199,6 +245,10 @@ output "sqs_queue_url" {
   value       = aws_sqs_queue.jobs.id
   description = "SQS queue URL for job submissions"
 }
+output "sqs_dlq_url" {
+  value       = aws_sqs_queue.jobs_dlq.id
+  description = "SQS dead-letter queue for jobs that failed every delivery"
+}
 output "dynamodb_table" {
   value       = aws_dynamodb_table.results.name
   description = "DynamoDB table for results"
@@ -0,0 +1,243 @@
+"""
+Per-job timing, cost parameters and opt-in profiling.
+
+Every job is timed in phases:
+
+- enqueue: API time from request to SQS send, or to inline compute
+- queue_wait: from the SQS send to the worker picking the batch up
+- decode: parsing the SQS message
+- compute: running the engine; jobs sharing a vectorized kernel split its time
+- persist: writing the result item
+
+The phases up to compute, plus the parameters that drive cost, are stored
+with the result under `metrics`. Persist time is only known after the item
+is written, so it goes into the aggregates alone.
+
+Aggregates are kept per (job type, model) as DynamoDB counters in the
+results table, updated with ADD so concurrent writers never overwrite one
+another. Each holds job, error, queued and cache-hit counts, summed
+milliseconds per phase, and latency histograms of total and compute time.
+The worker flushes them once per batch. The API flushes every
+FLUSH_SECONDS or FLUSH_JOBS jobs, so requests don't each pay for the writes.
+
+A job submitted with profile=true also runs under cProfile. The top of the
+cumulative-time report is stored with its result.
+"""
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from decimal import Decimal
+
+from jobs import estimate_cost
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+PHASES = ("enqueue", "queue_wait", "decode", "compute", "persist")
+# Phases only queued (SQS) jobs go through
+QUEUE_PHASES = ("queue_wait", "decode")
+HISTOGRAM_PHASES = ("total", "compute")
+# Upper bounds of the latency histogram buckets, in ms; the last bucket is open
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1_000, 2_500, 5_000, 10_000, 30_000, 60_000, 300_000, 900_000)
+# Request fields reported as cost drivers, by model name prefix (first match wins);
+# other models (closed form) report only the model
+_MC_FIELDS = ("sims", "variance_reduction", "target_std_error", "time_budget", "max_sims", "workers")
+COST_FIELDS = (
+    (("mc_call", "mc_put"), _MC_FIELDS),
+    (("mc_",), _MC_FIELDS + ("monitoring_steps",)),
+    (("lsm_",), _MC_FIELDS + ("exercise_dates", "regression_paths")),
+    (("bin_", "tri_", "cve_"), ("steps", "acceleration")),
+    (("pde_",), ("space_steps", "time_steps")),
+)
+# Lines of the cProfile report kept with a profiled job
+PROFILE_LINES = int(os.environ.get("PROFILE_LINES", "40"))
+# Metrics items share the results table; GET /result refuses keys with this prefix
+METRICS_PREFIX = "metrics-"
+# Item whose string set lists every metrics key, so reads don't need a scan
+METRICS_INDEX = "metrics-index"
+# Processes serving requests flush counters at most this often, or after this many jobs
+FLUSH_SECONDS = float(os.environ.get("METRICS_FLUSH_SECONDS", "10"))
+FLUSH_JOBS = int(os.environ.get("METRICS_FLUSH_JOBS", "50"))
+
+
+class JobTimer:
+    """Milliseconds spent in each phase of one job."""
+
+    def __init__(self, **ms):
+        self.ms = dict(ms)
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, 1000 * (time.perf_counter() - start))
+
+    def add(self, name, ms):
+        self.ms[name] = self.ms.get(name, 0.0) + ms
+
+    def total(self):
+        return sum(self.ms.values())
+
+    def record(self, job_type, params):
+        """Timings and cost drivers to store with the result."""
+        return {
+            "phases_ms": {p: round(self.ms[p], 3) for p in PHASES if p in self.ms},
+            "total_ms": round(self.total(), 3),
+            "cost": cost_summary(job_type, params),
+        }
+
+
+def cost_summary(job_type, params):
+    """The request fields that drive a job's cost, with its `estimate_cost`."""
+    model = params.get("model")
+    fields = next((f for prefixes, f in COST_FIELDS if isinstance(model, str) and model.startswith(prefixes)), ())
+    if "sims" in fields:
+        # Targeted runs are capped by max_sims instead of running sims paths
+        adaptive = params.get("target_std_error") is not None or params.get("time_budget") is not None
+        fields = [f for f in fields if f != ("sims" if adaptive else "max_sims")]
+    summary = {f: params[f] for f in ("model", *fields) if params.get(f) not in (None, [])}
+    try:
+        summary["estimated_cost"] = estimate_cost(job_type, params)
+    except (KeyError, TypeError, ValueError):
+        pass
+    return summary
+
+
+def run_profiled(fn, *args):
+    """
+    Call fn(*args) under cProfile.
+
+    Returns:
+        tuple: (result, or the exception raised, report text)
+    """
+    profiler = cProfile.Profile()
+    try:
+        outcome = profiler.runcall(fn, *args)
+    except Exception as e:
+        outcome = e
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_LINES)
+    return outcome, out.getvalue()
+
+
+def bucket(ms):
+    """Histogram bucket label for a latency in ms: its upper bound, or 'inf'."""
+    for bound in LATENCY_BUCKETS_MS:
+        if ms <= bound:
+            return str(bound)
+    return "inf"
+
+
+def metrics_key(job_type, model):
+    return f"{METRICS_PREFIX}{job_type}/{model or '-'}"
+
+
+class MetricsAggregator:
+    """Counters accumulated in memory and flushed to the results table with ADD."""
+
+    def __init__(self):
+        self._pending = defaultdict(Counter)
+        # The API adds from threadpool requests
+        self._lock = threading.Lock()
+        self._jobs = 0
+        self._flushed_at = time.monotonic()
+
+    def add(self, job_type, model, timer=None, error=False, cached=False):
+        with self._lock:
+            self._add(metrics_key(job_type, model), timer, error, cached)
+
+    def _add(self, key, timer, error, cached):
+        counters = self._pending[key]
+        self._jobs += 1
+        if cached:
+            counters["cached"] += 1
+            return
+        counters["count"] += 1
+        counters["errors"] += int(error)
+        # Jobs that went through SQS, the denominator for the queue-side phases
+        counters["queued"] += int("queue_wait" in timer.ms)
+        for phase, ms in timer.ms.items():
+            counters[f"ms_{phase}"] += ms
+        for phase, ms in (("total", timer.total()), ("compute", timer.ms.get("compute", 0.0))):
+            counters[f"h_{phase}_{bucket(ms)}"] += 1
+
+    def maybe_flush(self, table):
+        """
+        Flush once FLUSH_JOBS jobs or FLUSH_SECONDS have gone by, so requests
+        don't each pay for the writes. Counters still pending when a
+        container is recycled are lost.
+        """
+        if self._jobs >= FLUSH_JOBS or time.monotonic() - self._flushed_at >= FLUSH_SECONDS:
+            self.flush(table)
+
+    def flush(self, table):
+        """One UpdateItem per touched key, plus one for the index."""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(Counter)
+            self._jobs = 0
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return
+        for key, counters in pending.items():
+            names = {f"#a{i}": name for i, name in enumerate(counters)}
+            values = {f":v{i}": Decimal(str(round(v, 3))) for i, v in enumerate(counters.values())}
+            table.update_item(
+                Key={"jobId": key},
+                UpdateExpression="ADD " + ", ".join(f"#a{i} :v{i}" for i in range(len(counters))),
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values,
+            )
+        table.update_item(
+            Key={"jobId": METRICS_INDEX},
+            UpdateExpression="ADD #k :k",
+            ExpressionAttributeNames={"#k": "keys"},
+            ExpressionAttributeValues={":k": set(pending)},
+        )
+
+
+def _quantile(histogram, count, q):
+    """Upper bound of the bucket holding quantile q (None if it's the open bucket)."""
+    seen = 0
+    for label in (*map(str, LATENCY_BUCKETS_MS), "inf"):
+        seen += histogram.get(label, 0)
+        if seen >= q * count:
+            return None if label == "inf" else float(label)
+    return None
+
+
+def summarize(item):
+    """Readable summary of one metrics item: means per phase, histograms and quantile bounds."""
+    count = int(item.get("count", 0))
+    summary = {"count": count, "errors": int(item.get("errors", 0)), "cached": int(item.get("cached", 0))}
+    if not count:
+        return summary
+    queued = int(item.get("queued", 0))
+    summary["queued"] = queued
+    summary["mean_ms"] = {
+        p: float(item[f"ms_{p}"]) / (queued if p in QUEUE_PHASES else count)
+        for p in PHASES if f"ms_{p}" in item and (queued or p not in QUEUE_PHASES)
+    }
+    for phase in HISTOGRAM_PHASES:
+        prefix = f"h_{phase}_"
+        histogram = {k[len(prefix):]: int(v) for k, v in item.items() if k.startswith(prefix)}
+        summary[f"{phase}_histogram_ms"] = histogram
+        summary[f"{phase}_quantiles_ms"] = {
+            f"p{int(q * 100)}": _quantile(histogram, count, q) for q in (0.5, 0.95, 0.99)
+        }
+    return summary
+
+
+def read_metrics(table):
+    """Summaries for every (job type, model) seen so far, keyed 'job_type/model'."""
+    index = table.get_item(Key={"jobId": METRICS_INDEX}).get("Item", {})
+    metrics = {}
+    for key in sorted(index.get("keys", ())):
+        item = table.get_item(Key={"jobId": key}).get("Item")
+        if item:
+            metrics[key[len(METRICS_PREFIX):]] = summarize(item)
+    return metrics
@@ -0,0 +1,535 @@
+"""
+Job dispatch shared by the SQS worker and the API's synchronous fast path.
+
+Pricing engines (and NumPy/SciPy behind them) are imported inside the
+functions that use them. The API imports this module only for cost
+estimates and result encoding, and most requests it handles never price
+anything, so its cold start skips those imports. The worker calls
+`load_engines` at start-up to pay for them once, in the Lambda init phase.
+"""
+import importlib
+import math
+import time
+from decimal import Decimal
+
+# Modules the compute functions import on first use
+ENGINE_MODULES = ("numpy", "models", "bsm", "monte_carlo", "lattice", "pde", "implied_vol", "lsm", "scenarios")
+PAYOFF_JOBS = ("protective_put", "covered_call", "collar")
+# Path cap for Monte Carlo runs driven by target_std_error/time_budget
+DEFAULT_MAX_SIMS = 10_000_000
+# Exceptions that mean a job's inputs are bad (e.g. the division by zero a
+# lattice hits at vol=0): reported to the client, never retried
+INPUT_ERRORS = (ValueError, ArithmeticError)
+# Path-dependent Monte Carlo models and the payoff each one prices
+PATH_MODELS = {
+    "mc_asian_call": "asian", "mc_asian_put": "asian",
+    "mc_barrier_call": "barrier", "mc_barrier_put": "barrier",
+    "mc_lookback_call": "lookback", "mc_lookback_put": "lookback",
+}
+
+
+def compute_price(params):
+    S = params["spot"]
+    K = params["strike"]
+    r = params["rate"]
+    sigma = params["vol"]
+    T = params["time"]
+    q = params.get("q", 0.0)
+    sims = params.get("sims", 100_000)
+    steps = params.get("steps", 5_000)
+    opt = params.get("option_type", "call")
+    seed = params.get("seed")
+    model = params["model"]
+    from bsm import is_call_array
+    # Engines below treat anything but 'call' as a put
+    is_call = bool(is_call_array(opt))
+
+    if model == "bs":
+        from models import BSM
+        eng = BSM(S0=S, K=K, r=r, vol=sigma, T=T, q=q)
+        return eng.european_call_option_price() if is_call else eng.european_put_option_price()
+
+    if model in ("mc_call", "mc_put"):
+        target = params.get("target_std_error")
+        budget = params.get("time_budget")
+        if target is not None or budget is not None:
+            # Error/time-targeted run: sims is replaced by the path cap
+            sims = params.get("max_sims", DEFAULT_MAX_SIMS)
+        from monte_carlo import monte_carlo_engine
+        res = monte_carlo_engine(
+            S0=S, sigma=sigma, r=r, q=q, T=T,
+            K=K, simulations=sims, option_type=opt, seed=seed,
+            variance_reduction=params.get("variance_reduction", ()),
+            target_std_error=target, time_budget=budget,
+            workers=params.get("workers", 1)
+        )
+        return res._asdict()
+
+    if model in PATH_MODELS:
+        target = params.get("target_std_error")
+        budget = params.get("time_budget")
+        if target is not None or budget is not None:
+            sims = params.get("max_sims", DEFAULT_MAX_SIMS)
+        from monte_carlo import monte_carlo_path_engine
+        res = monte_carlo_path_engine(
+            S0=S, sigma=sigma, r=r, q=q, T=T, K=K,
+            simulations=sims, steps=params.get("monitoring_steps", 252),
+            payoff_type=PATH_MODELS[model], option_type=opt,
+            barrier=params.get("barrier"), barrier_type=params.get("barrier_type"),
+            seed=seed, variance_reduction=params.get("variance_reduction", ()),
+            target_std_error=target, time_budget=budget,
+            workers=params.get("workers", 1)
+        )
+        return res._asdict()
+
+    if model in ("lsm_amer_call", "lsm_amer_put"):
+        target = params.get("target_std_error")
+        budget = params.get("time_budget")
+        if target is not None or budget is not None:
+            sims = params.get("max_sims", DEFAULT_MAX_SIMS)
+        from lsm import lsm_american
+        res = lsm_american(
+            S0=S, sigma=sigma, r=r, q=q, T=T, K=K,
+            simulations=sims, option_type=opt,
+            exercise_dates=params.get("exercise_dates", 50),
+            regression_paths=params.get("regression_paths", 50_000),
+            seed=seed, variance_reduction=params.get("variance_reduction", ()),
+            target_std_error=target, time_budget=budget,
+            workers=params.get("workers", 1)
+        )
+        return res._asdict()
+
+    if model in ("bin_amer_call", "bin_amer_put"):
+        from lattice import binomial_lattice
+        return binomial_lattice(
+            S=S, K=K, T=T, r=r, sigma=sigma,
+            n=steps, option_type=opt, american=True, q=q,
+            acceleration=params.get("acceleration")
+        )
+
+    if model in ("bin_eur_call", "bin_eur_put"):
+        from lattice import binomial_lattice, binomial_european
+        if params.get("acceleration") is not None:
+            return binomial_lattice(
+                S=S, K=K, T=T, r=r, sigma=sigma,
+                n=steps, option_type=opt, q=q,
+                acceleration=params["acceleration"]
+            )
+        return binomial_european(
+            S=S, K=K, T=T, r=r, sigma=sigma,
+            n=steps, option_type=opt, q=q
+        )
+
+    if model in ("tri_amer_call", "tri_amer_put", "tri_eur_call", "tri_eur_put"):
+        from lattice import trinomial_lattice
+        return trinomial_lattice(
+            S=S, K=K, T=T, r=r, sigma=sigma,
+            n=steps, option_type=opt, american=model.startswith("tri_amer"), q=q
+        )
+
+    if model in ("pde_amer_call", "pde_amer_put", "pde_eur_call", "pde_eur_put"):
+        from pde import crank_nicolson
+        return crank_nicolson(
+            S=S, K=K, T=T, r=r, sigma=sigma, option_type=opt,
+            american=model.startswith("pde_amer"), q=q,
+            space_steps=params.get("space_steps", 200),
+            time_steps=params.get("time_steps", 200),
+            return_surface=params.get("return_surface", False)
+        )
+
+    if model in ("bsm_eur_call", "bsm_eur_put"):
+        from models import BSM
+        eng = BSM(S0=S, K=K, r=r, vol=sigma, T=T, q=q)
+        return eng.european_call_option_price() if is_call else eng.european_put_option_price()
+
+    if model == "cve_amer_call":
+        from models import BSM
+        from lattice import binomial_lattice, binomial_european
+        amer = binomial_lattice(S=S, K=K, T=T, r=r, sigma=sigma, n=steps, option_type="call", american=True)
+        eur_bsm = BSM(S0=S, K=K, r=r, vol=sigma, T=T).european_call_option_price()
+        eur_bin = binomial_european(S=S, K=K, T=T, r=r, sigma=sigma, n=steps, option_type="call")
+        return amer + (eur_bsm - eur_bin)
+
+    raise ValueError(f"Unknown price model: {model}")
+
+
+def compute_price_batch(params):
+    """Price a whole chain of contracts given as broadcastable arrays."""
+    import numpy as np
+    from bsm import bsm_price, is_call_array
+    model = params["model"]
+    S, K, r, sigma, T, q, is_call = (
+        a.ravel() for a in np.broadcast_arrays(
+            np.asarray(params["spot"], dtype=float),
+            np.asarray(params["strike"], dtype=float),
+            np.asarray(params["rate"], dtype=float),
+            np.asarray(params["vol"], dtype=float),
+            np.asarray(params["time"], dtype=float),
+            np.asarray(params.get("q", 0.0), dtype=float),
+            is_call_array(params.get("option_type", "call")),
+        )
+    )
+    sims = params.get("sims", 100_000)
+    steps = params.get("steps", 5_000)
+
+    if model in ("bs", "bsm_eur_call", "bsm_eur_put"):
+        return {"prices": bsm_price(S, K, r, sigma, T, is_call, q).tolist()}
+
+    if model in ("mc_call", "mc_put"):
+        from monte_carlo import monte_carlo_batch
+        prices, std_errors = monte_carlo_batch(
+            S0=S, sigma=sigma, r=r, q=q, T=T, K=K,
+            simulations=sims, is_call=is_call, seed=params.get("seed")
+        )
+        return {"prices": prices.tolist(), "std_errors": std_errors.tolist()}
+
+    acceleration = params.get("acceleration")
+    from lattice import binomial_lattice, binomial_european
+
+    if model in ("bin_eur_call", "bin_eur_put") and acceleration is None:
+        prices = [
+            binomial_european(S=s_, K=k_, T=t_, r=r_, sigma=v_, n=steps,
+                              option_type="call" if c_ else "put", q=q_)
+            for s_, k_, r_, v_, t_, q_, c_ in zip(S, K, r, sigma, T, q, is_call)
+        ]
+        return {"prices": prices}
+
+    if model in ("bin_amer_call", "bin_amer_put", "bin_eur_call", "bin_eur_put"):
+        american = model.startswith("bin_amer")
+        prices = [
+            binomial_lattice(S=s_, K=k_, T=t_, r=r_, sigma=v_, n=steps,
+                             option_type="call" if c_ else "put", american=american, q=q_,
+                             acceleration=acceleration)
+            for s_, k_, r_, v_, t_, q_, c_ in zip(S, K, r, sigma, T, q, is_call)
+        ]
+        return {"prices": prices}
+
+    raise ValueError(f"Unknown batch price model: {model}")
+
+
+def compute_greeks(params):
+    S = params["spot"]
+    K = params["strike"]
+    r = params["rate"]
+    sigma = params["vol"]
+    T = params["time"]
+    q = params.get("q", 0.0)
+    opt = params.get("option_type", "call")
+    model = params.get("model", "bs")
+    from bsm import is_call_array
+    is_call = bool(is_call_array(opt))
+
+    if model in ("bin_amer_call", "bin_amer_put", "bin_eur_call", "bin_eur_put"):
+        # delta/gamma/theta from the first tree levels of one induction
+        from lattice import binomial_greeks
+        return binomial_greeks(
+            S=S, K=K, T=T, r=r, sigma=sigma, n=params.get("steps", 5_000),
+            option_type=opt, american=model.startswith("bin_amer"), q=q,
+            acceleration=params.get("acceleration")
+        )
+
+    if model in ("pde_amer_call", "pde_amer_put", "pde_eur_call", "pde_eur_put"):
+        from pde import crank_nicolson
+        return crank_nicolson(
+            S=S, K=K, T=T, r=r, sigma=sigma, option_type=opt,
+            american=model.startswith("pde_amer"), q=q,
+            space_steps=params.get("space_steps", 200),
+            time_steps=params.get("time_steps", 200)
+        )
+
+    if model in ("mc_call", "mc_put"):
+        from monte_carlo import monte_carlo_greeks
+        return monte_carlo_greeks(
+            S0=S, sigma=sigma, r=r, q=q, T=T, K=K,
+            simulations=params.get("sims", 100_000), option_type=opt,
+            seed=params.get("seed"),
+            variance_reduction=params.get("variance_reduction", ()),
+            workers=params.get("workers", 1)
+        )
+
+    if model != "bs":
+        raise ValueError(f"Unknown greeks model: {model}")
+
+    from bsm import bsm_greeks
+    greeks = bsm_greeks(S=S, K=K, r=r, vol=sigma, T=T, is_call=is_call, q=q)
+    return {
+        "delta": float(greeks["delta"]),
+        "gamma": float(greeks["gamma"]),
+        "vega":  float(greeks["vega"]),
+        "theta": float(greeks["theta"]),
+        "rho":   float(greeks["rho"]),
+    }
+
+
+def compute_hedge(params):
+    from models import hedge_ratio
+    hed_qty = hedge_ratio(
+        delta=params["delta"],
+        contracts=params.get("contracts", 1),
+        contract_size=params.get("contract_size", 100)
+    )
+    return {"hedge_quantity": hed_qty}
+
+
+def compute_payoff(params, job_type):
+    import numpy as np
+    from models import protective_put_pl, covered_call_pl, collar_pl
+    S0 = params["S0"]
+    prices = params["prices"]
+    prem_put = params.get("premium_put", 0.0)
+    prem_call = params.get("premium_call", 0.0)
+    K_put = params.get("K_put")
+    K_call = params.get("K_call")
+    arr = np.array(prices)
+
+    if job_type == "protective_put":
+        if K_put is None:
+            raise ValueError("K_put is required for protective_put")
+        payoffs = protective_put_pl(arr, S0, K_put, prem_put)
+
+    elif job_type == "covered_call":
+        if K_call is None:
+            raise ValueError("K_call is required for covered_call")
+        payoffs = covered_call_pl(arr, S0, K_call, prem_call)
+
+    elif job_type == "collar":
+        if K_put is None or K_call is None:
+            raise ValueError("Both K_put and K_call are required for collar")
+        payoffs = collar_pl(arr, S0, K_put, prem_put, K_call, prem_call)
+    else:
+        raise ValueError(f"Unknown payoff type: {job_type}")
+
+    return {"payoffs": payoffs.tolist()}
+
+def compute_scenario(params):
+    """P&L cube of a multi-leg strategy over a spot x vol x time grid."""
+    from scenarios import scenario_pnl
+    out = scenario_pnl(
+        legs=params["legs"], spots=params["spots"], vols=params["vols"], times=params["times"],
+        spot=params["spot"], vol=params.get("vol"), rate=params.get("rate", 0.0), q=params.get("q", 0.0),
+    )
+    return {
+        "spots": params["spots"], "vols": params["vols"], "times": params["times"],
+        "premiums": out["premiums"].tolist(),
+        # Indexed [spot][vol][time]
+        "pnl": out["pnl"].tolist(),
+    }
+
+def compute_implied_vol(params):
+    """Invert a chain of quotes to implied vols, with per-quote diagnostics."""
+    import numpy as np
+    from implied_vol import implied_vol
+    out = implied_vol(
+        price=params["price"], S=params["spot"], K=params["strike"],
+        r=params["rate"], T=params["time"],
+        option_type=params.get("option_type", "call"), q=params.get("q", 0.0),
+        tol=params.get("tol", 1e-8), max_iter=params.get("max_iter", 100),
+    )
+    vols = np.atleast_1d(out["vol"])
+    return {
+        # NaN can't be stored in DynamoDB or JSON; unpriceable quotes become None
+        "vols": [None if np.isnan(v) else v for v in vols.tolist()],
+        "iterations": np.atleast_1d(out["iterations"]).tolist(),
+        "converged": np.atleast_1d(out["converged"]).tolist(),
+        "residuals": [None if np.isnan(v) else v for v in np.atleast_1d(out["residual"]).tolist()],
+    }
+
+def to_decimal(obj):
+    if isinstance(obj, float):
+        # use str() to avoid binary‐float artifacts
+        return Decimal(str(obj))
+    elif isinstance(obj, dict):
+        return {k: to_decimal(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [to_decimal(v) for v in obj]
+    else:
+        return obj
+
+
+def check_finite(raw):
+    """
+    Return raw unchanged, or raise ValueError if any float in it is NaN or
+    infinite (e.g. closed-form prices at time=0), which DynamoDB can't store.
+    """
+    if isinstance(raw, float):
+        if not math.isfinite(raw):
+            raise ValueError("Result is not finite; check that time and vol are positive")
+    elif isinstance(raw, dict):
+        for v in raw.values():
+            check_finite(v)
+    elif isinstance(raw, list):
+        try:
+            # Flat numeric lists are checked in C
+            finite = all(map(math.isfinite, raw))
+        except TypeError:
+            for v in raw:
+                check_finite(v)
+        else:
+            if not finite:
+                raise ValueError("Result is not finite; check that time and vol are positive")
+    return raw
+
+
+def run_job(job_type, params):
+    """Compute the raw (float) result for one job."""
+    return check_finite(_compute(job_type, params))
+
+
+def _compute(job_type, params):
+    if job_type == "price":
+        return compute_price(params)
+    elif job_type == "price_batch":
+        return compute_price_batch(params)
+    elif job_type == "greeks":
+        return compute_greeks(params)
+    elif job_type == "hedge":
+        return compute_hedge(params)
+    elif job_type in PAYOFF_JOBS:
+        return compute_payoff(params, job_type)
+    elif job_type == "implied_vol":
+        return compute_implied_vol(params)
+    elif job_type == "scenario":
+        return compute_scenario(params)
+    else:
+        raise ValueError(f"Unknown job type: {job_type}")
+
+
+def _price_cost(params, sims):
+    """Rough per-contract cost of a price job, in elementary array operations."""
+    model = params["model"]
+    steps = params.get("steps", 5_000)
+    acceleration = params.get("acceleration")
+    if model in ("mc_call", "mc_put"):
+        return sims
+    if model in PATH_MODELS:
+        return sims * params.get("monitoring_steps", 252)
+    if model in ("lsm_amer_call", "lsm_amer_put"):
+        return (sims + params.get("regression_paths", 50_000)) * params.get("exercise_dates", 50)
+    if model in ("bin_amer_call", "bin_amer_put") or (
+            model in ("bin_eur_call", "bin_eur_put") and acceleration is not None):
+        # Richardson extrapolation also builds a 2n-step tree
+        return steps * steps // 2 * (5 if acceleration in ("richardson", "bbsr") else 1)
+    if model in ("bin_eur_call", "bin_eur_put"):
+        return steps
+    if model in ("tri_amer_call", "tri_amer_put", "tri_eur_call", "tri_eur_put"):
+        return steps * steps
+    if model in ("pde_amer_call", "pde_amer_put", "pde_eur_call", "pde_eur_put"):
+        # A few tridiagonal solves per step for the early-exercise policy iteration
+        solves = 3 if model.startswith("pde_amer") else 1
+        return solves * params.get("space_steps", 200) * params.get("time_steps", 200)
+    if model == "cve_amer_call":
+        return steps * steps // 2 + steps
+    return 1
+
+
+def _length(value):
+    return len(value) if isinstance(value, (list, tuple)) else 1
+
+
+def estimate_cost(job_type, params):
+    """
+    Rough cost of a job in elementary array operations.
+
+    Only the relative size matters: it is compared against the API's
+    synchronous budget to decide whether a job runs inline or goes to SQS.
+    """
+    if job_type == "price":
+        sims = params.get("sims", 100_000)
+        if params.get("target_std_error") is not None or params.get("time_budget") is not None:
+            sims = params.get("max_sims", DEFAULT_MAX_SIMS)
+        return _price_cost(params, sims)
+    if job_type == "price_batch":
+        contracts = max(
+            _length(params.get(f))
+            for f in ("spot", "strike", "rate", "vol", "time", "q", "option_type")
+        )
+        return contracts * _price_cost(params, params.get("sims", 100_000))
+    if job_type in PAYOFF_JOBS:
+        return _length(params.get("prices"))
+    if job_type == "scenario":
+        return len(params["legs"]) * len(params["spots"]) * len(params["vols"]) * len(params["times"])
+    if job_type == "implied_vol":
+        # A handful of vectorized Newton passes per quote
+        quotes = max(_length(params.get(f)) for f in ("price", "spot", "strike", "rate", "time", "q", "option_type"))
+        return 10 * quotes
+    if job_type == "greeks" and params.get("model", "bs") != "bs":
+        cost = _price_cost(params, params.get("sims", 100_000))
+        # Lattice vega and rho each take one more solve
+        return 3 * cost if params["model"].startswith("bin_") else cost
+    return 1
+
+
+def _vectorizable(job_type, model):
+    if job_type == "greeks":
+        return model in (None, "bs")
+    return job_type == "price" and model in ("bs", "bsm_eur_call", "bsm_eur_put")
+
+
+def _run_vectorized(job_type, params_list):
+    """Evaluate a group of closed-form price or greeks jobs with one kernel call."""
+    import numpy as np
+    from bsm import bsm_price, bsm_greeks, is_call_array
+    def column(name, default=None):
+        if default is None:
+            return np.array([p[name] for p in params_list], dtype=float)
+        return np.array([p.get(name, default) for p in params_list], dtype=float)
+
+    S, K, r, sigma, T = (column(f) for f in ("spot", "strike", "rate", "vol", "time"))
+    q = column("q", 0.0)
+    is_call = is_call_array([p.get("option_type", "call") for p in params_list])
+
+    if job_type == "price":
+        return bsm_price(S, K, r, sigma, T, is_call, q).tolist()
+
+    greeks = bsm_greeks(S=S, K=K, r=r, vol=sigma, T=T, is_call=is_call, q=q)
+    names = ("delta", "gamma", "vega", "theta", "rho")
+    cols = [greeks[n].tolist() for n in names]
+    return [dict(zip(names, row)) for row in zip(*cols)]
+
+
+def load_engines():
+    """Import every pricing engine now rather than on the first job that needs it."""
+    for name in ENGINE_MODULES:
+        importlib.import_module(name)
+
+
+def _finite_or_error(raw):
+    try:
+        return check_finite(raw)
+    except ValueError as e:
+        return e
+
+
+def run_job_group(job_type, params_list, timings=None):
+    """
+    Run several jobs of the same type (and model) together.
+
+    Closed-form price and greeks groups are evaluated in a single vectorized
+    pass; everything else runs job by job. Returns one entry per job, either
+    the raw result or the exception that job raised, so a bad message does
+    not fail its neighbours.
+
+    timings: optional list, extended with each job's compute seconds; jobs
+        sharing a vectorized pass split its time evenly
+    """
+    timings = [] if timings is None else timings
+    model = params_list[0].get("model") if params_list else None
+    if len(params_list) > 1 and _vectorizable(job_type, model):
+        start = time.perf_counter()
+        try:
+            outcomes = _run_vectorized(job_type, params_list)
+            timings.extend([(time.perf_counter() - start) / len(params_list)] * len(params_list))
+            return [_finite_or_error(raw) for raw in outcomes]
+        except (KeyError, TypeError, *INPUT_ERRORS):
+            # Fall through so the offending job is isolated below
+            pass
+
+    outcomes = []
+    for params in params_list:
+        start = time.perf_counter()
+        try:
+            outcomes.append(run_job(job_type, params))
+        except Exception as e:
+            outcomes.append(e)
+        timings.append(time.perf_counter() - start)
+    return outcomes
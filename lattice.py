@@ -0,0 +1,299 @@
+import math
+
+import numpy as np
+from scipy.special import gammaln
+
+from bsm import bsm_price
+
+LATTICE_ACCELERATIONS = ("bbs", "richardson", "bbsr")
+
+
+def _check_tree_inputs(T, sigma, n):
+    # A zero-width tree has u == d, which every step divides by
+    if n < 1:
+        raise ValueError("n must be at least 1")
+    if not T > 0:
+        raise ValueError("T must be positive")
+    if not sigma > 0:
+        raise ValueError("sigma must be positive")
+
+
+def _crr_step(T, r, sigma, n, q):
+    """dt, sigma sqrt(dt), u, d and the risk-neutral up probability of a CRR tree."""
+    dt = T / n
+    sig_dt = sigma * math.sqrt(dt)
+    u = math.exp(sig_dt)
+    d = 1 / u
+    p = (math.exp((r - q) * dt) - d) / (u - d)
+    if not 0 < p < 1:
+        raise ValueError("Risk-neutral probability outside (0, 1); increase n")
+    return dt, sig_dt, u, d, p
+
+
+def binomial_lattice(S, K, T, r, sigma, n, option_type="call", american=False, q=0.0, acceleration=None):
+    """
+    Prices a vanilla option on a Cox-Ross-Rubinstein binomial tree.
+
+    American options use backward induction as NumPy slice operations over
+    two reused buffers of length n + 1, so memory is O(n) and there is no
+    per-node Python work. The discounted up/down probabilities are computed
+    once, and node prices for each level are obtained by scaling the level
+    below by d. European options skip the induction and are priced by
+    `binomial_european`.
+
+    The plain CRR price oscillates as n changes, because the strike falls
+    at a different place between terminal nodes each time. `acceleration`
+    removes most of that error:
+
+    - ``'bbs'`` (Broadie-Detemple): replace the last step with the
+      Black-Scholes value over one dt, which smooths the kink in the payoff.
+    - ``'richardson'``: two-point extrapolation 2 V(2n) - V(n).
+    - ``'bbsr'``: Richardson extrapolation of two BBS trees.
+
+    S (float): Current stock price
+    K (float): Strike price
+    T (float): Time to expiration (in years)
+    r (float): Risk-free interest rate
+    sigma (float): Volatility of the underlying asset
+    n (int): Number of time steps
+    option_type (str): 'call' or 'put'
+    american (bool): Allow early exercise at every node
+    q (float): Continuous dividend yield
+    acceleration (str): None, or one of LATTICE_ACCELERATIONS
+
+    Returns:
+        float: The price of the option
+    """
+    _check_tree_inputs(T, sigma, n)
+    if option_type not in ("call", "put"):
+        raise ValueError(f"Unknown option_type: {option_type}")
+    if acceleration is not None and acceleration not in LATTICE_ACCELERATIONS:
+        raise ValueError(f"Unknown lattice acceleration: {acceleration}")
+
+    if acceleration in ("richardson", "bbsr"):
+        base = "bbs" if acceleration == "bbsr" else None
+        coarse = binomial_lattice(S, K, T, r, sigma, n, option_type, american, q, base)
+        fine = binomial_lattice(S, K, T, r, sigma, 2 * n, option_type, american, q, base)
+        return 2 * fine - coarse
+
+    if not american and acceleration is None:
+        return binomial_european(S, K, T, r, sigma, n, option_type=option_type, q=q)
+
+    return float(_crr_levels(S, K, T, r, sigma, n, option_type, american, q, acceleration == "bbs")[0][0])
+
+
+def _crr_levels(S, K, T, r, sigma, n, option_type, american, q, smooth, keep=0):
+    """
+    Backward induction on the CRR tree, returning option values on levels 0 .. keep.
+
+    smooth: value the last step with Black-Scholes (BBS) instead of the payoff
+    """
+    dt, sig_dt, u, d, p = _crr_step(T, r, sigma, n, q)
+    disc = math.exp(-r * dt)
+    pu = disc * p
+    pd = disc * (1 - p)
+
+    # Induction starts from the terminal level, or from one level earlier
+    # with BBS, where the last step is valued in closed form.
+    top = n - 1 if smooth else n
+    # Node prices on the top level, highest first: S * u**(top - 2i)
+    prices = S * np.exp(sig_dt * (top - 2 * np.arange(top + 1, dtype=float)))
+    scratch = np.empty(top + 1)
+
+    if option_type == "call":
+        values = np.maximum(prices - K, 0.0)
+    else:
+        values = np.maximum(K - prices, 0.0)
+    if smooth:
+        continuation = bsm_price(prices, K, r, sigma, dt, option_type == "call", q)
+        values = np.maximum(values, continuation) if american else continuation
+
+    levels = [None] * (keep + 1)
+    if top <= keep:
+        levels[top] = values[:top + 1].copy()
+    for j in range(top, 0, -1):
+        # values[:j] <- discounted expectation of the level above
+        np.multiply(values[1:j + 1], pd, out=scratch[:j])
+        np.multiply(values[:j], pu, out=values[:j])
+        np.add(values[:j], scratch[:j], out=values[:j])
+
+        if american:
+            # Level j-1 prices are level j prices scaled down by d
+            np.multiply(prices[:j], d, out=prices[:j])
+            if option_type == "call":
+                np.subtract(prices[:j], K, out=scratch[:j])
+            else:
+                np.subtract(K, prices[:j], out=scratch[:j])
+            np.maximum(values[:j], scratch[:j], out=values[:j])
+        if j - 1 <= keep:
+            levels[j - 1] = values[:j].copy()
+
+    return levels
+
+
+def binomial_greeks(S, K, T, r, sigma, n, option_type="call", american=False, q=0.0,
+                    acceleration=None, bump_vega_rho=True):
+    """
+    Price, delta, gamma and theta from a single CRR backward induction.
+
+    The induction already computes the option on levels 1 and 2 of the
+    tree, whose nodes straddle the spot (S u, S d and S u^2, S, S d^2).
+    Delta and gamma are finite differences across those nodes. Theta
+    compares the middle node of level 2, which has the same spot two steps
+    later, with the root. So these Greeks cost the same as one price.
+
+    Vega and rho have no tree-node equivalent. With `bump_vega_rho` they are
+    forward differences from one extra solve each, with sigma or r bumped
+    and n kept the same.
+
+    Arguments are as for `binomial_lattice`. With 'richardson'/'bbsr'
+    acceleration every Greek is extrapolated like the price.
+
+    Returns:
+        dict: price, delta, gamma, theta (per year), and vega and rho (per
+        unit change) when bump_vega_rho is set
+    """
+    if acceleration is not None and acceleration not in LATTICE_ACCELERATIONS:
+        raise ValueError(f"Unknown lattice acceleration: {acceleration}")
+    if option_type not in ("call", "put"):
+        raise ValueError(f"Unknown option_type: {option_type}")
+    _check_tree_inputs(T, sigma, n)
+    smooth = acceleration in ("bbs", "bbsr")
+    if n < (3 if smooth else 2):
+        raise ValueError("n must leave at least two tree levels for the Greeks")
+
+    if acceleration in ("richardson", "bbsr"):
+        base = "bbs" if acceleration == "bbsr" else None
+        coarse = binomial_greeks(S, K, T, r, sigma, n, option_type, american, q, base, bump_vega_rho)
+        fine = binomial_greeks(S, K, T, r, sigma, 2 * n, option_type, american, q, base, bump_vega_rho)
+        return {k: 2 * fine[k] - coarse[k] for k in fine}
+
+    dt, _, u, d, _ = _crr_step(T, r, sigma, n, q)
+    f0, f1, f2 = _crr_levels(S, K, T, r, sigma, n, option_type, american, q, smooth, keep=2)
+
+    delta = (f1[0] - f1[1]) / (S * u - S * d)
+    gamma = ((f2[0] - f2[1]) / (S * u * u - S) - (f2[1] - f2[2]) / (S - S * d * d)) / (0.5 * (S * u * u - S * d * d))
+    greeks = {
+        "price": float(f0[0]),
+        "delta": float(delta),
+        "gamma": float(gamma),
+        "theta": float((f2[1] - f0[0]) / (2 * dt)),
+    }
+    if bump_vega_rho:
+        vol_bump = 1e-4 * max(sigma, 1e-2)
+        bumped_vol = _crr_levels(S, K, T, r, sigma + vol_bump, n, option_type, american, q, smooth)[0][0]
+        bumped_rate = _crr_levels(S, K, T, r + 1e-4, sigma, n, option_type, american, q, smooth)[0][0]
+        greeks["vega"] = float((bumped_vol - f0[0]) / vol_bump)
+        greeks["rho"] = float((bumped_rate - f0[0]) / 1e-4)
+    return greeks
+
+
+def binomial_european(S, K, T, r, sigma, n, option_type="call", q=0.0):
+    """
+    Prices a European option on the CRR tree in closed form.
+
+    The tree value equals the discounted sum of terminal payoffs weighted by
+    their binomial probabilities, so no backward induction is needed. The
+    probabilities are formed in log space (log-gamma binomial coefficients),
+    which keeps them finite for n in the millions, and only in-the-money
+    terminal nodes are summed. Cost and memory are O(n).
+
+    S (float): Current stock price
+    K (float): Strike price
+    T (float): Time to expiration (in years)
+    r (float): Risk-free interest rate
+    sigma (float): Volatility of the underlying asset
+    n (int): Number of time steps
+    option_type (str): 'call' or 'put'
+    q (float): Continuous dividend yield
+
+    Returns:
+        float: The price of the European option
+    """
+    _check_tree_inputs(T, sigma, n)
+    if option_type not in ("call", "put"):
+        raise ValueError(f"Unknown option_type: {option_type}")
+
+    dt, sig_dt, u, d, p = _crr_step(T, r, sigma, n, q)
+
+    # Number of up-moves k gives S_T = S * u**(2k - n); find the first
+    # in-the-money k so out-of-the-money nodes are never touched.
+    if K <= 0:
+        k_star = 0
+    else:
+        k_star = (math.log(K / S) / sig_dt + n) / 2
+    if option_type == "call":
+        k = np.arange(max(0, math.floor(k_star)), n + 1, dtype=float)
+    else:
+        k = np.arange(0, min(n, math.ceil(k_star)) + 1, dtype=float)
+    if k.size == 0:
+        return 0.0
+
+    log_pmf = (
+        gammaln(n + 1) - gammaln(k + 1) - gammaln(n - k + 1)
+        + k * math.log(p) + (n - k) * math.log1p(-p)
+    )
+    S_T = S * np.exp(sig_dt * (2 * k - n))
+    if option_type == "call":
+        pay = np.maximum(S_T - K, 0.0)
+    else:
+        pay = np.maximum(K - S_T, 0.0)
+
+    return float(math.exp(-r * T) * np.dot(np.exp(log_pmf), pay))
+
+
+def trinomial_lattice(S, K, T, r, sigma, n, option_type="call", american=False, q=0.0):
+    """
+    Prices a vanilla option on a Boyle trinomial tree.
+
+    Each node moves up by u = exp(sigma sqrt(2 dt)), stays, or moves down,
+    with probabilities that match the risk-neutral drift. Compared with CRR,
+    the middle branch gives a smoother price in n for the same step count.
+    Level j has 2j + 1 nodes, which are a slice of the terminal level's
+    prices, so only one value buffer is updated in place.
+
+    S (float): Current stock price
+    K (float): Strike price
+    T (float): Time to expiration (in years)
+    r (float): Risk-free interest rate
+    sigma (float): Volatility of the underlying asset
+    n (int): Number of time steps
+    option_type (str): 'call' or 'put'
+    american (bool): Allow early exercise at every node
+    q (float): Continuous dividend yield
+
+    Returns:
+        float: The price of the option
+    """
+    _check_tree_inputs(T, sigma, n)
+    if option_type not in ("call", "put"):
+        raise ValueError(f"Unknown option_type: {option_type}")
+
+    dt = T / n
+    half = sigma * math.sqrt(dt / 2)
+    growth = math.exp((r - q) * dt / 2)
+    pu = ((growth - math.exp(-half)) / (math.exp(half) - math.exp(-half))) ** 2
+    pd = ((math.exp(half) - growth) / (math.exp(half) - math.exp(-half))) ** 2
+    pm = 1 - pu - pd
+    if min(pu, pd, pm) < 0:
+        raise ValueError("Trinomial probabilities outside [0, 1]; increase n")
+    disc = math.exp(-r * dt)
+    pu, pm, pd = disc * pu, disc * pm, disc * pd
+
+    # Terminal prices, highest first: S * u**(n - k), k = 0 .. 2n. Node k of
+    # level j has price S * u**(j - k), i.e. terminal node k + n - j.
+    prices = S * np.exp(2 * half * (n - np.arange(2 * n + 1, dtype=float)))
+    if option_type == "call":
+        exercise = np.maximum(prices - K, 0.0)
+    else:
+        exercise = np.maximum(K - prices, 0.0)
+    values = exercise.copy()
+
+    for j in range(n, 0, -1):
+        # values[:2j-1] <- discounted expectation over the three children
+        m = 2 * j - 1
+        values[:m] = pu * values[:m] + pm * values[1:m + 1] + pd * values[2:m + 2]
+        if american:
+            np.maximum(values[:m], exercise[n - j + 1:n + j], out=values[:m])
+
+    return float(values[0])
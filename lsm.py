@@ -0,0 +1,261 @@
+"""
+Longstaff-Schwartz least-squares Monte Carlo for American options.
+
+Pricing runs in two passes:
+
+1. Regression. `regression_paths` paths are generated backwards in time
+   with a Brownian bridge: W(T) is drawn first, and each earlier date is
+   sampled conditional on the date after it. Only one time slice is held at
+   a time, so memory is O(regression_paths) for any number of exercise
+   dates. At each date the discounted continuation value of the in-the-money
+   paths is regressed on a small basis in one vectorized least-squares
+   solve. The basis includes the European BSM value of the remaining
+   option.
+2. Pricing. Fresh, independent paths are simulated forwards in chunks and
+   exercised with the fitted rule. The chunk machinery is the one the
+   European engine uses, including per-chunk seed streams, the process
+   pool and early stopping. Because the rule is fixed before these paths
+   are drawn, the estimate is an unbiased price of a feasible exercise
+   policy, i.e. a low-biased estimate of the American price.
+"""
+import math
+import time
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from bsm import bsm_price
+from monte_carlo import MCResult, _Moments, _payoffs, _resolve_workers, _run_chunked, check_variance_reduction
+
+# Techniques the LSM pricing pass supports
+LSM_VARIANCE_REDUCTION = ("antithetic", "control_variate")
+# Spawn key of the regression stream; pricing chunks use keys 0, 1, 2, ...
+_REGRESSION_STREAM = 2**32
+
+
+def _basis(S, K, r, sigma, tau, is_call, q):
+    """Regression basis at one date: 1, S/K, (S/K)^2 and the European value / K."""
+    m = S / K
+    return np.column_stack([
+        np.ones_like(m), m, m * m,
+        bsm_price(S, K, r, sigma, tau, is_call, q) / K if tau > 0 else np.zeros_like(m),
+    ])
+
+
+def lsm_regression(S0, sigma, r, q, T, K, exercise_dates, option_type="call",
+                   regression_paths=50_000, seed_seq=None):
+    """
+    Fit the exercise rule: continuation-value coefficients for each exercise date.
+
+    Returns
+    -------
+    numpy.ndarray
+        (exercise_dates - 1, 4) coefficients for dates 1 .. exercise_dates - 1
+        (expiry needs none). Rows are NaN where too few paths were in the
+        money to fit; the rule never exercises on those dates.
+    """
+    if seed_seq is None:
+        seed_seq = np.random.SeedSequence()
+    rng = np.random.default_rng(np.random.SeedSequence(seed_seq.entropy, spawn_key=(_REGRESSION_STREAM,)))
+    is_call = option_type == "call"
+    dt = T / exercise_dates
+    mu = r - q - 0.5 * sigma**2
+    disc_dt = math.exp(-r * dt)
+
+    W = math.sqrt(T) * rng.standard_normal(regression_paths)
+    value = _payoffs(S0 * np.exp(mu * T + sigma * W), K, option_type)
+    betas = np.full((exercise_dates - 1, 4), np.nan)
+
+    for k in range(exercise_dates - 1, 0, -1):
+        t, t_next = k * dt, (k + 1) * dt
+        # Bridge back from t_next: W(t) | W(t_next) ~ N(W(t_next) t / t_next, dt t / t_next)
+        W = W * (t / t_next) + math.sqrt(dt * t / t_next) * rng.standard_normal(regression_paths)
+        value *= disc_dt
+        S = S0 * np.exp(mu * t + sigma * W)
+        exercise = _payoffs(S, K, option_type)
+
+        itm = np.flatnonzero(exercise > 0)
+        if itm.size <= betas.shape[1]:
+            continue
+        X = _basis(S[itm], K, r, sigma, T - t, is_call, q)
+        beta = np.linalg.lstsq(X, value[itm], rcond=None)[0]
+        betas[k - 1] = beta
+        stop = exercise[itm] > X @ beta
+        value[itm[stop]] = exercise[itm[stop]]
+    return betas
+
+
+class _LSMSpec(NamedTuple):
+    """Contract, fitted exercise rule and settings shipped to pricing tasks."""
+    S0: float
+    sigma: float
+    r: float
+    q: float
+    T: float
+    K: float
+    option_type: str
+    exercise_dates: int
+    betas: np.ndarray
+    techniques: frozenset
+
+
+def _lsm_paths(spec, z_dates):
+    """
+    Exercise `n` forward paths with the fitted rule and return (payoffs, controls).
+
+    Payoffs are compounded from the exercise date to T so that, like the
+    European control, they share the single discount factor e^{-rT}.
+    """
+    is_call = spec.option_type == "call"
+    dt = spec.T / spec.exercise_dates
+    drift_dt = (spec.r - spec.q - 0.5 * spec.sigma**2) * dt
+    vol_dt = spec.sigma * math.sqrt(dt)
+
+    n = z_dates.shape[0]
+    log_s = np.full(n, math.log(spec.S0))
+    y = np.zeros(n)
+    alive = np.ones(n, dtype=bool)
+
+    for k in range(1, spec.exercise_dates):
+        log_s += drift_dt + vol_dt * z_dates[:, k - 1]
+        beta = spec.betas[k - 1]
+        if np.isnan(beta[0]):
+            continue
+        idx = np.flatnonzero(alive)
+        S = np.exp(log_s[idx])
+        exercise = _payoffs(S, spec.K, spec.option_type)
+        itm = exercise > 0
+        if not itm.any():
+            continue
+        idx, S, exercise = idx[itm], S[itm], exercise[itm]
+        cont = _basis(S, spec.K, spec.r, spec.sigma, spec.T - k * dt, is_call, spec.q) @ beta
+        stop = exercise > cont
+        y[idx[stop]] = exercise[stop] * math.exp(spec.r * (spec.T - k * dt))
+        alive[idx[stop]] = False
+
+    log_s += drift_dt + vol_dt * z_dates[:, -1]
+    x = _payoffs(np.exp(log_s), spec.K, spec.option_type)
+    y[alive] = x[alive]
+    return y, x
+
+
+def _lsm_chunks(entropy, chunks, spec):
+    """Moments for each (index, size) chunk of pricing paths; runs in worker processes."""
+    antithetic = "antithetic" in spec.techniques
+    results = []
+    for index, n in chunks:
+        rng = np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(index,)))
+        z = rng.standard_normal((n, spec.exercise_dates))
+        if antithetic:
+            z = np.concatenate([z, -z])
+        y, x = _lsm_paths(spec, z)
+        if antithetic:
+            y = 0.5 * (y[:n] + y[n:])
+            x = 0.5 * (x[:n] + x[n:])
+        m = _Moments()
+        m.add(y, x if "control_variate" in spec.techniques else None)
+        results.append(m)
+    return results
+
+
+def lsm_american(
+    S0: float,
+    sigma: float,
+    r: float,
+    q: float,
+    T: float,
+    K: float,
+    simulations: int,
+    option_type: str = "put",
+    exercise_dates: int = 50,
+    regression_paths: int = 50_000,
+    seed: Optional[int] = None,
+    chunk_size: int = 16_384,
+    variance_reduction=(),
+    target_std_error: Optional[float] = None,
+    time_budget: Optional[float] = None,
+    workers: Optional[int] = 1,
+) -> MCResult:
+    """
+    Longstaff-Schwartz price of an American option under GBM.
+
+    Exercise is allowed on `exercise_dates` equally spaced dates (the last
+    one being expiry), so the result converges to the American price as the
+    number of dates grows, from below.
+
+    Parameters
+    ----------
+    S0, sigma, r, q, T, K, simulations, option_type, seed, workers
+        As for `monte_carlo.monte_carlo_engine`; `simulations` counts
+        pricing paths only.
+    exercise_dates : int
+        Number of exercise dates, including expiry.
+    regression_paths : int
+        Paths used to fit the exercise rule. They are independent of the
+        pricing paths.
+    chunk_size : int
+        Pricing paths simulated per NumPy batch; each chunk holds a
+        chunk_size x exercise_dates block of normals.
+    variance_reduction : iterable of str
+        Any of LSM_VARIANCE_REDUCTION. ``control_variate`` regresses the
+        American payoff against the European payoff on the same path, whose
+        BSM price is known exactly. The two are highly correlated, so this
+        removes most of the variance.
+    target_std_error, time_budget : float, optional
+        Early stopping for the pricing pass, as for `monte_carlo_engine`.
+
+    Returns
+    -------
+    MCResult
+        Discounted price estimate, its standard error and the pricing path
+        count. If immediate exercise is worth more than the estimate, the
+        intrinsic value is returned with zero error.
+    """
+    if simulations < 1:
+        raise ValueError("simulations must be at least 1")
+    if exercise_dates < 1:
+        raise ValueError("exercise_dates must be at least 1")
+    if regression_paths < 1:
+        raise ValueError("regression_paths must be at least 1")
+    if option_type not in ("call", "put"):
+        raise ValueError(f"Unknown option_type: {option_type}")
+    if target_std_error is not None and target_std_error <= 0:
+        raise ValueError("target_std_error must be positive")
+    if time_budget is not None and time_budget <= 0:
+        raise ValueError("time_budget must be positive")
+    techniques = check_variance_reduction(variance_reduction)
+    unsupported = techniques.difference(LSM_VARIANCE_REDUCTION)
+    if unsupported:
+        raise ValueError(f"Not supported by LSM pricing: {', '.join(sorted(unsupported))}")
+
+    paths_per_draw = 2 if "antithetic" in techniques else 1
+    workers = _resolve_workers(workers)
+    discount = math.exp(-r * T)
+    control_mean = None
+    if "control_variate" in techniques:
+        control_mean = float(bsm_price(S0, K, r, sigma, T, option_type == "call", q)) / discount
+    seed_seq = np.random.SeedSequence(seed)
+
+    betas = lsm_regression(S0, sigma, r, q, T, K, exercise_dates, option_type,
+                           regression_paths, seed_seq)
+    spec = _LSMSpec(S0, sigma, r, q, T, K, option_type, exercise_dates, betas, techniques)
+
+    adaptive = target_std_error is not None or time_budget is not None
+    deadline = time.perf_counter() + time_budget if time_budget is not None else None
+
+    def should_stop(std_error):
+        if target_std_error is not None and discount * std_error <= target_std_error:
+            return True
+        return deadline is not None and time.perf_counter() >= deadline
+
+    draws = math.ceil(simulations / paths_per_draw)
+    moments = _run_chunked(
+        _lsm_chunks, spec, draws, chunk_size, seed_seq, workers,
+        should_stop if adaptive else None, control_mean,
+    )
+    mean, std_error = moments.estimate(control_mean)
+    price = discount * mean
+    intrinsic = max(S0 - K, 0.0) if option_type == "call" else max(K - S0, 0.0)
+    if intrinsic > price:
+        return MCResult(price=intrinsic, std_error=0.0, paths=moments.n * paths_per_draw)
+    return MCResult(price=price, std_error=discount * std_error, paths=moments.n * paths_per_draw)
@@ -1,18 +1,19 @@
 import math
-from scipy.stats import norm
-import pandas as pd
 import numpy as np
-import statistics
 from random import gauss
-import pandas as pd
+from scipy.special import ndtr
+from lattice import binomial_lattice
+from bsm import bsm_price
+from monte_carlo import monte_carlo_engine
 
 class BSM:
-    def __init__(self, S0  = 50, K   = 51, r   = 0.05, vol = 0.45, T   = 0.5):
+    def __init__(self, S0  = 50, K   = 51, r   = 0.05, vol = 0.45, T   = 0.5, q = 0.0):
         self.S0  = S0
         self.K   = K
         self.r   = r
         self.vol = vol
         self.T   = T
+        self.q   = q
 
     def calculate_d1(self,):
         S0 = self.S0
@@ -20,9 +21,10 @@ class BSM:
         r = self.r
         vol = self.vol
         T = self.T
+        q = self.q
 
-        a = 1 / (vol * math.sqrt(T))
-        b = math.log(S0/K) + (r + (1/2)*vol**2)*T
+        a = 1 / (vol * np.sqrt(T))
+        b = np.log(S0/K) + (r - q + (1/2)*vol**2)*T
         d1 = a * b
         return d1
 
@@ -32,40 +34,23 @@ class BSM:
         r = self.r
         vol = self.vol
         T = self.T
+        q = self.q
 
-        a = 1 / (vol * math.sqrt(T))
-        b = math.log(S0/K) + (r - (1/2)*vol**2)*T
+        a = 1 / (vol * np.sqrt(T))
+        b = np.log(S0/K) + (r - q - (1/2)*vol**2)*T
         d1 = a * b
         return d1
 
     def cumulative_distribution(self,d):
-        result = norm.cdf(d)
+        result = ndtr(d)
         #print(f"Cumulative probability for d={d}: {result}")
         return result
 
     def european_call_option_price(self,):
-        S0 = self.S0
-        K = self.K
-        r = self.r
-        vol = self.vol
-        T = self.T
-
-        d1 = self.calculate_d1()
-        d2 = self.calculate_d2()
-        c = S0 * self.cumulative_distribution(d1) - (K * math.exp(-r*T))* self.cumulative_distribution(d2)
-        return c
+        return bsm_price(self.S0, self.K, self.r, self.vol, self.T, True, self.q)[()]
 
     def european_put_option_price(self,):
-        S0 = self.S0
-        K = self.K
-        r = self.r
-        vol = self.vol
-        T = self.T
-
-        d1 = self.calculate_d1()
-        d2 = self.calculate_d2()
-        p = (K*math.exp(-r*T) * self.cumulative_distribution(-d2)) - (S0 * self.cumulative_distribution(-d1))
-        return p
+        return bsm_price(self.S0, self.K, self.r, self.vol, self.T, False, self.q)[()]
 
 def binomial_tree_call(S, K, T, r, sigma, n):
     """
@@ -81,20 +66,7 @@ def binomial_tree_call(S, K, T, r, sigma, n):
     Returns:
         The price of the European call option
     """
-    dt = T / n
-    u = math.exp(sigma * math.sqrt(dt))
-    d = 1 / u
-    p = (math.exp(r * dt) - d) / (u - d)
-
-    # Initialize option values at expiration
-    option_values = [max(0, S * (u ** (n - i)) * (d ** i) - K) for i in range(n + 1)]
-
-    # Backward induction to calculate option values at earlier nodes
-    for step in range(n - 1, -1, -1):
-        for i in range(step + 1):
-            option_values[i] = math.exp(-r * dt) * (p * option_values[i] + (1 - p) * option_values[i + 1])
-
-    return option_values[0]
+    return binomial_lattice(S, K, T, r, sigma, n, option_type='call', american=False)
 
 def binomial_tree_european_put(S, K, T, r, sigma, n):
     """
@@ -110,23 +82,9 @@ def binomial_tree_european_put(S, K, T, r, sigma, n):
     Returns:
         The price of the European put option
     """
+    return binomial_lattice(S, K, T, r, sigma, n, option_type='put', american=False)
 
-    dt = T / n
-    u = math.exp(sigma * math.sqrt(dt))
-    d = 1 / u
-    p = (math.exp(r * dt) - d) / (u - d)
-
-    # Initialize option values at expiration
-    option_values = [max(0, K - S * (u ** (n - i)) * (d ** i)) for i in range(n + 1)]
-
-    # Backward recursion to calculate option values at earlier nodes
-    for j in range(n - 1, -1, -1):
-        for i in range(j + 1):
-            option_values[i] = math.exp(-r * dt) * (p * option_values[i] + (1 - p) * option_values[i + 1])
-
-    return option_values[0]
-
-def binomial_tree_american_option(S, K, T, r, sigma, n, option_type='put'):
+def binomial_tree_american_option(S, K, T, r, sigma, n, option_type='put', acceleration=None):
     """
     Prices an American option using the binomial tree method.
 
@@ -137,46 +95,21 @@ def binomial_tree_american_option(S, K, T, r, sigma, n, option_type='put'):
     sigma (float): Volatility of the underlying asset
     n (int): Number of time steps
     option_type (str): 'put' or 'call'
+    acceleration (str): None, 'bbs', 'richardson' or 'bbsr' (see `binomial_lattice`)
 
     Returns:
         float: The price of the American option
     """
-    dt = T / n
-    u = math.exp(sigma * math.sqrt(dt))
-    d = 1 / u
-    p = (math.exp(r * dt) - d) / (u - d)
-
-    # Initialize option values at expiration
-    option_values = []
-    for i in range(n + 1):
-        ST = S * (u ** (n - i)) * (d ** i)
-        if option_type == 'call':
-            option_values.append(max(0, ST - K))
-        else:  # put
-            option_values.append(max(0, K - ST))
-
-    # Backward induction
-    for j in range(n - 1, -1, -1):
-        for i in range(j + 1):
-            ST = S * (u ** (j - i)) * (d ** i)
-            continuation_value = math.exp(-r * dt) * (
-                p * option_values[i] + (1 - p) * option_values[i + 1]
-            )
-            if option_type == 'call':
-                exercise_value = max(0, ST - K)
-            else:
-                exercise_value = max(0, K - ST)
-            option_values[i] = max(continuation_value, exercise_value)
-
-    return option_values[0]
+    return binomial_lattice(S, K, T, r, sigma, n, option_type=option_type, american=True,
+                            acceleration=acceleration)
 
 def calculate_d1(S0, K, r, vol, T):
-    a = 1 / (vol * math.sqrt(T))
-    b = math.log(S0/K) + (r + (1/2)*vol**2)*T
+    a = 1 / (vol * np.sqrt(T))
+    b = np.log(S0/K) + (r + (1/2)*vol**2)*T
     d1 = a * b
     return d1
 def cumulative_distribution(d):
-    result = norm.cdf(d)
+    result = ndtr(d)
     #print(f"Cumulative probability for d={d}: {result}")
     return result
 def delta(S0, K, r, vol, T):
@@ -185,18 +118,18 @@ def delta(S0, K, r, vol, T):
     #print(f"DELTA = : {cumul_dist}")
     return cumul_dist
 def probability_density(x):
-    N = (1/ math.sqrt(2 * math.pi)) * math.exp((-x**2)/2)
+    N = (1/ math.sqrt(2 * math.pi)) * np.exp((-x**2)/2)
     return N
 def gamma(S0, K, r, vol, T):
     d1 = calculate_d1(S0, K, r, vol, T)
     N  = probability_density(d1)
-    gamma = N / (S0*vol*math.sqrt(T))
+    gamma = N / (S0*vol*np.sqrt(T))
     #print(f"GAMMA = : {gamma}")
     return gamma
 def vega(S0, K, r, vol, T):
     d1 = calculate_d1(S0, K, r, vol, T)
     N  = probability_density(d1)
-    vega = S0 * math.sqrt(T) * N
+    vega = S0 * np.sqrt(T) * N
     #print(f"VEGA = : {vega}")
     return vega
 
@@ -231,21 +164,20 @@ def monte_carlo_simulation(S0, v, r, q ,T ,K ,simulations, is_call = True):
         put_price = call_price + K * math.exp(-r * T) - S0 * math.exp(-q * T)
         return put_price
 
-def estimate_statistical_error(S0, v, r, q ,T ,K ,simulations, is_call, num_runs):
+def estimate_statistical_error(S0, v, r, q ,T ,K ,simulations, is_call, num_runs, variance_reduction=()):
     """
     Estimates the statistical error of a Monte Carlo simulation.
-    """
-    results = []
-    for _ in range(num_runs):
-        result = monte_carlo_simulation(S0, v, r, q ,T ,K ,simulations, is_call)
-        results.append(result)
 
-    results = np.array(results)
-    mean_result = np.mean(results)
-    std_dev_result = np.std(results)
-    standard_error = std_dev_result / np.sqrt(num_runs)
-
-    return mean_result, standard_error
+    Equivalent to averaging `num_runs` independent runs of `simulations`
+    paths, but done as a single pass of the batched engine, whose standard
+    error comes from the path sample itself rather than from re-running.
+    """
+    result = monte_carlo_engine(
+        S0, v, r, q, T, K, simulations * num_runs,
+        option_type='call' if is_call else 'put',
+        variance_reduction=variance_reduction
+    )
+    return result.price, result.std_error
 
 
 def protective_put_pl(S, S0, K_put, premium_put):
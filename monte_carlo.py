@@ -1,4 +1,14 @@
-import math, random
+import math, os, random, time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from bsm import bsm_price
+
+# Paths drawn per NumPy batch; bounds memory at a few MB regardless of `simulations`.
+DEFAULT_CHUNK_SIZE = 65_536
 
 def generate_asset_price(S0, sigma, r, q, T):
     """
@@ -17,6 +27,366 @@ def payoff(S_T, K, option_type):
     else:
         return max(K - S_T, 0)
 
+class MCResult(NamedTuple):
+    """Monte Carlo estimate with its standard error and the number of paths used."""
+    price: float
+    std_error: float
+    paths: int
+
+
+def _payoffs(S_T, K, option_type):
+    """Vectorized counterpart of `payoff` over an array of terminal prices."""
+    if option_type == "call":
+        return np.maximum(S_T - K, 0.0)
+    else:
+        return np.maximum(K - S_T, 0.0)
+
+
+class _Moments:
+    """
+    Running sums for a sample y and an optional control x.
+
+    Only sums, sums of squares and the cross sum are kept, so chunks can be
+    accumulated (and partial results merged) without storing samples.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.sy = self.syy = 0.0
+        self.sx = self.sxx = self.sxy = 0.0
+
+    def add(self, y, x=None):
+        self.n += y.size
+        self.sy += float(y.sum())
+        self.syy += float(y @ y)
+        if x is not None:
+            self.sx += float(x.sum())
+            self.sxx += float(x @ x)
+            self.sxy += float(x @ y)
+
+    def merge(self, other):
+        """Fold another accumulator's sums into this one."""
+        self.n += other.n
+        self.sy += other.sy
+        self.syy += other.syy
+        self.sx += other.sx
+        self.sxx += other.sxx
+        self.sxy += other.sxy
+
+    def estimate(self, control_mean=None):
+        """Sample mean and its standard error, control-adjusted if control_mean is given."""
+        n = self.n
+        mean_y = self.sy / n
+        if n < 2:
+            return mean_y, 0.0
+        var_y = max(self.syy - n * mean_y**2, 0.0)
+        if control_mean is None:
+            return mean_y, math.sqrt(var_y / (n - 1) / n)
+
+        # Optimal coefficient beta = cov(x, y) / var(x); the estimator's
+        # variance is the residual variance of y after regressing on x.
+        mean_x = self.sx / n
+        var_x = self.sxx - n * mean_x**2
+        cov_xy = self.sxy - n * mean_x * mean_y
+        if var_x <= 0 or n < 3:
+            return mean_y, math.sqrt(var_y / (n - 1) / n)
+        beta = cov_xy / var_x
+        resid = max(var_y - beta * cov_xy, 0.0)
+        return mean_y - beta * (mean_x - control_mean), math.sqrt(resid / (n - 2) / n)
+
+
+VARIANCE_REDUCTION = ("antithetic", "control_variate", "moment_matching", "sobol")
+# Independent scramblings used to estimate the error of a Sobol' run
+SOBOL_REPLICATES = 16
+# Points per replicate in the first round of an adaptive Sobol' run
+SOBOL_MIN_POINTS = 256
+
+
+def check_variance_reduction(variance_reduction) -> frozenset:
+    """Validate a collection of technique names against VARIANCE_REDUCTION."""
+    techniques = frozenset(variance_reduction or ())
+    unknown = techniques.difference(VARIANCE_REDUCTION)
+    if unknown:
+        raise ValueError(f"Unknown variance reduction: {', '.join(sorted(unknown))}")
+    return techniques
+
+
+def _sobol_sampler(seed_seq, dim=1):
+    """Scrambled Sobol' generator seeded from seed_seq."""
+    from scipy.stats import qmc
+
+    return qmc.Sobol(d=dim, scramble=True, seed=np.random.default_rng(seed_seq))
+
+
+def _sobol_normals(sampler, count, chunk_size):
+    """
+    The next `count` points of a Sobol' sampler mapped to standard normals, in chunks.
+
+    `count` and `chunk_size` should be powers of two to keep the sequence's
+    balance properties. Yields arrays of shape (n,) for a 1-d sampler, else
+    (n, dim).
+    """
+    from scipy.special import ndtri
+
+    tiny = np.finfo(float).tiny
+    done = 0
+    while done < count:
+        n = min(chunk_size, count - done)
+        z = ndtri(np.clip(sampler.random(n), tiny, 1 - 1e-16))
+        yield z[:, 0] if sampler.d == 1 else z
+        done += n
+
+
+def _moment_match(z, antithetic):
+    """Rescale (and, unless antithetic pairs already cancel it, recentre) a chunk of normals."""
+    if z.size < 2:
+        return z
+    if not antithetic:
+        z = z - z.mean()
+    scale = math.sqrt(float(z @ z) / z.size)
+    return z / scale if scale > 0 else z
+
+
+def _accumulate(moments, z, S0, drift, diffusion, K, option_type, techniques):
+    """Simulate terminal prices for one chunk of normals and add them to moments."""
+    antithetic = "antithetic" in techniques
+    if "moment_matching" in techniques:
+        z = _moment_match(z, antithetic)
+
+    S_T = S0 * np.exp(drift + diffusion * z)
+    y = _payoffs(S_T, K, option_type)
+    x = S_T
+    if antithetic:
+        S_T_anti = S0 * np.exp(drift - diffusion * z)
+        y = 0.5 * (y + _payoffs(S_T_anti, K, option_type))
+        x = 0.5 * (S_T + S_T_anti)
+    moments.add(y, x if "control_variate" in techniques else None)
+
+
+def monte_carlo_engine(
+    S0: float,
+    sigma: float,
+    r: float,
+    q: float,
+    T: float,
+    K: float,
+    simulations: int,
+    option_type: str = "call",
+    seed: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    variance_reduction=(),
+    target_std_error: Optional[float] = None,
+    time_budget: Optional[float] = None,
+    workers: Optional[int] = 1,
+) -> MCResult:
+    """
+    Batched Monte Carlo pricing of a European option with dividend yield q.
+
+    Normals are drawn in chunks of `chunk_size` paths, each chunk from its own
+    child of ``SeedSequence(seed)``, and only running sums of the payoffs are
+    kept, so memory stays bounded for any path count. Chunks can be spread
+    over a process pool with `workers`.
+
+    Variance reduction techniques can be combined:
+
+    - ``antithetic``: each normal z is also used as -z and the two payoffs
+      averaged, so `simulations` paths need half as many draws.
+    - ``control_variate``: regression-adjusts the payoff against the terminal
+      price, whose risk-neutral mean ``S0 e^{(r-q)T}`` is known exactly. The
+      contract's own BSM price cannot serve as the control here, since for a
+      vanilla payoff it is already the exact answer.
+    - ``moment_matching``: rescales each chunk of normals to sample mean 0 and
+      variance 1. The reported error treats the adjusted draws as
+      independent, which is a close approximation for large chunks.
+    - ``sobol``: scrambled Sobol' quasi-random points instead of pseudo-random
+      normals. The error is estimated from `SOBOL_REPLICATES` independent
+      scramblings, and each replicate is rounded up to a power of two paths.
+      For a terminal-only simulation the single Sobol' coordinate drives
+      W(T) directly, which is what Brownian-bridge ordering puts first.
+
+    Parameters
+    ----------
+    S0, sigma, r, q, T, K, simulations, option_type
+        As for `monte_carlo_option_price`.
+    seed : int, optional
+        Seed for reproducible results; ``None`` draws fresh OS entropy.
+    chunk_size : int
+        Number of paths simulated per NumPy batch.
+    variance_reduction : iterable of str
+        Any of VARIANCE_REDUCTION.
+    target_std_error : float, optional
+        Stop as soon as the running standard error of the discounted price
+        is at or below this value. `simulations` becomes the path cap.
+    time_budget : float, optional
+        Stop after the first chunk that ends past this many seconds of
+        wall-clock time. `simulations` becomes the path cap.
+    workers : int, optional
+        Processes to spread chunks (or Sobol' replicates) across; ``None``
+        uses every core. Chunk i always draws from child i of
+        ``SeedSequence(seed)`` and partial sums are reduced in chunk order,
+        so a seeded result is bit-identical for any worker count. Adaptive
+        Sobol' runs always execute in-process.
+
+    Returns
+    -------
+    MCResult
+        Discounted price estimate, its standard error and the number of
+        paths actually simulated.
+    """
+    if simulations < 1:
+        raise ValueError("simulations must be at least 1")
+    if target_std_error is not None and target_std_error <= 0:
+        raise ValueError("target_std_error must be positive")
+    if time_budget is not None and time_budget <= 0:
+        raise ValueError("time_budget must be positive")
+    techniques = check_variance_reduction(variance_reduction)
+    antithetic = "antithetic" in techniques
+    paths_per_draw = 2 if antithetic else 1
+    control_mean = S0 * math.exp((r - q) * T) if "control_variate" in techniques else None
+    workers = _resolve_workers(workers)
+
+    drift = (r - q - 0.5 * sigma**2) * T
+    diffusion = sigma * math.sqrt(T)
+    discount = math.exp(-r * T)
+    seed_seq = np.random.SeedSequence(seed)
+    sim_args = (S0, drift, diffusion, K, option_type, techniques)
+    adaptive = target_std_error is not None or time_budget is not None
+    deadline = time.perf_counter() + time_budget if time_budget is not None else None
+
+    def should_stop(std_error):
+        if target_std_error is not None and discount * std_error <= target_std_error:
+            return True
+        return deadline is not None and time.perf_counter() >= deadline
+
+    if "sobol" in techniques:
+        max_per_rep = max(1, math.ceil(simulations / SOBOL_REPLICATES / paths_per_draw))
+        max_per_rep = 1 << (max_per_rep - 1).bit_length()
+        chunk = min(1 << (max(chunk_size, 1).bit_length() - 1), max_per_rep)
+        children = seed_seq.spawn(SOBOL_REPLICATES)
+
+        if not adaptive:
+            tasks = [(child, max_per_rep, chunk, sim_args) for child in children]
+            moments = _map_tasks(_sobol_replicate, tasks, workers)
+            per_rep = max_per_rep
+        else:
+            samplers = [_sobol_sampler(child) for child in children]
+            moments = [_Moments() for _ in samplers]
+
+            # Grow every replicate in lockstep, doubling the points each round
+            # so the running total stays a power of two.
+            per_rep = 0
+            while per_rep < max_per_rep:
+                grow = min(max(per_rep, SOBOL_MIN_POINTS), max_per_rep - per_rep)
+                for sampler, m in zip(samplers, moments):
+                    for z in _sobol_normals(sampler, grow, chunk):
+                        _accumulate(m, z, *sim_args)
+                per_rep += grow
+                estimates = np.array([m.estimate(control_mean)[0] for m in moments])
+                if should_stop(float(estimates.std(ddof=1)) / math.sqrt(SOBOL_REPLICATES)):
+                    break
+
+        estimates = np.array([m.estimate(control_mean)[0] for m in moments])
+        return MCResult(
+            price=discount * float(estimates.mean()),
+            std_error=discount * float(estimates.std(ddof=1)) / math.sqrt(SOBOL_REPLICATES),
+            paths=per_rep * SOBOL_REPLICATES * paths_per_draw,
+        )
+
+    draws = math.ceil(simulations / paths_per_draw)
+    moments = _run_chunked(
+        _pseudo_chunks, sim_args, draws, chunk_size, seed_seq, workers,
+        should_stop if adaptive else None, control_mean,
+    )
+
+    mean, std_error = moments.estimate(control_mean)
+    return MCResult(
+        price=discount * mean,
+        std_error=discount * std_error,
+        paths=moments.n * paths_per_draw,
+    )
+
+
+def _run_chunked(task, task_args, draws, chunk_size, seed_seq, workers, should_stop, control_mean):
+    """
+    Accumulate `draws` samples in chunks via task(entropy, [(index, size)], task_args).
+
+    With `should_stop` set, chunks are submitted a wave at a time and the run
+    ends at the first chunk whose running standard error satisfies it;
+    otherwise all chunks go out in one go. Partial sums are merged in chunk
+    order so the result doesn't depend on the worker count.
+    """
+    chunks = [(i, min(chunk_size, draws - start)) for i, start in enumerate(range(0, draws, chunk_size))]
+    wave = workers * 2 if should_stop else len(chunks)
+
+    moments = _Moments()
+    for first in range(0, len(chunks), wave):
+        tasks = [(seed_seq.entropy, [c], task_args) for c in chunks[first:first + wave]]
+        for (m,) in _map_tasks(task, tasks, workers):
+            moments.merge(m)
+            if should_stop and should_stop(moments.estimate(control_mean)[1]):
+                return moments
+    return moments
+
+
+def _pseudo_chunks(entropy, chunks, sim_args):
+    """
+    Moments for each (index, size) chunk, drawn from child `index` of SeedSequence(entropy).
+
+    Module-level so it can run in a worker process.
+    """
+    results = []
+    for index, n in chunks:
+        rng = np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(index,)))
+        m = _Moments()
+        _accumulate(m, rng.standard_normal(n), *sim_args)
+        results.append(m)
+    return results
+
+
+def _sobol_replicate(seed_seq, count, chunk_size, sim_args):
+    """Moments for one scrambled Sobol' replicate of `count` points."""
+    m = _Moments()
+    for z in _sobol_normals(_sobol_sampler(seed_seq), count, chunk_size):
+        _accumulate(m, z, *sim_args)
+    return m
+
+
+_POOL = None
+_POOL_WORKERS = 0
+
+
+def _resolve_workers(workers):
+    """Worker count for an engine call: None means every core."""
+    if workers is None:
+        return os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    return workers
+
+
+def _map_tasks(fn, tasks, workers):
+    """
+    Run fn(*task) for each task, in order, on up to `workers` processes.
+
+    Falls back to running in-process where process pools are unavailable
+    (e.g. AWS Lambda, which has no /dev/shm); results are identical either way.
+    """
+    global _POOL, _POOL_WORKERS
+    if workers > 1 and len(tasks) > 1:
+        try:
+            # Grow-only, so alternating worker counts don't rebuild the pool;
+            # a larger pool than asked for changes no result
+            if _POOL is None or _POOL_WORKERS < workers:
+                if _POOL is not None:
+                    _POOL.shutdown()
+                _POOL = ProcessPoolExecutor(max_workers=workers)
+                _POOL_WORKERS = workers
+            return list(_POOL.map(fn, *zip(*tasks)))
+        except (OSError, NotImplementedError, BrokenProcessPool):
+            _POOL = None
+    return [fn(*task) for task in tasks]
+
+
 def monte_carlo_option_price(
     S0: float,
     sigma: float,
@@ -25,7 +395,8 @@ def monte_carlo_option_price(
     T: float,
     K: float,
     simulations: int,
-    option_type: str = "call"
+    option_type: str = "call",
+    seed: Optional[int] = None,
 ) -> float:
     """
     Monte Carlo pricing of a European option with dividend yield q.
@@ -48,17 +419,487 @@ def monte_carlo_option_price(
         Number of Monte Carlo trials.
     option_type : {'call', 'put'}
         Option type.
+    seed : int, optional
+        Seed for reproducible results.
     
     Returns
     -------
     float
-        Monte Carlo estimate of option price.
+        Monte Carlo estimate of option price. Use `monte_carlo_engine`
+        when the standard error is needed as well.
+    """
+    return monte_carlo_engine(
+        S0, sigma, r, q, T, K, simulations,
+        option_type=option_type, seed=seed
+    ).price
+
+
+def monte_carlo_batch(
+    S0,
+    sigma,
+    r,
+    q,
+    T,
+    K,
+    simulations: int,
+    is_call=True,
+    seed: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+):
+    """
+    Monte Carlo pricing of many European options in one pass.
+
+    Contract parameters are broadcastable arrays. Every contract is driven by
+    the same normal draws (common random numbers), so each chunk simulates a
+    (paths, contracts) block whose size is capped at roughly `chunk_size`
+    elements.
+
+    Returns
+    -------
+    (numpy.ndarray, numpy.ndarray)
+        Prices and standard errors, flattened to one entry per contract.
+    """
+    if simulations < 1:
+        raise ValueError("simulations must be at least 1")
+
+    S0, sigma, r, q, T, K, is_call = (
+        a.ravel() for a in np.broadcast_arrays(
+            np.asarray(S0, dtype=float), np.asarray(sigma, dtype=float),
+            np.asarray(r, dtype=float), np.asarray(q, dtype=float),
+            np.asarray(T, dtype=float), np.asarray(K, dtype=float),
+            np.asarray(is_call, dtype=bool),
+        )
+    )
+    drift = (r - q - 0.5 * sigma**2) * T
+    diffusion = sigma * np.sqrt(T)
+    seed_seq = np.random.SeedSequence(seed)
+    rows = max(1, chunk_size // S0.size)
+
+    total = np.zeros(S0.size)
+    total_sq = np.zeros(S0.size)
+    done = 0
+    while done < simulations:
+        n = min(rows, simulations - done)
+        rng = np.random.default_rng(seed_seq.spawn(1)[0])
+        z = rng.standard_normal((n, 1))
+        S_T = S0 * np.exp(drift + diffusion * z)
+        pay = np.where(is_call, np.maximum(S_T - K, 0.0), np.maximum(K - S_T, 0.0))
+        total += pay.sum(axis=0)
+        total_sq += np.einsum("ij,ij->j", pay, pay)
+        done += n
+
+    discount = np.exp(-r * T)
+    mean = total / simulations
+    if simulations > 1:
+        var = np.maximum(total_sq - simulations * mean**2, 0.0) / (simulations - 1)
+    else:
+        var = np.zeros_like(mean)
+    return discount * mean, discount * np.sqrt(var / simulations)
+
+
+MC_GREEKS = ("price", "delta", "gamma", "vega", "theta", "rho")
+
+
+def _greek_samples(z, S0, sigma, r, q, T, K, option_type):
+    """
+    Per-path estimators of the discounted price and its Greeks.
+
+    Delta, vega, theta and rho are pathwise derivatives of the discounted
+    payoff along S_T = S0 exp((r - q - sigma^2/2) T + sigma sqrt(T) z).
+    The payoff's derivative is the in-the-money indicator. Gamma is the
+    pathwise-likelihood-ratio estimator: the pathwise delta weighted by the
+    score of S0, since the indicator's own derivative is zero almost
+    everywhere.
+    """
+    sqrt_t = math.sqrt(T)
+    discount = math.exp(-r * T)
+    phi = 1.0 if option_type == "call" else -1.0
+    S_T = S0 * np.exp((r - q - 0.5 * sigma**2) * T + sigma * sqrt_t * z)
+    pay = np.maximum(phi * (S_T - K), 0.0)
+    slope = discount * phi * (pay > 0) * S_T
+    return {
+        "price": discount * pay,
+        "delta": slope / S0,
+        "gamma": slope / S0**2 * (z / (sigma * sqrt_t) - 1.0),
+        "vega": slope * (sqrt_t * z - sigma * T),
+        "theta": r * discount * pay - slope * ((r - q - 0.5 * sigma**2) + 0.5 * sigma * z / sqrt_t),
+        "rho": slope * T - T * discount * pay,
+    }
+
+
+def _greek_chunks(entropy, chunks, args):
+    """Per-Greek moments for each (index, size) chunk; runs in worker processes."""
+    *contract, antithetic = args
+    results = []
+    for index, n in chunks:
+        rng = np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(index,)))
+        z = rng.standard_normal(n)
+        if antithetic:
+            z = np.concatenate([z, -z])
+        moments = {}
+        for name, y in _greek_samples(z, *contract).items():
+            if antithetic:
+                y = 0.5 * (y[:n] + y[n:])
+            moments[name] = _Moments()
+            moments[name].add(y)
+        results.append(moments)
+    return results
+
+
+def monte_carlo_greeks(
+    S0: float,
+    sigma: float,
+    r: float,
+    q: float,
+    T: float,
+    K: float,
+    simulations: int,
+    option_type: str = "call",
+    seed: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    variance_reduction=(),
+    workers: Optional[int] = 1,
+) -> dict:
+    """
+    Price and Greeks of a European option from a single Monte Carlo run.
+
+    Every path contributes to all of MC_GREEKS at once. Delta, vega, theta
+    and rho are pathwise estimators and gamma is pathwise-likelihood-ratio,
+    so there is no bump-and-reprice and no finite-difference bias. Chunks,
+    seeding and `workers` behave as in `monte_carlo_engine`; only
+    ``antithetic`` variance reduction is supported.
+
+    Returns
+    -------
+    dict
+        price, delta, gamma, vega (per unit vol), theta (per year) and rho
+        (per unit rate), plus ``std_errors`` with the standard error of each
+        and ``paths``.
+    """
+    if simulations < 1:
+        raise ValueError("simulations must be at least 1")
+    if option_type not in ("call", "put"):
+        raise ValueError(f"Unknown option_type: {option_type}")
+    techniques = check_variance_reduction(variance_reduction)
+    if techniques - {"antithetic"}:
+        raise ValueError("Monte Carlo Greeks support only antithetic variance reduction")
+    antithetic = "antithetic" in techniques
+    paths_per_draw = 2 if antithetic else 1
+    workers = _resolve_workers(workers)
+
+    draws = math.ceil(simulations / paths_per_draw)
+    seed_seq = np.random.SeedSequence(seed)
+    args = (S0, sigma, r, q, T, K, option_type, antithetic)
+    chunks = [(i, min(chunk_size, draws - start)) for i, start in enumerate(range(0, draws, chunk_size))]
+    tasks = [(seed_seq.entropy, [c], args) for c in chunks]
+
+    totals = {name: _Moments() for name in MC_GREEKS}
+    for (moments,) in _map_tasks(_greek_chunks, tasks, workers):
+        for name in MC_GREEKS:
+            totals[name].merge(moments[name])
+
+    result = {}
+    std_errors = {}
+    for name in MC_GREEKS:
+        result[name], std_errors[name] = totals[name].estimate()
+    result["std_errors"] = std_errors
+    result["paths"] = totals["price"].n * paths_per_draw
+    return result
+
+
+PATH_PAYOFFS = ("asian", "barrier", "lookback")
+BARRIER_TYPES = ("up_and_out", "up_and_in", "down_and_out", "down_and_in")
+# Time steps simulated per block; memory per chunk is chunk_size x this
+DEFAULT_BLOCK_STEPS = 16
+
+
+class _PathState:
+    """
+    Per-path running statistics: last log price, sum, min and max of the monitored prices.
+
+    The min and max start at S0, so the spot counts as monitored for
+    lookbacks and barriers; the sum covers the dates after it only.
+    """
+
+    def __init__(self, n, S0):
+        self.log_s = np.full(n, math.log(S0))
+        self.total = np.zeros(n)
+        self.low = np.full(n, float(S0))
+        self.high = np.full(n, float(S0))
+
+    def update(self, log_block):
+        """Fold in a (paths, steps) block of log prices at consecutive monitoring dates."""
+        prices = np.exp(log_block)
+        self.total += prices.sum(axis=1)
+        np.minimum(self.low, prices.min(axis=1), out=self.low)
+        np.maximum(self.high, prices.max(axis=1), out=self.high)
+        self.log_s = log_block[:, -1]
+
+
+def brownian_bridge(z, times):
+    """
+    Brownian motion at `times` built from normals in Brownian-bridge order.
+
+    Column 0 of z fixes W at the last time, column 1 the midpoint, then the
+    quarter points and so on. Quasi-random sequences put their best-spread
+    coordinates first, so this ordering puts them on the coarse features of
+    the path that drive most of the payoff variance.
+
+    z : (paths, m) standard normals
+    times : m increasing positive monitoring times
+
+    Returns
+    -------
+    numpy.ndarray
+        (paths, m) array of W(t_1) .. W(t_m).
+    """
+    times = np.asarray(times, dtype=float)
+    m = times.size
+    W = np.empty_like(z)
+    W[:, m - 1] = math.sqrt(times[-1]) * z[:, 0]
+
+    # Breadth-first bisection of index intervals; -1 stands for t = 0, W = 0
+    intervals = [(-1, m - 1)]
+    k = 1
+    while intervals:
+        left, right = intervals.pop(0)
+        mid = (left + right) // 2
+        if mid == left:
+            continue
+        t_l = times[left] if left >= 0 else 0.0
+        t_m, t_r = times[mid], times[right]
+        w_l = W[:, left] if left >= 0 else 0.0
+        W[:, mid] = (
+            ((t_r - t_m) * w_l + (t_m - t_l) * W[:, right]) / (t_r - t_l)
+            + math.sqrt((t_m - t_l) * (t_r - t_m) / (t_r - t_l)) * z[:, k]
+        )
+        k += 1
+        intervals.append((left, mid))
+        intervals.append((mid, right))
+    return W
+
+
+def _path_payoffs(state, K, option_type, payoff_type, steps, barrier, barrier_type):
+    S_T = np.exp(state.log_s)
+    if payoff_type == "asian":
+        # Arithmetic average over the monitoring dates
+        return _payoffs(state.total / steps, K, option_type)
+    if payoff_type == "lookback":
+        # Floating strike: buy at the low (call) or sell at the high (put)
+        return S_T - state.low if option_type == "call" else state.high - S_T
+    if payoff_type == "barrier":
+        if barrier_type.startswith("up"):
+            hit = state.high >= barrier
+        else:
+            hit = state.low <= barrier
+        alive = ~hit if barrier_type.endswith("out") else hit
+        return np.where(alive, _payoffs(S_T, K, option_type), 0.0)
+    raise ValueError(f"Unknown path payoff: {payoff_type}")
+
+
+class _PathSpec(NamedTuple):
+    """Contract and simulation settings shipped to path-simulation tasks."""
+    S0: float
+    drift_dt: float
+    sigma: float
+    dt: float
+    K: float
+    option_type: str
+    payoff_type: str
+    steps: int
+    barrier: Optional[float]
+    barrier_type: Optional[str]
+    techniques: frozenset
+    block_steps: int
+
+
+def _simulate_paths(spec, n, blocks=None, W=None):
+    """
+    Run `n` paths through all monitoring dates and return (payoffs, controls).
+
+    Either `blocks` yields (n, block) arrays of normals driving consecutive
+    blocks of increments, or `W` holds the whole (n, steps) Brownian path
+    (Sobol' with Brownian-bridge construction).
     """
+    antithetic = "antithetic" in spec.techniques
+    state = _PathState(2 * n if antithetic else n, spec.S0)
+
+    if W is not None:
+        if antithetic:
+            W = np.concatenate([W, -W])
+        times = spec.dt * np.arange(1, spec.steps + 1)
+        state.update(math.log(spec.S0) + (spec.drift_dt / spec.dt) * times + spec.sigma * W)
+    else:
+        vol_dt = spec.sigma * math.sqrt(spec.dt)
+        for z in blocks:
+            if "moment_matching" in spec.techniques and n > 1:
+                # Match each monitoring date's draws to mean 0, variance 1
+                if not antithetic:
+                    z = z - z.mean(axis=0)
+                z = z / np.sqrt((z * z).mean(axis=0))
+            if antithetic:
+                z = np.concatenate([z, -z])
+            increments = spec.drift_dt + vol_dt * z
+            state.update(state.log_s[:, None] + np.cumsum(increments, axis=1))
+
+    y = _path_payoffs(state, spec.K, spec.option_type, spec.payoff_type,
+                      spec.steps, spec.barrier, spec.barrier_type)
+    x = _payoffs(np.exp(state.log_s), spec.K, spec.option_type)
+    if antithetic:
+        y = 0.5 * (y[:n] + y[n:])
+        x = 0.5 * (x[:n] + x[n:])
+    return y, x
+
+
+def _path_chunks(entropy, chunks, spec):
+    """Moments for each (index, size) chunk of pseudo-random paths; runs in worker processes."""
+    control = "control_variate" in spec.techniques
+    results = []
+    for index, n in chunks:
+        rng = np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=(index,)))
+        blocks = (
+            rng.standard_normal((n, min(spec.block_steps, spec.steps - start)))
+            for start in range(0, spec.steps, spec.block_steps)
+        )
+        y, x = _simulate_paths(spec, n, blocks=blocks)
+        m = _Moments()
+        m.add(y, x if control else None)
+        results.append(m)
+    return results
+
+
+def _path_sobol_replicate(seed_seq, count, chunk_size, spec):
+    """Moments for one scrambled Sobol' replicate with Brownian-bridge path construction."""
+    control = "control_variate" in spec.techniques
+    times = spec.dt * np.arange(1, spec.steps + 1)
+    sampler = _sobol_sampler(seed_seq, dim=spec.steps)
+    m = _Moments()
+    for z in _sobol_normals(sampler, count, chunk_size):
+        z = z.reshape(len(z), spec.steps)
+        y, x = _simulate_paths(spec, len(z), W=brownian_bridge(z, times))
+        m.add(y, x if control else None)
+    return m
+
+
+def monte_carlo_path_engine(
+    S0: float,
+    sigma: float,
+    r: float,
+    q: float,
+    T: float,
+    K: float,
+    simulations: int,
+    steps: int = 252,
+    payoff_type: str = "asian",
+    option_type: str = "call",
+    barrier: Optional[float] = None,
+    barrier_type: Optional[str] = None,
+    seed: Optional[int] = None,
+    chunk_size: int = 16_384,
+    block_steps: int = DEFAULT_BLOCK_STEPS,
+    variance_reduction=(),
+    target_std_error: Optional[float] = None,
+    time_budget: Optional[float] = None,
+    workers: Optional[int] = 1,
+) -> MCResult:
+    """
+    Monte Carlo pricing of path-dependent options under GBM.
+
+    Paths are advanced through `steps` equally spaced monitoring dates in
+    blocks of `block_steps`. Each path keeps only running statistics (last
+    price, running sum, min and max), so the full paths x steps matrix is
+    never built and memory is O(chunk_size x block_steps) at any step count.
+
+    Parameters
+    ----------
+    S0, sigma, r, q, T, K, simulations, option_type, seed, workers
+        As for `monte_carlo_engine`.
+    steps : int
+        Number of monitoring dates (e.g. 252 for daily over a year).
+    payoff_type : {'asian', 'barrier', 'lookback'}
+        ``asian``: arithmetic-average price option struck at K, averaged
+        over the `steps` dates after today.
+        ``barrier``: vanilla payoff that is knocked in/out when the monitored
+        price crosses `barrier` (discrete monitoring). S0 is monitored too,
+        so a barrier already breached today counts as hit.
+        ``lookback``: floating-strike lookback over S0 and the monitoring
+        dates (K is only used by the control).
+    barrier : float, optional
+        Barrier level, required for ``barrier``.
+    barrier_type : str, optional
+        One of BARRIER_TYPES, required for ``barrier``.
+    chunk_size : int
+        Paths simulated per NumPy batch.
+    block_steps : int
+        Monitoring dates simulated per block.
+    variance_reduction : iterable of str
+        As for `monte_carlo_engine`. The control variate here is the vanilla
+        European payoff on the same path, whose closed-form BSM price is
+        known. ``sobol`` draws all `steps` coordinates at once and assembles
+        the path with `brownian_bridge`, so it holds a chunk_size x steps
+        block in memory.
+    target_std_error, time_budget : float, optional
+        Early stopping as for `monte_carlo_engine` (pseudo-random only).
+
+    Returns
+    -------
+    MCResult
+        Discounted price estimate, its standard error and the path count.
+    """
+    if simulations < 1:
+        raise ValueError("simulations must be at least 1")
+    if steps < 1:
+        raise ValueError("steps must be at least 1")
+    if payoff_type not in PATH_PAYOFFS:
+        raise ValueError(f"Unknown path payoff: {payoff_type}")
+    if payoff_type == "barrier" and (barrier is None or barrier_type not in BARRIER_TYPES):
+        raise ValueError(f"barrier payoffs need a barrier level and barrier_type in {BARRIER_TYPES}")
+    techniques = check_variance_reduction(variance_reduction)
+    adaptive = target_std_error is not None or time_budget is not None
+    if adaptive and "sobol" in techniques:
+        raise ValueError("target_std_error/time_budget are not supported with sobol path simulation")
+
+    antithetic = "antithetic" in techniques
+    paths_per_draw = 2 if antithetic else 1
+    workers = _resolve_workers(workers)
+    dt = T / steps
+    drift_dt = (r - q - 0.5 * sigma**2) * dt
     discount = math.exp(-r * T)
-    total_payoff = 0.0
+    control_mean = None
+    if "control_variate" in techniques:
+        control_mean = float(bsm_price(S0, K, r, sigma, T, option_type == "call", q)) / discount
+    seed_seq = np.random.SeedSequence(seed)
+
+    spec = _PathSpec(S0, drift_dt, sigma, dt, K, option_type, payoff_type, steps,
+                     barrier, barrier_type, techniques, block_steps)
+
+    if "sobol" in techniques:
+        per_rep = max(1, math.ceil(simulations / SOBOL_REPLICATES / paths_per_draw))
+        per_rep = 1 << (per_rep - 1).bit_length()
+        chunk = min(1 << (max(chunk_size, 1).bit_length() - 1), per_rep)
+        tasks = [(child, per_rep, chunk, spec) for child in seed_seq.spawn(SOBOL_REPLICATES)]
+        estimates = np.array([m.estimate(control_mean)[0] for m in _map_tasks(_path_sobol_replicate, tasks, workers)])
+        return MCResult(
+            price=discount * float(estimates.mean()),
+            std_error=discount * float(estimates.std(ddof=1)) / math.sqrt(SOBOL_REPLICATES),
+            paths=per_rep * SOBOL_REPLICATES * paths_per_draw,
+        )
+
+    deadline = time.perf_counter() + time_budget if time_budget is not None else None
 
-    for _ in range(simulations):
-        S_T = generate_asset_price(S0, sigma, r, q, T)
-        total_payoff += payoff(S_T, K, option_type)
+    def should_stop(std_error):
+        if target_std_error is not None and discount * std_error <= target_std_error:
+            return True
+        return deadline is not None and time.perf_counter() >= deadline
 
-    return discount * (total_payoff / simulations)
+    draws = math.ceil(simulations / paths_per_draw)
+    moments = _run_chunked(
+        _path_chunks, spec, draws, chunk_size, seed_seq, workers,
+        should_stop if adaptive else None, control_mean,
+    )
+    mean, std_error = moments.estimate(control_mean)
+    return MCResult(
+        price=discount * mean,
+        std_error=discount * std_error,
+        paths=moments.n * paths_per_draw,
+    )
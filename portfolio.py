@@ -0,0 +1,275 @@
+"""
+Columnar option book with incremental revaluation.
+
+Contract terms, the market inputs each position was last priced at, and the
+resulting price and Greeks are held in parallel NumPy arrays. On a market
+update only positions whose inputs changed are repriced, in a single
+vectorized `bsm_greeks` call. A spot-only move within a tolerance can
+instead be rolled forward with a delta/gamma Taylor expansion from the
+last exact valuation. Position Greeks follow `hedge_ratio`: per-contract
+Greek x contracts x contract size.
+"""
+import io
+import json
+import uuid
+
+import numpy as np
+
+from bsm import bsm_greeks, is_call_array
+from models import hedge_ratio
+
+GREEK_FIELDS = ("price", "delta", "gamma", "vega", "theta", "rho")
+MARKET_FIELDS = ("spot", "vol", "rate", "q")
+# Per-position columns, in the order they are serialized
+COLUMNS = ("code", "strike", "time", "is_call", "contracts", "contract_size", "price", "delta")
+
+
+class Portfolio:
+    """
+    A book of European options on one or more underlyings, priced with BSM.
+
+    Each position has an id, underlying name, strike, time to maturity,
+    option type, a signed number of contracts and a contract size. Market
+    data (spot, vol, rate, q) is set per underlying, optionally with a
+    per-position vol lookup such as `VolSurface.vol`.
+    """
+
+    def __init__(self, portfolio_id=None):
+        self.portfolio_id = portfolio_id or str(uuid.uuid4())
+        self.underlyings = []
+        # Latest market data per underlying: spot, vol, rate, q and vol_lookup
+        self.quotes = {}
+        self.ids = np.empty(0, dtype=object)
+        self.code = np.empty(0, dtype=int)
+        self.strike = np.empty(0)
+        self.time = np.empty(0)
+        self.is_call = np.empty(0, dtype=bool)
+        self.contracts = np.empty(0)
+        self.contract_size = np.empty(0)
+        # Current market inputs and the inputs of the last exact valuation
+        self.market = {f: np.empty(0) for f in MARKET_FIELDS}
+        self.base = {f: np.empty(0) for f in MARKET_FIELDS + ("time",)}
+        self.greeks = {f: np.empty(0) for f in GREEK_FIELDS}
+        # Price and delta at the current market (exact or Taylor-approximated)
+        self.price = np.empty(0)
+        self.delta = np.empty(0)
+
+    def __len__(self):
+        return self.ids.size
+
+    def _code(self, name):
+        if name not in self.underlyings:
+            self.underlyings.append(name)
+        return self.underlyings.index(name)
+
+    def add_positions(self, ids, underlying, strike, time, option_type="call",
+                      contracts=1.0, contract_size=100.0):
+        """
+        Append positions given as columns; scalars broadcast. Ids already in the
+        book are replaced.
+
+        New positions take the current market of their underlying, if any,
+        and are priced on the next `revalue`.
+        """
+        ids = np.asarray(ids, dtype=object).ravel()
+        if np.unique(ids).size != ids.size:
+            raise ValueError("Position ids must be unique")
+        self.remove_positions(ids)
+        n = ids.size
+        names = np.broadcast_to(np.asarray(underlying, dtype=object), (n,))
+        codes = np.array([self._code(str(u)) for u in names], dtype=int)
+
+        def column(value, dtype=float):
+            return np.broadcast_to(np.asarray(value, dtype=dtype), (n,)).copy()
+
+        self.ids = np.concatenate([self.ids, ids])
+        self.code = np.concatenate([self.code, codes])
+        self.strike = np.concatenate([self.strike, column(strike)])
+        self.time = np.concatenate([self.time, column(time)])
+        self.is_call = np.concatenate([self.is_call, column(is_call_array(option_type), bool)])
+        self.contracts = np.concatenate([self.contracts, column(contracts)])
+        self.contract_size = np.concatenate([self.contract_size, column(contract_size)])
+
+        for f in MARKET_FIELDS:
+            self.market[f] = np.concatenate([self.market[f], np.full(n, np.nan)])
+        for f in self.base:
+            self.base[f] = np.concatenate([self.base[f], np.full(n, np.nan)])
+        for f in GREEK_FIELDS:
+            self.greeks[f] = np.concatenate([self.greeks[f], np.full(n, np.nan)])
+        self.price = np.concatenate([self.price, np.full(n, np.nan)])
+        self.delta = np.concatenate([self.delta, np.full(n, np.nan)])
+
+        # New positions pick up the latest market of their underlying
+        new = np.zeros(len(self), dtype=bool)
+        new[-n:] = True
+        for name in set(names):
+            if name in self.quotes:
+                self._apply_market(name, new & (self.code == self.underlyings.index(name)))
+
+    def remove_positions(self, ids):
+        keep = ~np.isin(self.ids, np.asarray(ids, dtype=object))
+        if keep.all():
+            return
+        for name in ("ids", "code", "strike", "time", "is_call", "contracts",
+                     "contract_size", "price", "delta"):
+            setattr(self, name, getattr(self, name)[keep])
+        for table in (self.market, self.base, self.greeks):
+            for f in table:
+                table[f] = table[f][keep]
+
+    def update_market(self, underlying, spot=None, vol=None, rate=None, q=None, vol_lookup=None):
+        """
+        Set market inputs for every position on `underlying`.
+
+        vol_lookup: callable (strikes, times) -> vols giving a per-position
+            vol, e.g. `VolSurface.vol`; takes precedence over `vol`
+        """
+        quote = self.quotes.setdefault(underlying, {"q": 0.0})
+        for f, value in (("spot", spot), ("vol", vol), ("rate", rate), ("q", q)):
+            if value is not None:
+                quote[f] = float(value)
+        if vol_lookup is not None:
+            quote["vol_lookup"] = vol_lookup
+        elif vol is not None:
+            quote.pop("vol_lookup", None)
+        if underlying in self.underlyings:
+            self._apply_market(underlying, self.code == self.underlyings.index(underlying))
+
+    def _apply_market(self, underlying, mask):
+        quote = self.quotes[underlying]
+        for f in MARKET_FIELDS:
+            if f in quote:
+                self.market[f][mask] = quote[f]
+        if "vol_lookup" in quote and mask.any():
+            self.market["vol"][mask] = quote["vol_lookup"](self.strike[mask], self.time[mask])
+
+    def revalue(self, taylor_tolerance=0.0):
+        """
+        Bring prices and Greeks up to date with the current market.
+
+        Positions whose vol, rate, q or maturity changed, or that were never
+        priced, are repriced exactly. Positions whose only change is the spot
+        are Taylor-expanded from their last exact valuation when the relative
+        spot move is within `taylor_tolerance`, and repriced otherwise. Their
+        price and delta move, while gamma, vega, theta and rho stay at the
+        last exact values. Expanding from the last exact point, rather than
+        the last approximation, keeps errors from compounding.
+
+        Positions without full market data for their underlying are left
+        unpriced until it arrives.
+
+        Returns:
+            dict with counts of repriced, approximated, unchanged and
+            unpriced positions
+        """
+        missing = np.zeros(len(self), dtype=bool)
+        for f in MARKET_FIELDS:
+            missing |= np.isnan(self.market[f])
+
+        stale = np.isnan(self.greeks["price"]) | (self.time != self.base["time"])
+        for f in ("vol", "rate", "q"):
+            stale |= self.market[f] != self.base[f]
+        stale &= ~missing
+        ds = self.market["spot"] - self.base["spot"]
+        moved = ~missing & ~stale & (ds != 0)
+        taylor = moved & (np.abs(ds) <= taylor_tolerance * self.base["spot"])
+        exact = stale | (moved & ~taylor)
+
+        idx = np.flatnonzero(exact)
+        if idx.size:
+            fresh = bsm_greeks(
+                self.market["spot"][idx], self.strike[idx], self.market["rate"][idx],
+                self.market["vol"][idx], self.time[idx], self.is_call[idx], self.market["q"][idx],
+            )
+            for f in GREEK_FIELDS:
+                self.greeks[f][idx] = fresh[f]
+            for f in MARKET_FIELDS:
+                self.base[f][idx] = self.market[f][idx]
+            self.base["time"][idx] = self.time[idx]
+            self.price[idx] = fresh["price"]
+            self.delta[idx] = fresh["delta"]
+
+        idx = np.flatnonzero(taylor)
+        if idx.size:
+            d = ds[idx]
+            gamma = self.greeks["gamma"][idx]
+            self.price[idx] = self.greeks["price"][idx] + self.greeks["delta"][idx] * d + 0.5 * gamma * d * d
+            self.delta[idx] = self.greeks["delta"][idx] + gamma * d
+
+        # Unmoved positions go back to their exact values (undoing an earlier approximation)
+        idx = np.flatnonzero(~missing & ~exact & ~taylor)
+        self.price[idx] = self.greeks["price"][idx]
+        self.delta[idx] = self.greeks["delta"][idx]
+
+        return {
+            "repriced": int(exact.sum()),
+            "approximated": int(taylor.sum()),
+            "unchanged": int(len(self) - exact.sum() - taylor.sum() - missing.sum()),
+            "unpriced": int(missing.sum()),
+        }
+
+    def risk(self):
+        """
+        Aggregate position value and Greeks per underlying and in total.
+
+        Delta is the share-equivalent hedge (`hedge_ratio`); the other
+        Greeks are scaled the same way, by contracts x contract size.
+        Unpriced positions are counted but left out of the sums.
+        """
+        units = self.contracts * self.contract_size
+        priced = ~np.isnan(self.price)
+        columns = {
+            "value": self.price * units,
+            "delta": hedge_ratio(self.delta, self.contracts, self.contract_size),
+            "gamma": self.greeks["gamma"] * units,
+            "vega": self.greeks["vega"] * units,
+            "theta": self.greeks["theta"] * units,
+            "rho": self.greeks["rho"] * units,
+        }
+        columns = {f: np.where(priced, col, 0.0) for f, col in columns.items()}
+        n = len(self.underlyings)
+        sums = {f: np.bincount(self.code, weights=col, minlength=n) for f, col in columns.items()}
+        counts = np.bincount(self.code, minlength=n)
+        unpriced = np.bincount(self.code, weights=~priced, minlength=n)
+        by_underlying = {
+            name: {"positions": int(counts[i]), "unpriced": int(unpriced[i]),
+                   **{f: float(sums[f][i]) for f in columns}}
+            for i, name in enumerate(self.underlyings) if counts[i]
+        }
+        total = {"positions": len(self), "unpriced": int((~priced).sum()),
+                 **{f: float(col.sum()) for f, col in columns.items()}}
+        return {"portfolio_id": self.portfolio_id, "underlyings": by_underlying, "total": total}
+
+    def to_bytes(self):
+        """
+        The whole book as an .npz archive (no pickles). Vol lookups are
+        callables and are dropped; other quote keys are kept as given.
+        """
+        header = {
+            "portfolio_id": self.portfolio_id,
+            "underlyings": self.underlyings,
+            "quotes": {u: {k: v for k, v in quote.items() if k != "vol_lookup"}
+                       for u, quote in self.quotes.items()},
+        }
+        arrays = {name: getattr(self, name) for name in COLUMNS}
+        for prefix, table in (("market", self.market), ("base", self.base), ("greeks", self.greeks)):
+            arrays.update({f"{prefix}_{f}": col for f, col in table.items()})
+        out = io.BytesIO()
+        np.savez(out, header=np.array(json.dumps(header)), ids=self.ids.astype(str), **arrays)
+        return out.getvalue()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Inverse of `to_bytes`; quotes come back without vol lookups."""
+        with np.load(io.BytesIO(data), allow_pickle=False) as archive:
+            header = json.loads(str(archive["header"]))
+            book = cls(header["portfolio_id"])
+            book.underlyings = header["underlyings"]
+            book.quotes = header["quotes"]
+            book.ids = archive["ids"].astype(object)
+            for name in COLUMNS:
+                setattr(book, name, archive[name])
+            for prefix, table in (("market", book.market), ("base", book.base), ("greeks", book.greeks)):
+                for f in table:
+                    table[f] = archive[f"{prefix}_{f}"]
+        return book
@@ -0,0 +1,112 @@
+"""
+Content-addressed cache for job results.
+
+Requests are canonicalized (floats rounded to a fixed number of significant
+digits, ints kept exact, keys sorted) and hashed, so identical contracts map
+to the same key no matter how the client spelled them. The key doubles as the jobId in the
+results table, which lets the DynamoDB item act as the shared second level
+behind each process's in-memory LRU.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Lifetime of stored results; also written to the table's `expiresAt` TTL attribute
+RESULT_TTL_SECONDS = int(os.environ.get("RESULT_TTL_SECONDS", "86400"))
+CACHE_ENABLED = os.environ.get("RESULT_CACHE_ENABLED", "1") == "1"
+CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", "4096"))
+# Significant digits kept when canonicalizing floats
+KEY_DIGITS = 10
+# Execution settings that never change a result, so they stay out of the key
+IGNORED_FIELDS = ("workers",)
+# List fields whose order doesn't matter, sorted before hashing
+SET_FIELDS = ("variance_reduction",)
+
+
+def _normalize(obj):
+    if isinstance(obj, bool) or obj is None:
+        return obj
+    if isinstance(obj, float):
+        return format(obj, f".{KEY_DIGITS}g")
+    if isinstance(obj, int):
+        # Exact: seeds and counts past KEY_DIGITS digits must not collide.
+        # Below that this matches the float form, so 100 and 100.0 still agree
+        return str(obj)
+    if isinstance(obj, dict):
+        return {k: _normalize(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_normalize(v) for v in obj]
+    return obj
+
+
+def canonical_key(job_type: str, payload: dict) -> str:
+    """Stable hash of a job's type and normalized inputs."""
+    params = {k: v for k, v in payload.items() if k not in IGNORED_FIELDS}
+    for field in SET_FIELDS:
+        if isinstance(params.get(field), (list, tuple)):
+            params[field] = sorted(params[field])
+    body = json.dumps(
+        {"jobType": job_type, "params": _normalize(params)},
+        sort_keys=True, separators=(",", ":"),
+    )
+    return "c-" + hashlib.sha256(body.encode()).hexdigest()
+
+
+def expires_at(now=None) -> int:
+    """`expiresAt` value for a result stored now."""
+    return int(now if now is not None else time.time()) + RESULT_TTL_SECONDS
+
+
+class ResultCache:
+    """In-process LRU of finished results with TTL eviction and hit/miss counters."""
+
+    def __init__(self, maxsize: int = CACHE_SIZE):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        # The API serves requests from a threadpool
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+    def get(self, key: str, now=None):
+        """Return the cached result for key, or None if absent or expired."""
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is not None:
+                result, expiry = entry
+                if expiry > (now if now is not None else time.time()):
+                    self._items.move_to_end(key)
+                    self.hits += 1
+                    return result
+                del self._items[key]
+            return None
+
+    def put(self, key: str, result, expiry: int):
+        with self._lock:
+            self._items[key] = (result, expiry)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def record_store_hit(self):
+        """Count a hit served by the results table after an LRU miss."""
+        self.store_hits += 1
+
+    def record_miss(self):
+        self.misses += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.store_hits + self.misses
+        return {
+            "enabled": CACHE_ENABLED,
+            "size": len(self._items),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "store_hits": self.store_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.store_hits) / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,255 @@
+"""
+Packed storage for array results.
+
+Results used to reach DynamoDB as nested lists of Decimal, built by walking
+every element in Python and costing ~20 bytes per float. Numeric lists
+(flat or rectangular, with at least PACK_MIN_SIZE elements) are now stored
+as a map under PACKED holding the raw little-endian bytes (float64, or
+int64 for integer lists), its shape, and the codec: "raw", or "zlib" when
+RESULT_COMPRESSION=zlib. Everything else is stored as before.
+
+DynamoDB items are capped at 400 KB. When the packed arrays of one result
+add up to more than INLINE_BYTES, the largest ones are moved to a blob
+store and the map keeps the blob key instead of the bytes. RESULT_BLOB_URL
+picks the store: s3://bucket/prefix in AWS, or file:///path (or a bare
+path) for a directory on disk when running locally. Without one, results
+stay inline as before.
+
+Decoding needs neither NumPy nor a per-element walk: the bytes go through
+`array.array` and `tolist` in C, and only rows are sliced in Python.
+`iter_bytes` hands the bytes out in chunks for GET /result/{id}/array.
+"""
+import array
+import os
+import sys
+import zlib
+from decimal import Decimal
+
+from jobs import to_decimal
+
+PACKING_ENABLED = os.environ.get("RESULT_PACKING", "1") == "1"
+# Smaller lists cost less as Decimals than as a packed map
+PACK_MIN_SIZE = int(os.environ.get("RESULT_PACK_MIN_SIZE", "32"))
+COMPRESSION = os.environ.get("RESULT_COMPRESSION", "none")
+ZLIB_LEVEL = 1
+# Packed bytes kept in the item; the rest of it (Decimals, metrics) needs headroom under 400 KB
+INLINE_BYTES = int(os.environ.get("RESULT_INLINE_BYTES", "300000"))
+BLOB_URL = os.environ.get("RESULT_BLOB_URL", "")
+PACKED = "__packed__"
+STREAM_CHUNK_BYTES = 1 << 20
+# numpy dtype kind -> stored dtype, and stored dtype -> array typecode
+DTYPES = {"f": "<f8", "i": "<i8"}
+TYPECODES = {"<f8": "d", "<i8": "q"}
+
+_stores = {}
+
+
+class FileBlobStore:
+    """Blobs as files under a directory: the local stand-in for S3."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, key):
+        return os.path.join(self.root, *key.split("/"))
+
+    def put(self, key, data):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Readers never see a partly written blob
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def iter_chunks(self, key, chunk_size=STREAM_CHUNK_BYTES):
+        try:
+            f = open(self._path(key), "rb")
+        except FileNotFoundError:
+            raise KeyError(key)
+        with f:
+            while chunk := f.read(chunk_size):
+                yield chunk
+
+    def get(self, key):
+        return b"".join(self.iter_chunks(key))
+
+
+class S3BlobStore:
+    """Blobs as S3 objects under a prefix; expire them with a bucket lifecycle rule."""
+
+    def __init__(self, bucket, prefix=""):
+        import boto3
+        self.s3 = boto3.client("s3")
+        self.bucket = bucket
+        self.prefix = prefix
+
+    def put(self, key, data):
+        self.s3.put_object(Bucket=self.bucket, Key=self.prefix + key, Body=data)
+
+    def _body(self, key):
+        try:
+            return self.s3.get_object(Bucket=self.bucket, Key=self.prefix + key)["Body"]
+        except self.s3.exceptions.NoSuchKey:
+            raise KeyError(key)
+
+    def iter_chunks(self, key, chunk_size=STREAM_CHUNK_BYTES):
+        yield from self._body(key).iter_chunks(chunk_size)
+
+    def get(self, key):
+        return self._body(key).read()
+
+
+def blob_store(url=None):
+    """Store for RESULT_BLOB_URL (or url), built once; None if not configured."""
+    url = BLOB_URL if url is None else url
+    if not url:
+        return None
+    if url not in _stores:
+        if url.startswith("s3://"):
+            bucket, _, prefix = url[len("s3://"):].partition("/")
+            if prefix and not prefix.endswith("/"):
+                prefix += "/"
+            _stores[url] = S3BlobStore(bucket, prefix)
+        else:
+            _stores[url] = FileBlobStore(url[len("file://"):] if url.startswith("file://") else url)
+    return _stores[url]
+
+
+def pack_array(values):
+    """
+    Packed form of a numeric list, or None if it is ragged, non-numeric or short.
+
+    values (list): flat or nested list of floats or ints
+
+    Returns:
+        dict: dtype, shape, codec and data (bytes)
+    """
+    import numpy as np
+    try:
+        arr = np.asarray(values)
+    except ValueError:
+        # Ragged nesting
+        return None
+    if arr.dtype.kind not in DTYPES or arr.size < PACK_MIN_SIZE:
+        return None
+    dtype = DTYPES[arr.dtype.kind]
+    data = arr.astype(dtype, copy=False).tobytes()
+    codec = "raw"
+    if COMPRESSION == "zlib":
+        data, codec = zlib.compress(data, ZLIB_LEVEL), "zlib"
+    return {"dtype": dtype, "shape": list(arr.shape), "codec": codec, "data": data}
+
+
+def _packable(values):
+    # Cheap pre-check before handing the list to NumPy
+    first = values[0] if values else None
+    return isinstance(first, (float, int, list)) and not isinstance(first, bool)
+
+
+def _encode(obj, arrays):
+    if isinstance(obj, float):
+        return Decimal(str(obj))
+    if isinstance(obj, dict):
+        return {k: _encode(v, arrays) for k, v in obj.items()}
+    if isinstance(obj, list):
+        packed = pack_array(obj) if _packable(obj) else None
+        if packed is not None:
+            arrays.append(packed)
+            return {PACKED: packed}
+        return [_encode(v, arrays) for v in obj]
+    return obj
+
+
+def encode_result(raw, job_id):
+    """
+    DynamoDB form of a raw result, spilling large arrays to the blob store.
+
+    raw: result as returned by `jobs.run_job`
+    job_id (str): prefix of the blob keys
+
+    Returns:
+        the result with floats as Decimal and numeric lists packed
+    """
+    if not PACKING_ENABLED:
+        return to_decimal(raw)
+    arrays = []
+    stored = _encode(raw, arrays)
+    inline = sum(len(a["data"]) for a in arrays)
+    store = blob_store() if inline > INLINE_BYTES else None
+    if store is not None:
+        for n, packed in sorted(enumerate(arrays), key=lambda p: -len(p[1]["data"])):
+            if inline <= INLINE_BYTES:
+                break
+            key = f"{job_id}/{n}"
+            data = packed.pop("data")
+            store.put(key, data)
+            packed["blob"] = key
+            inline -= len(data)
+    return stored
+
+
+def iter_bytes(packed, chunk_size=STREAM_CHUNK_BYTES):
+    """
+    Little-endian bytes of a packed array in chunks, decompressed as they go.
+
+    Raises KeyError if its blob is gone.
+    """
+    if "data" in packed:
+        # boto3 hands Binary attributes back wrapped
+        chunks = [getattr(packed["data"], "value", packed["data"])]
+    else:
+        store = blob_store()
+        if store is None:
+            raise KeyError(packed["blob"])
+        chunks = store.iter_chunks(packed["blob"], chunk_size)
+    if packed["codec"] == "zlib":
+        inflate = zlib.decompressobj()
+        for chunk in chunks:
+            yield inflate.decompress(chunk)
+        yield inflate.flush()
+    else:
+        yield from chunks
+
+
+def unpack_array(packed):
+    """Nested list of Python floats (or ints) from a packed array."""
+    values = array.array(TYPECODES[packed["dtype"]], b"".join(iter_bytes(packed)))
+    if sys.byteorder == "big":
+        values.byteswap()
+    flat = values.tolist()
+    shape = [int(n) for n in packed["shape"]]
+    for n in reversed(shape[1:]):
+        flat = [flat[i:i + n] for i in range(0, len(flat), n)]
+    return flat
+
+
+def decode_result(stored):
+    """Plain result from its stored form: Decimals to floats, packed arrays to lists."""
+    if isinstance(stored, Decimal):
+        return float(stored)
+    if isinstance(stored, dict):
+        if PACKED in stored:
+            return unpack_array(stored[PACKED])
+        return {k: decode_result(v) for k, v in stored.items()}
+    if isinstance(stored, list):
+        return [decode_result(v) for v in stored]
+    return stored
+
+
+def find_packed(stored, path):
+    """
+    The packed array at a dotted path into a stored result ('pnl', 'prices').
+
+    Returns:
+        dict: the packed map, or None if there is no packed array there
+    """
+    node = stored
+    for part in filter(None, path.split(".")):
+        if isinstance(node, dict) and PACKED not in node:
+            node = node.get(part)
+        elif isinstance(node, list) and part.isdigit() and int(part) < len(node):
+            node = node[int(part)]
+        else:
+            return None
+    return node.get(PACKED) if isinstance(node, dict) else None
@@ -0,0 +1,149 @@
+"""
+Waiting on job completion for long-poll and server-sent-event clients.
+
+A client used to find out a job was done by polling GET /result/{id} every
+2 seconds, so even a 50 ms job could take 2 s to show up. Here the API
+holds the connection and polls on the client's behalf: one `ResultWatcher`
+per process reads the status of every job its connections wait on, with one
+BatchGetItem per tick.
+
+This is server-side polling. The worker's completion write signals nothing;
+only jobs the API computes itself are announced with `notify`, without a
+read. The first ticks are quick, so short jobs come back within a few
+hundred ms. After that the watcher backs off to POLL_INTERVALS[-1], and a
+25 s wait costs around 12 reads, about as many as 2 s client polling did.
+Each read is billed on the full item size; the projection only trims what
+comes over the wire.
+
+So the gain is latency, not fewer reads. On Lambda each container serves
+one request at a time, so every waiting client has its own watcher and
+reads. Under uvicorn the connections of a process share one watcher and its
+reads. Pushing completions from the worker (e.g. a DynamoDB Stream) would
+remove the reads, but would need a way to reach every API container.
+"""
+import asyncio
+from collections import defaultdict
+
+# Seconds between status reads, from when a new job is first watched
+POLL_INTERVALS = (0.05, 0.25, 1.0, 2.0, 3.0)
+# Keys per BatchGetItem request
+BATCH_KEYS = 100
+
+
+def completed_jobs(table, job_ids):
+    """IDs among job_ids whose result item is written, read in batches of BATCH_KEYS."""
+    done = []
+    for start in range(0, len(job_ids), BATCH_KEYS):
+        keys = [{"jobId": {"S": job_id}} for job_id in job_ids[start:start + BATCH_KEYS]]
+        resp = table.meta.client.batch_get_item(RequestItems={table.name: {
+            "Keys": keys,
+            # Only what tells us it's done; RCUs are still charged on the whole item
+            "ProjectionExpression": "jobId, #s",
+            "ExpressionAttributeNames": {"#s": "status"},
+        }})
+        # Unprocessed keys are simply read again next tick
+        for item in resp["Responses"].get(table.name, []):
+            if item.get("status", {}).get("S") in ("done", "error"):
+                done.append(item["jobId"]["S"])
+    return done
+
+
+class ResultWatcher:
+    """Job IDs watched by this process's open connections, read together each tick."""
+
+    def __init__(self, table):
+        # Called per tick, so the table can be built lazily
+        self._table = table
+        self._waiting = defaultdict(set)
+        self._task = None
+        self._wake = None
+
+    def notify(self, job_id):
+        """
+        Wake everyone waiting on job_id, e.g. once the API has stored its
+        result. Safe to call from threadpool endpoints.
+        """
+        loop = self._task.get_loop() if self._task is not None else None
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if loop is None or loop is running:
+            self._notify(job_id)
+        elif not loop.is_closed():
+            loop.call_soon_threadsafe(self._notify, job_id)
+
+    def _notify(self, job_id):
+        for queue in self._waiting.pop(job_id, ()):
+            queue.put_nowait(job_id)
+
+    def _ensure_running(self):
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            self._wake = asyncio.Event()
+            self._task = loop.create_task(self._run())
+        else:
+            self._wake.set()
+
+    async def _run(self):
+        tick = 0
+        while self._waiting:
+            # Cleared before the read, so jobs watched during it trigger another
+            self._wake.clear()
+            try:
+                done = await asyncio.to_thread(completed_jobs, self._table(), list(self._waiting))
+            except Exception as e:
+                print(f"Result watcher read failed: {e!r}")
+                done = []
+            for job_id in done:
+                self._notify(job_id)
+            try:
+                await asyncio.wait_for(self._wake.wait(), POLL_INTERVALS[min(tick, len(POLL_INTERVALS) - 1)])
+                tick = 0
+            except asyncio.TimeoutError:
+                tick += 1
+
+    async def watch(self, job_ids, timeout, wait_for="all", heartbeat=None):
+        """
+        Yield job IDs as they complete.
+
+        job_ids (list): jobs to wait on
+        timeout (float): seconds after which to stop, whatever is still pending
+        wait_for (str): 'all' to wait for every job, or 'any' to stop after
+            the first completion (plus any completed along with it)
+        heartbeat (float): if set, yield None after this many idle seconds,
+            so a stream can send a keep-alive
+
+        Yields:
+            str: each completed job ID once, or None on a heartbeat
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        pending = set(job_ids)
+        queue = asyncio.Queue()
+        for job_id in pending:
+            self._waiting[job_id].add(queue)
+        self._ensure_running()
+        try:
+            while pending:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return
+                try:
+                    job_id = await asyncio.wait_for(queue.get(), min(remaining, heartbeat or remaining))
+                except asyncio.TimeoutError:
+                    if heartbeat and deadline - loop.time() > 0:
+                        yield None
+                    continue
+                if job_id in pending:
+                    pending.discard(job_id)
+                    yield job_id
+                    if wait_for == "any" and queue.empty():
+                        return
+        finally:
+            for job_id in pending:
+                waiters = self._waiting.get(job_id)
+                if waiters is not None:
+                    waiters.discard(queue)
+                    if not waiters:
+                        del self._waiting[job_id]
@@ -0,0 +1,161 @@
+"""
+Scenario grids: P&L of a multi-leg strategy over spot x vol x horizon.
+
+A strategy is a list of legs: calls, puts and stock, each with a signed
+quantity and the premium paid for it (for stock, the entry price). At every
+grid point (S, vol, t) each option leg is repriced with BSM at the remaining
+maturity expiry - t. Legs that have expired by t are worth their intrinsic
+value. Stock is worth S. P&L is the sum over legs of quantity x (value -
+premium), measured at the horizon without financing or carry, like the
+expiry P&L functions in `models`. At t = expiry those functions are a
+single-vol slice of this cube.
+
+The grid is never looped over: legs, spots, vols and times are separate
+array axes, and one `bsm_price` call prices a block of spots for every leg,
+vol and time at once. Large cubes are produced one block of spots at a
+time by `scenario_chunks`, so memory stays bounded by `chunk_cells`.
+"""
+import numpy as np
+
+from bsm import bsm_price
+
+LEG_TYPES = ("call", "put", "stock")
+# Preset strategies matching the expiry P&L functions in models
+STRATEGIES = ("protective_put", "covered_call", "collar")
+# Leg x grid-point cells priced per block of spots
+DEFAULT_CHUNK_CELLS = 250_000
+
+
+def strategy_legs(strategy, expiry, K_put=None, premium_put=None, K_call=None, premium_call=None, S0=None):
+    """
+    Legs of a preset strategy: long one share plus a long put (protective_put),
+    a short call (covered_call) or both (collar).
+
+    Premiums left as None are filled in by `prepare_legs` at the BSM value.
+    S0 is the stock entry price and defaults to the base spot.
+
+    Returns:
+        list of leg dicts (option_type, strike, expiry, quantity, premium)
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {strategy}")
+    legs = [{"option_type": "stock", "quantity": 1.0, "premium": S0}]
+    if strategy in ("protective_put", "collar"):
+        if K_put is None:
+            raise ValueError(f"K_put is required for {strategy}")
+        legs.append({"option_type": "put", "strike": K_put, "expiry": expiry, "quantity": 1.0, "premium": premium_put})
+    if strategy in ("covered_call", "collar"):
+        if K_call is None:
+            raise ValueError(f"K_call is required for {strategy}")
+        legs.append({"option_type": "call", "strike": K_call, "expiry": expiry, "quantity": -1.0, "premium": premium_call})
+    return legs
+
+
+def prepare_legs(legs, spot, vol=None, rate=0.0, q=0.0):
+    """
+    Validate legs and turn them into columns, filling in missing premiums.
+
+    A missing option premium is the BSM value at the base spot and vol, so
+    the P&L at the base point is zero; a missing stock premium is the spot.
+
+    Returns:
+        dict of numpy.ndarray: is_call, is_stock, strike, expiry, quantity, premium
+    """
+    if not legs:
+        raise ValueError("A scenario needs at least one leg")
+    kinds = [leg.get("option_type", "call") for leg in legs]
+    bad = [k for k in kinds if k not in LEG_TYPES]
+    if bad:
+        raise ValueError(f"Unknown leg type: {bad[0]}")
+    is_stock = np.array([k == "stock" for k in kinds])
+    is_call = np.array([k == "call" for k in kinds])
+    # Stock legs get placeholder strike/expiry so the option kernel stays finite
+    strike = np.array([spot if s else leg.get("strike", np.nan) for leg, s in zip(legs, is_stock)], dtype=float)
+    expiry = np.array([1.0 if s else leg.get("expiry", np.nan) for leg, s in zip(legs, is_stock)], dtype=float)
+    quantity = np.array([leg.get("quantity", 1.0) for leg in legs], dtype=float)
+    premium = np.array([np.nan if leg.get("premium") is None else leg["premium"] for leg in legs], dtype=float)
+
+    options = ~is_stock
+    if np.any(~(strike[options] > 0)) or np.any(~(expiry[options] > 0)):
+        raise ValueError("Option legs need a positive strike and expiry")
+
+    missing = np.isnan(premium)
+    premium[missing & is_stock] = spot
+    fill = missing & options
+    if fill.any():
+        if vol is None:
+            raise ValueError("vol is required to price legs given without a premium")
+        premium[fill] = bsm_price(spot, strike[fill], rate, vol, expiry[fill], is_call[fill], q)
+
+    return {"is_call": is_call, "is_stock": is_stock, "strike": strike,
+            "expiry": expiry, "quantity": quantity, "premium": premium}
+
+
+def _grid_axes(spots, vols, times):
+    spots = np.asarray(spots, dtype=float).ravel()
+    vols = np.asarray(vols, dtype=float).ravel()
+    times = np.asarray(times, dtype=float).ravel()
+    if spots.size == 0 or vols.size == 0 or times.size == 0:
+        raise ValueError("Scenario axes must not be empty")
+    if np.any(~(spots > 0)) or np.any(~(vols > 0)) or np.any(~(times >= 0)):
+        raise ValueError("Scenario spots and vols must be positive and times non-negative")
+    return spots, vols, times
+
+
+def scenario_chunks(columns, spots, vols, times, rate=0.0, q=0.0, chunk_cells=DEFAULT_CHUNK_CELLS):
+    """
+    Generate the P&L cube in blocks of consecutive spots.
+
+    columns: legs from `prepare_legs`
+    spots, vols, times: grid axes; times are horizons in years from now
+    chunk_cells: bound on legs x grid points priced per block
+
+    Yields:
+        tuple: (index of the block's first spot, P&L array of shape
+        (block spots, len(vols), len(times)))
+    """
+    spots, vols, times = _grid_axes(spots, vols, times)
+    legs = columns["quantity"].size
+    block = max(1, chunk_cells // (legs * vols.size * times.size))
+
+    # Axes: leg, spot, vol, time
+    K = columns["strike"][:, None, None, None]
+    is_call = columns["is_call"][:, None, None, None]
+    is_stock = columns["is_stock"][:, None, None, None]
+    tau = columns["expiry"][:, None, None, None] - times[None, None, None, :]
+    live = tau > 0
+    # Expired legs are priced at a dummy maturity, then replaced by intrinsic value
+    tau = np.where(live, tau, 1.0)
+    sigma = vols[None, None, :, None]
+    cost = columns["premium"][:, None, None, None]
+    quantity = columns["quantity"]
+
+    for start in range(0, spots.size, block):
+        S = spots[start:start + block][None, :, None, None]
+        value = bsm_price(S, K, rate, sigma, tau, is_call, q)
+        intrinsic = np.where(is_call, np.maximum(S - K, 0.0), np.maximum(K - S, 0.0))
+        value = np.where(live, value, intrinsic)
+        value = np.where(is_stock, S, value)
+        yield start, np.tensordot(quantity, value - cost, axes=1)
+
+
+def scenario_pnl(legs, spots, vols, times, spot, vol=None, rate=0.0, q=0.0, chunk_cells=DEFAULT_CHUNK_CELLS):
+    """
+    Full P&L cube of a strategy over a spot x vol x time grid.
+
+    legs (list): dicts with option_type ('call', 'put' or 'stock'), strike,
+        expiry, quantity (signed) and optional premium
+    spots, vols, times (array-like): grid axes; times are horizons in years
+    spot, vol (float): base market used for missing premiums
+    rate, q (float): risk-free rate and dividend yield for repricing
+
+    Returns:
+        dict: pnl (ndarray of shape (len(spots), len(vols), len(times))) and
+        premiums (ndarray, one per leg)
+    """
+    columns = prepare_legs(legs, spot, vol, rate, q)
+    spots, vols, times = _grid_axes(spots, vols, times)
+    pnl = np.empty((spots.size, vols.size, times.size))
+    for start, block in scenario_chunks(columns, spots, vols, times, rate, q, chunk_cells):
+        pnl[start:start + block.shape[0]] = block
+    return {"pnl": pnl, "premiums": columns["premium"]}
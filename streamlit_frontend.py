@@ -20,8 +20,11 @@ page = st.sidebar.radio(
     ["Price", "Greeks", "Hedge", "Payoff"]
 )
 
+# Seconds the API holds each GET /result/{id}/wait before answering "pending"
+WAIT_SECONDS = 20
+
 def submit_and_poll(endpoint: str, payload: dict):
-    """Helper to POST payload, get jobId, then poll /result until done."""
+    """Helper to POST payload, get jobId, then long-poll /result/{id}/wait until done (unless run inline)."""
     # 1) submit
     post_resp = requests.post(f"{api_url}/{endpoint}", json=payload)
     if not post_resp.ok:
@@ -39,11 +42,21 @@ def submit_and_poll(endpoint: str, payload: dict):
     logs = [f"▶ {time.strftime('%H:%M:%S')} – Submitted job: {job_id}"]
     log_container.text_area("Job Log", "\n".join(logs), height=200)
 
-    # 2) poll until done
-    status = None
-    data = {}
+    # cheap jobs are computed inline by the API and come back already done
+    status = body.get("status")
+    data = body
+    if status == "done":
+        logs.append(f"▶ {time.strftime('%H:%M:%S')} – Computed inline ({body.get('mode')})")
+        log_container.text_area("Job Log", "\n".join(logs), height=200)
+        st.success("✅ Done!")
+
+    # 2) long-poll: each request returns as soon as the job is done
     while status != "done":
-        get_resp = requests.get(f"{api_url}/result/{job_id}")
+        get_resp = requests.get(
+            f"{api_url}/result/{job_id}/wait",
+            params={"timeout": WAIT_SECONDS},
+            timeout=WAIT_SECONDS + 10,
+        )
         if not get_resp.ok:
             st.error(f"Polling error {get_resp.status_code}: {get_resp.text}")
             return None
@@ -58,8 +71,6 @@ def submit_and_poll(endpoint: str, payload: dict):
             st.success("✅ Done!")
             break
 
-        time.sleep(2)
-
     # 3) pull your actual payload out of the "result" field
     result_payload = data.get("result")
     st.success(data)
@@ -84,7 +95,14 @@ if page == "Price":
              "bin_amer_call", "bin_amer_put",
              "bin_eur_call", "bin_eur_put",
              "bsm_eur_call", "bsm_eur_put",
-             "cve_amer_call"]
+             "cve_amer_call",
+             "tri_amer_call", "tri_amer_put",
+             "pde_amer_call", "pde_amer_put",
+             "pde_eur_call", "pde_eur_put",
+             "mc_asian_call", "mc_asian_put",
+             "mc_barrier_call", "mc_barrier_put",
+             "mc_lookback_call", "mc_lookback_put",
+             "lsm_amer_call", "lsm_amer_put"]
         )
         option_type = st.selectbox("Option Type", ["call", "put"])
         spot = st.number_input("Spot Price", value=100.0)
@@ -96,6 +114,20 @@ if page == "Price":
         q = st.number_input("Dividend Yield", value=0.0)
         sims = st.number_input("MC Simulations", value=100_000, step=1_000)
         steps = st.number_input("Binomial Steps", value=5_000, step=100)
+        acceleration = st.selectbox("Binomial Acceleration", ["none", "bbs", "richardson", "bbsr"])
+        monitoring_steps = st.number_input("Path MC Monitoring Dates", value=252, step=1)
+        barrier = st.number_input("Barrier Level (mc_barrier_*)", value=120.0)
+        barrier_type = st.selectbox(
+            "Barrier Type (mc_barrier_*)",
+            ["up_and_out", "up_and_in", "down_and_out", "down_and_in"]
+        )
+        target_std_error = st.number_input(
+            "MC Target Std Error (0 = run all simulations)", value=0.0, format="%.4f"
+        )
+        variance_reduction = st.multiselect(
+            "MC Variance Reduction",
+            ["antithetic", "control_variate", "moment_matching", "sobol"]
+        )
 
     if st.button("Calculate Price"):
         payload = {
@@ -108,8 +140,18 @@ if page == "Price":
             "option_type": option_type,
             "q": q,
             "sims": int(sims),
-            "steps": int(steps)
+            "steps": int(steps),
+            "variance_reduction": variance_reduction
         }
+        if target_std_error > 0:
+            payload["target_std_error"] = target_std_error
+        if acceleration != "none" and model.startswith("bin_"):
+            payload["acceleration"] = acceleration
+        if model.startswith(("mc_asian", "mc_barrier", "mc_lookback")):
+            payload["monitoring_steps"] = int(monitoring_steps)
+        if model.startswith("mc_barrier"):
+            payload["barrier"] = barrier
+            payload["barrier_type"] = barrier_type
         result = submit_and_poll("price", payload)
         if result is not None:
             st.subheader("Price Result")
@@ -119,6 +161,12 @@ if page == "Price":
 
 elif page == "Greeks":
     st.header("Option Greeks Calculation")
+    greeks_model = st.selectbox(
+        "Model",
+        ["bs", "bin_amer_call", "bin_amer_put", "bin_eur_call", "bin_eur_put",
+         "pde_amer_call", "pde_amer_put", "mc_call", "mc_put"]
+    )
+    greeks_option_type = st.selectbox("Option Type", ["call", "put"])
     spot = st.number_input("Spot Price", value=100.0)
     strike = st.number_input("Strike Price", value=100.0)
     rate = st.number_input("Risk-free Rate", value=0.01)
@@ -131,7 +179,9 @@ elif page == "Greeks":
             "strike": strike,
             "rate": rate,
             "vol": vol,
-            "time": time_to_mat
+            "time": time_to_mat,
+            "model": greeks_model,
+            "option_type": greeks_option_type
         }
         result = submit_and_poll("greeks", payload)
         if result is not None:
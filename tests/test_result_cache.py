@@ -0,0 +1,18 @@
+from result_cache import canonical_key
+
+CONTRACT = {"model": "mc_call", "spot": 100.0, "strike": 105.0, "rate": 0.05, "vol": 0.2, "time": 1.0}
+
+
+def test_large_seeds_get_distinct_keys():
+    for a, b in ((12345678901, 12345678902), (2**40, 2**40 + 1)):
+        assert canonical_key("price", {**CONTRACT, "seed": a}) != canonical_key("price", {**CONTRACT, "seed": b})
+
+
+def test_int_and_float_spellings_share_a_key():
+    assert canonical_key("price", {**CONTRACT, "spot": 100}) == canonical_key("price", CONTRACT)
+
+
+def test_set_fields_ignore_order():
+    a = canonical_key("price", {**CONTRACT, "variance_reduction": ["antithetic", "control_variate"]})
+    b = canonical_key("price", {**CONTRACT, "variance_reduction": ["control_variate", "antithetic"]})
+    assert a == b
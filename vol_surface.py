@@ -0,0 +1,206 @@
+"""
+Implied volatility surfaces: per-expiry SVI fits interpolated in total variance.
+
+Each expiry's implied vols are fitted with the raw SVI parametrization
+
+    w(k) = a + b (rho (k - m) + sqrt((k - m)^2 + s^2))
+
+of total implied variance w = vol^2 T against log-forward moneyness
+k = ln(K / F(T)). Between expiries, total variance is interpolated linearly
+in T at fixed k, which keeps calendar spreads arbitrage-free wherever the
+fitted slices don't cross. Before the first expiry the first slice is
+scaled down in T. After the last expiry the last slice's vol is held flat.
+
+Quotes are kept per expiry, so an update only refits the expiries whose
+quotes changed, and each of those refits is warm-started from its previous
+parameters.
+"""
+import math
+import uuid
+
+import numpy as np
+from scipy.optimize import least_squares
+
+from implied_vol import implied_vol
+
+# Quotes needed to fit an SVI slice; thinner expiries get a flat slice
+SVI_MIN_QUOTES = 5
+# Floor on total variance returned by lookups
+MIN_TOTAL_VARIANCE = 1e-10
+
+
+def svi_total_variance(k, a, b, rho, m, s):
+    """Raw SVI total variance at log-moneyness k; all arguments broadcast."""
+    return a + b * (rho * (k - m) + np.sqrt((k - m) ** 2 + s**2))
+
+
+def fit_svi(k, w, initial=None):
+    """
+    Least-squares SVI fit of total variance w at log-moneyness k.
+
+    Returns:
+        tuple: ((a, b, rho, m, s), rmse of the fit in total variance)
+    """
+    k = np.asarray(k, dtype=float)
+    w = np.asarray(w, dtype=float)
+    if k.size < SVI_MIN_QUOTES:
+        # Not enough quotes to pin down five parameters: flat slice
+        a = float(w.mean())
+        return (a, 0.0, 0.0, 0.0, 1.0), float(np.sqrt(np.mean((w - a) ** 2)))
+
+    if initial is None:
+        initial = (float(w.min()), 0.1, 0.0, float(k[np.argmin(w)]), 0.1)
+    lower = (-float(w.max()), 0.0, -0.999, float(k.min()) - 1.0, 1e-4)
+    upper = (float(w.max()), 10.0, 0.999, float(k.max()) + 1.0, 10.0)
+    initial = np.clip(initial, lower, upper)
+
+    fit = least_squares(
+        lambda x: svi_total_variance(k, *x) - w,
+        initial, bounds=(lower, upper), method="trf", x_scale="jac",
+    )
+    return tuple(float(x) for x in fit.x), float(np.sqrt(np.mean(fit.fun**2)))
+
+
+class VolSurface:
+    """
+    SVI volatility surface built from (expiry, strike, vol) quotes.
+
+    spot, rate, q set the forward F(T) = spot e^{(rate - q) T} used for
+    log-moneyness.
+    """
+
+    def __init__(self, spot, rate=0.0, q=0.0, surface_id=None):
+        self.surface_id = surface_id or str(uuid.uuid4())
+        self.spot = float(spot)
+        self.rate = float(rate)
+        self.q = float(q)
+        self.version = 0
+        self._quotes = {}    # expiry -> {strike: vol}
+        self._params = {}    # expiry -> (a, b, rho, m, s)
+        self._rmse = {}      # expiry -> fit rmse in total variance
+        self._expiries = np.empty(0)
+        self._table = np.empty((0, 5))
+
+    def forward(self, T):
+        return self.spot * np.exp((self.rate - self.q) * np.asarray(T, dtype=float))
+
+    def update(self, expiries, strikes, vols):
+        """
+        Add, replace or (with vol None/NaN) remove quotes, then refit only the touched expiries.
+
+        Returns:
+            list of the expiries that were refitted
+        """
+        touched = set()
+        for T, K, vol in zip(expiries, strikes, vols):
+            T, K = float(T), float(K)
+            if T <= 0 or K <= 0:
+                raise ValueError("Quotes need positive expiry and strike")
+            slice_quotes = self._quotes.setdefault(T, {})
+            if vol is None or not math.isfinite(vol):
+                slice_quotes.pop(K, None)
+            elif vol <= 0:
+                raise ValueError("Quoted vols must be positive")
+            else:
+                slice_quotes[K] = float(vol)
+            touched.add(T)
+
+        for T in sorted(touched):
+            slice_quotes = self._quotes[T]
+            if not slice_quotes:
+                del self._quotes[T]
+                self._params.pop(T, None)
+                self._rmse.pop(T, None)
+                continue
+            K = np.fromiter(slice_quotes.keys(), dtype=float)
+            vol = np.fromiter(slice_quotes.values(), dtype=float)
+            k = np.log(K / self.forward(T))
+            self._params[T], self._rmse[T] = fit_svi(k, vol**2 * T, self._params.get(T))
+
+        self._expiries = np.array(sorted(self._params))
+        self._table = np.array([self._params[T] for T in self._expiries]).reshape(-1, 5)
+        self.version += 1
+        return sorted(touched)
+
+    def implied_vols(self, expiries, strikes, prices, option_type="call"):
+        """Implied vols of option price quotes under this surface's spot, rate and q (vectorized)."""
+        solved = implied_vol(prices, self.spot, strikes, self.rate, expiries, option_type, self.q)
+        vols = np.where(solved["converged"], solved["vol"], np.nan)
+        bad = np.isnan(vols)
+        if bad.any():
+            raise ValueError(f"{int(bad.sum())} quote(s) have no implied vol")
+        return vols
+
+    def total_variance(self, K, T):
+        """Total implied variance at strikes K and times T (broadcast arrays)."""
+        if self._expiries.size == 0:
+            raise ValueError(f"Surface {self.surface_id} has no quotes")
+        K, T = np.broadcast_arrays(np.asarray(K, dtype=float), np.asarray(T, dtype=float))
+        k = np.log(K / self.forward(T))
+        expiries = self._expiries
+
+        # Bracketing slices for each point; both ends clamp to the first/last slice
+        hi = np.clip(np.searchsorted(expiries, T), 0, expiries.size - 1)
+        lo = np.clip(hi - 1, 0, expiries.size - 1)
+        w_lo = svi_total_variance(k, *self._table[lo].T.reshape(5, *k.shape))
+        w_hi = svi_total_variance(k, *self._table[hi].T.reshape(5, *k.shape))
+        t_lo, t_hi = expiries[lo], expiries[hi]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weight = np.where(t_hi > t_lo, (T - t_lo) / (t_hi - t_lo), 0.0)
+        w = w_lo + weight * (w_hi - w_lo)
+        # Outside the quoted range: scale the nearest slice, i.e. flat vol in T
+        w = np.where(T < expiries[0], w_hi * T / expiries[0], w)
+        w = np.where(T > expiries[-1], w_hi * T / expiries[-1], w)
+        return np.maximum(w, MIN_TOTAL_VARIANCE)
+
+    def vol(self, K, T):
+        """Implied vols at strikes K and times T (broadcast arrays)."""
+        T = np.asarray(T, dtype=float)
+        if np.any(T <= 0):
+            raise ValueError("Surface lookups need positive times")
+        return np.sqrt(self.total_variance(K, T) / T)
+
+    def summary(self):
+        return {
+            "surface_id": self.surface_id,
+            "version": self.version,
+            "spot": self.spot,
+            "rate": self.rate,
+            "q": self.q,
+            "slices": [
+                {
+                    "expiry": float(T),
+                    "quotes": len(self._quotes[T]),
+                    "params": dict(zip(("a", "b", "rho", "m", "s"), self._params[T])),
+                    "rmse": self._rmse[T],
+                }
+                for T in self._expiries
+            ],
+        }
+
+    def to_dict(self):
+        """Serializable state (quotes and fitted parameters) for persisting the surface."""
+        return {
+            "surface_id": self.surface_id,
+            "version": self.version,
+            "spot": self.spot,
+            "rate": self.rate,
+            "q": self.q,
+            "quotes": [[T, K, v] for T, sl in self._quotes.items() for K, v in sl.items()],
+            "params": [[T, *p] for T, p in self._params.items()],
+            "rmse": [[T, e] for T, e in self._rmse.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a surface saved with `to_dict` without refitting."""
+        surface = cls(data["spot"], data["rate"], data["q"], data["surface_id"])
+        surface.version = int(data["version"])
+        for T, K, v in data["quotes"]:
+            surface._quotes.setdefault(float(T), {})[float(K)] = float(v)
+        surface._params = {float(row[0]): tuple(float(x) for x in row[1:]) for row in data["params"]}
+        surface._rmse = {float(T): float(e) for T, e in data["rmse"]}
+        surface._expiries = np.array(sorted(surface._params))
+        surface._table = np.array([surface._params[T] for T in surface._expiries]).reshape(-1, 5)
+        return surface
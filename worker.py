@@ -2,161 +2,113 @@ import os
 import json
 import time
 import boto3
-import numpy as np
-from decimal import Decimal
-from models import (
-    BSM,
-    binomial_tree_american_option,
-    binomial_tree_call,
-    delta, gamma, vega, hedge_ratio,
-    protective_put_pl, covered_call_pl, collar_pl
-)
-from monte_carlo import monte_carlo_option_price
+from collections import defaultdict
+from jobs import run_job, run_job_group, to_decimal, load_engines, INPUT_ERRORS
+from job_metrics import JobTimer, MetricsAggregator, run_profiled, METRICS_ENABLED
+from result_cache import ResultCache, canonical_key, expires_at, CACHE_ENABLED
+from result_codec import encode_result
 
 # Initialize AWS resources
 dynamodb = boto3.resource("dynamodb")
 results_table = dynamodb.Table(os.environ["RESULTS_TABLE"])
 sqs = boto3.client("sqs")  # if you ever need to send downstream
+# Survives across invocations of a warm container
+result_cache = ResultCache()
+metrics = MetricsAggregator()
+# Every invocation computes, so import the engines during the Lambda init phase
+load_engines()
 
-# Compute functions
 
-def compute_price(params):
-    S = params["spot"]
-    K = params["strike"]
-    r = params["rate"]
-    sigma = params["vol"]
-    T = params["time"]
-    q = params.get("q", 0.0)
-    sims = params.get("sims", 100_000)
-    steps = params.get("steps", 5_000)
-    opt = params.get("option_type", "call")
-    model = params["model"]
-
-    if model == "bs":
-        eng = BSM(S0=S, K=K, r=r, vol=sigma, T=T)
-        return eng.european_call_option_price() if opt == "call" else eng.european_put_option_price()
-
-    if model in ("mc_call", "mc_put"):
-        return monte_carlo_option_price(
-            S0=S, sigma=sigma, r=r, q=q, T=T,
-            K=K, simulations=sims, option_type=opt
-        )
-
-    if model in ("bin_amer_call", "bin_amer_put"):
-        return binomial_tree_american_option(
-            S=S, K=K, T=T, r=r, sigma=sigma,
-            n=steps, option_type=opt
-        )
-
-    if model in ("bin_eur_call", "bin_eur_put"):
-        return binomial_tree_call(
-            S=S, K=K, T=T, r=r, sigma=sigma,
-            n=steps
-        )
-
-    if model in ("bsm_eur_call", "bsm_eur_put"):
-        eng = BSM(S0=S, K=K, r=r, vol=sigma, T=T)
-        return eng.european_call_option_price() if opt == "call" else eng.european_put_option_price()
-
-    if model == "cve_amer_call":
-        amer = binomial_tree_american_option(S=S, K=K, T=T, r=r, sigma=sigma, n=steps, option_type="call")
-        eur_bsm = BSM(S0=S, K=K, r=r, vol=sigma, T=T).european_call_option_price()
-        eur_bin = binomial_tree_call(S=S, K=K, T=T, r=r, sigma=sigma, n=steps)
-        return amer + (eur_bsm - eur_bin)
-
-    raise ValueError(f"Unknown price model: {model}")
-
-
-def compute_greeks(params):
-    S = params["spot"]
-    K = params["strike"]
-    r = params["rate"]
-    sigma = params["vol"]
-    T = params["time"]
-    return {
-        "delta": delta(S0=S, K=K, r=r, vol=sigma, T=T),
-        "gamma": gamma(S0=S, K=K, r=r, vol=sigma, T=T),
-        "vega":  vega(S0=S, K=K, r=r, vol=sigma, T=T),
-    }
-
-
-def compute_hedge(params):
-    hed_qty = hedge_ratio(
-        delta=params["delta"],
-        contracts=params.get("contracts", 1),
-        contract_size=params.get("contract_size", 100)
-    )
-    return {"hedge_quantity": hed_qty}
-
-
-def compute_payoff(params, job_type):
-    S0 = params["S0"]
-    prices = params["prices"]
-    prem_put = params.get("premium_put", 0.0)
-    prem_call = params.get("premium_call", 0.0)
-    K_put = params.get("K_put")
-    K_call = params.get("K_call")
-    arr = np.array(prices)
-
-    if job_type == "protective_put":
-        if K_put is None:
-            raise ValueError("K_put is required for protective_put")
-        payoffs = protective_put_pl(arr, S0, K_put, prem_put)
-
-    elif job_type == "covered_call":
-        if K_call is None:
-            raise ValueError("K_call is required for covered_call")
-        payoffs = covered_call_pl(arr, S0, K_call, prem_call)
-
-    elif job_type == "collar":
-        if K_put is None or K_call is None:
-            raise ValueError("Both K_put and K_call are required for collar")
-        payoffs = collar_pl(arr, S0, K_put, prem_put, K_call, prem_call)
-    else:
-        raise ValueError(f"Unknown payoff type: {job_type}")
-
-    return {"payoffs": payoffs.tolist()}
-
-def _to_decimal(obj):
-    if isinstance(obj, float):
-        # use str() to avoid binary‐float artifacts
-        return Decimal(str(obj))
-    elif isinstance(obj, dict):
-        return {k: _to_decimal(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [_to_decimal(v) for v in obj]
-    else:
-        return obj
-    
 def lambda_handler(event, context):
-    for record in event.get("Records", []):
-        body   = json.loads(record["body"])
-        job_id = body.pop("jobId")
-        job_type = body.pop("jobType")
-
-        # Dispatch compute
-        if job_type == "price":
-            raw = compute_price(body)
-        elif job_type == "greeks":
-            raw = compute_greeks(body)
-        elif job_type == "hedge":
-            raw = compute_hedge(body)
-        elif job_type in ("protective_put", "covered_call", "collar"):
-            raw = compute_payoff(body, job_type)
-        else:
-            raw = {"error": f"Unknown job type: {job_type}"}
-
-        # convert any floats in the result into Decimal
-        result = _to_decimal(raw)
+    """
+    Process a batch of SQS job records.
+
+    Records are grouped by job type and model so closed-form jobs share one
+    vectorized kernel call, and results go out through a single DynamoDB
+    batch writer. Records that fail unexpectedly are reported back in
+    `batchItemFailures` so SQS redelivers only those messages.
+
+    Each job is timed through decode, compute and persist (see
+    `job_metrics`). Its timings are stored with the result, and the
+    per-model counters are flushed once per batch.
+    """
+    picked_up = time.time()
+    failures = []
+    groups = defaultdict(list)
 
-        # now safe to store in DynamoDB
-        results_table.put_item(
-            Item={
+    for record in event.get("Records", []):
+        timer = JobTimer()
+        try:
+            with timer.phase("decode"):
+                body   = json.loads(record["body"])
+                job_id = body.pop("jobId")
+                job_type = body.pop("jobType")
+                meta = body.pop("meta", {})
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            print(f"Undecodable record {record.get('messageId')}: {e}")
+            failures.append(record.get("messageId"))
+            continue
+        timer.add("enqueue", meta.get("enqueueMs", 0.0))
+        # SQS's own send time, falling back to the API's clock
+        sent = record.get("attributes", {}).get("SentTimestamp")
+        sent = int(sent) / 1000 if sent else meta.get("enqueuedAt", picked_up)
+        timer.add("queue_wait", max(0.0, 1000 * (picked_up - sent)))
+        groups[(job_type, body.get("model"))].append((record, job_id, body, timer, meta.get("profile", False)))
+
+    written = []
+    for (job_type, model), items in groups.items():
+        keys = [canonical_key(job_type, body) if CACHE_ENABLED else None for _, _, body, _, _ in items]
+        # Profiled jobs always compute, so there is something to profile
+        outcomes = [result_cache.get(key) if key and not items[i][4] else None for i, key in enumerate(keys)]
+        profiles = {}
+
+        # Dispatch compute for everything the cache didn't answer
+        pending = [i for i, raw in enumerate(outcomes) if raw is None and not items[i][4]]
+        if pending:
+            seconds = []
+            results = run_job_group(job_type, [items[i][2] for i in pending], seconds)
+            for i, raw, s in zip(pending, results, seconds):
+                outcomes[i] = raw
+                items[i][3].add("compute", 1000 * s)
+        for i in (i for i, item in enumerate(items) if item[4]):
+            with items[i][3].phase("compute"):
+                outcomes[i], profiles[i] = run_profiled(run_job, job_type, items[i][2])
+
+        computed = {*pending, *profiles}
+        for i, ((record, job_id, body, timer, _profile), raw) in enumerate(zip(items, outcomes)):
+            if keys[i] and i in computed and not isinstance(raw, Exception):
+                result_cache.put(keys[i], raw, expires_at())
+            error = isinstance(raw, INPUT_ERRORS)
+            if error:
+                # Bad inputs won't improve on retry; store the error
+                raw = {"error": str(raw)}
+            elif isinstance(raw, Exception):
+                print(f"Job {job_id} failed: {raw!r}")
+                failures.append(record["messageId"])
+                continue
+
+            # floats become Decimal and numeric arrays packed bytes (see result_codec)
+            item = {
                 "jobId":    job_id,
-                "status":    "done", 
-                "result":   result,
-                "expiresAt": int(time.time()) + 86400
+                # Errors are kept so GET /result can report them, but are never served as cache hits
+                "status":   "error" if error else "done",
+                "result":   encode_result(raw, job_id),
+                "metrics":  to_decimal(timer.record(job_type, body)),
+                "expiresAt": expires_at()
             }
-        )
-
-    return {"status": "processed"}
\ No newline at end of file
+            if i in profiles:
+                item["profile"] = profiles[i]
+            written.append((item, job_type, model, timer, error))
+
+    start = time.perf_counter()
+    with results_table.batch_writer(overwrite_by_pkeys=["jobId"]) as writer:
+        for item, *_ in written:
+            writer.put_item(Item=item)
+    if written and METRICS_ENABLED:
+        persist_ms = 1000 * (time.perf_counter() - start) / len(written)
+        for _item, job_type, model, timer, error in written:
+            timer.add("persist", persist_ms)
+            metrics.add(job_type, model, timer, error)
+        metrics.flush(results_table)
+
+    return {"batchItemFailures": [{"itemIdentifier": mid} for mid in failures]}